@@ -0,0 +1,309 @@
+"""Asyncio Mini-Uber client over a pooled httpx connection pool"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class MiniUberError(Exception):
+    """An API call failed; ``status_code`` is None when no response was received"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, detail: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class TransportError(MiniUberError):
+    """Connection, timeout or protocol failure before a response arrived"""
+
+
+class BadRequestError(MiniUberError):
+    """400 or 422: the request was rejected as invalid"""
+
+
+class NotFoundError(MiniUberError):
+    """404: the user, ride or route does not exist"""
+
+
+class ConflictError(MiniUberError):
+    """409: e.g. the ride was already accepted by another driver"""
+
+
+class TooManyRequestsError(MiniUberError):
+    """429: slow down; ``retry_after`` is the server's hint in seconds, if any"""
+
+    def __init__(self, message: str, status_code: int, detail: Any = None, retry_after: Optional[float] = None):
+        super().__init__(message, status_code, detail)
+        self.retry_after = retry_after
+
+
+class ServerError(MiniUberError):
+    """5xx from the server"""
+
+
+class ServiceUnavailableError(ServerError):
+    """503: the server is shedding load; ``retry_after`` is its hint in seconds, if any"""
+
+    def __init__(self, message: str, status_code: int, detail: Any = None, retry_after: Optional[float] = None):
+        super().__init__(message, status_code, detail)
+        self.retry_after = retry_after
+
+
+_ERRORS_BY_STATUS = {
+    400: BadRequestError,
+    404: NotFoundError,
+    409: ConflictError,
+    422: BadRequestError,
+}
+
+
+class Page(NamedTuple):
+    """One page of a cursor-paginated list; pass ``next_cursor`` back to get the next one"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def raise_for_response(response: httpx.Response, action: str) -> None:
+    """Raise the MiniUberError subclass matching an error response"""
+    if response.status_code < 400:
+        return
+    try:
+        detail = response.json().get("detail")
+    except (ValueError, AttributeError):
+        detail = response.text
+    message = f"{action} failed: {response.status_code} {detail}"
+    if response.status_code in (429, 503):
+        retry_after = response.headers.get("Retry-After")
+        error = TooManyRequestsError if response.status_code == 429 else ServiceUnavailableError
+        raise error(message, response.status_code, detail, float(retry_after) if retry_after else None)
+    if response.status_code >= 500:
+        raise ServerError(message, response.status_code, detail)
+    raise _ERRORS_BY_STATUS.get(response.status_code, MiniUberError)(message, response.status_code, detail)
+
+
+async def gather_limited(calls: Iterable[Awaitable[T]], concurrency: int = 50,
+                         return_exceptions: bool = True) -> List[Any]:
+    """
+    Await many calls with at most ``concurrency`` in flight, results in input order.
+
+    With ``return_exceptions`` a failed call yields its exception in place of a
+    result, so one rejected ride does not cancel the rest of the batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(call: Awaitable[T]) -> T:
+        async with semaphore:
+            return await call
+
+    return await asyncio.gather(*(limited(call) for call in calls), return_exceptions=return_exceptions)
+
+
+class AsyncMiniUberClient:
+    """
+    Asyncio counterpart of ``MiniUberClient`` sharing one connection pool.
+
+    One instance serves any number of concurrent tasks: connections are kept
+    alive and reused up to ``max_connections``, and calls beyond that wait for
+    a free connection (bounded by ``pool_timeout``). Failures raise
+    ``MiniUberError`` subclasses instead of returning error dicts. With
+    ``read_your_writes`` the client's reads go to the primary for a few
+    seconds after each of its writes, instead of a possibly lagging replica.
+    Use as an async context manager or call ``aclose()``.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000",
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 timeout: float = 10.0,
+                 pool_timeout: Optional[float] = None,
+                 concurrency: int = 50,
+                 read_your_writes: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency  # default bound for the fan-out helpers
+        self.etags: Dict[str, Tuple[str, Any]] = {}  # url -> (ETag, body) for conditional GETs
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, pool=pool_timeout),
+            event_hooks={"response": [self._remember_last_write]} if read_your_writes else None,
+        )
+
+    async def _remember_last_write(self, response: httpx.Response) -> None:
+        """Echo the server's X-Last-Write so reads right after our writes skip lagging replicas"""
+        last_write = response.headers.get("X-Last-Write")
+        if last_write:
+            self.client.headers["X-Last-Write"] = last_write
+
+    async def __aenter__(self) -> "AsyncMiniUberClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _send(self, action: str, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            raise TransportError(f"{action} failed: {e!r}") from e
+        raise_for_response(response, action)
+        return response
+
+    async def _json(self, action: str, method: str, url: str, **kwargs) -> Any:
+        return (await self._send(action, method, url, **kwargs)).json()
+
+    async def _conditional_json(self, action: str, url: str) -> Any:
+        """GET with If-None-Match; a 304 reuses the body we already hold"""
+        cached = self.etags.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            raise TransportError(f"{action} failed: {e!r}") from e
+        if response.status_code == 304 and cached:
+            return cached[1]
+        raise_for_response(response, action)
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etags[url] = (etag, body)
+        else:
+            self.etags.pop(url, None)
+        return body
+
+    async def _page(self, action: str, url: str, limit: int, cursor: Optional[str]) -> Page:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = await self._send(action, "GET", url, params=params)
+        return Page(response.json(), response.headers.get("X-Next-Cursor"))
+
+    async def ping(self, data: str = "ping") -> Dict[str, Any]:
+        """Send ping request to the server"""
+        return await self._json("Ping", "POST", "/api/ping", json={"data": data})
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check server health"""
+        return await self._json("Health check", "GET", "/api/health")
+
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new user"""
+        return await self._json("Create user", "POST", "/api/users/", json=user_data)
+
+    async def get_user(self, user_id: int) -> Dict[str, Any]:
+        """Get a user by ID (revalidated with its ETag)"""
+        return await self._conditional_json("Get user", f"/api/users/{user_id}")
+
+    async def get_users(self, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get a page of users"""
+        return await self._page("Get users", "/api/users/", limit, cursor)
+
+    async def bulk_create_users(self, users: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many users in one request"""
+        return await self._json("Bulk create users", "POST", "/api/users/bulk", json=users)
+
+    async def create_ride(self, ride_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new ride"""
+        return await self._json("Create ride", "POST", "/api/rides/", json=ride_data)
+
+    async def bulk_create_rides(self, rides: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many ride requests in one request"""
+        return await self._json("Bulk create rides", "POST", "/api/rides/bulk", json=rides)
+
+    async def get_ride(self, ride_id: int) -> Dict[str, Any]:
+        """Get a ride by ID; cheap to poll, unchanged rides come back as 304"""
+        return await self._conditional_json("Get ride", f"/api/rides/{ride_id}")
+
+    async def get_available_rides(self) -> List[Dict[str, Any]]:
+        """Get available rides"""
+        return await self._json("Get rides", "GET", "/api/rides/")
+
+    async def get_nearby_rides(self, latitude: float, longitude: float, radius_km: float = 5.0,
+                               limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the nearest requested rides around a position"""
+        return await self._json("Get nearby rides", "GET", "/api/rides/nearby", params={
+            "latitude": latitude, "longitude": longitude, "radius_km": radius_km, "limit": limit,
+        })
+
+    async def accept_ride(self, ride_id: int, driver_id: int) -> Dict[str, Any]:
+        """Accept a ride, ConflictError if it is no longer requested"""
+        return await self._json("Accept ride", "PUT", f"/api/rides/{ride_id}/accept",
+                                params={"driver_id": driver_id})
+
+    async def start_ride(self, ride_id: int) -> Dict[str, Any]:
+        """Start a ride"""
+        return await self._json("Start ride", "PUT", f"/api/rides/{ride_id}/start")
+
+    async def complete_ride(self, ride_id: int) -> Dict[str, Any]:
+        """Complete a ride (the server computes fare, distance and duration)"""
+        return await self._json("Complete ride", "PUT", f"/api/rides/{ride_id}/complete")
+
+    async def get_quotes(self, trips: List[Dict[str, float]], tariff: Optional[str] = None) -> Dict[str, Any]:
+        """Quote fare, distance and duration for many trips (pickup_/destination_ latitude/longitude)"""
+        return await self._json("Get quotes", "POST", "/api/pricing/quotes",
+                                json={"tariff": tariff, "trips": trips})
+
+    async def update_driver_location(self, driver_id: int, latitude: float, longitude: float,
+                                     is_online: bool = True) -> Dict[str, Any]:
+        """Report a driver's current position"""
+        return await self._json("Update driver location", "PUT", f"/api/drivers/{driver_id}/location",
+                                json={"latitude": latitude, "longitude": longitude, "is_online": is_online})
+
+    async def get_nearby_drivers(self, latitude: float, longitude: float, radius_km: float = 5.0,
+                                 limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the nearest online drivers around a position"""
+        return await self._json("Get nearby drivers", "GET", "/api/drivers/nearby", params={
+            "latitude": latitude, "longitude": longitude, "radius_km": radius_km, "limit": limit,
+        })
+
+    async def get_user_rides(self, user_id: int, user_type: str = "passenger", limit: int = 50,
+                             cursor: Optional[str] = None) -> Page:
+        """Get a page of rides for a specific user"""
+        return await self._page("Get user rides", f"/api/rides/{user_type}/{user_id}", limit, cursor)
+
+    async def export_rides(self, **filters) -> AsyncIterator[Dict[str, Any]]:
+        """Stream rides from the NDJSON export (driver_id, passenger_id, status, created_from, created_to)"""
+        try:
+            async with self.client.stream("GET", "/api/rides/export", params=filters) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise_for_response(response, "Export rides")
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
+        except httpx.HTTPError as e:
+            raise TransportError(f"Export rides failed: {e!r}") from e
+
+    # Fan-out helpers: results in input order, a failed call yields its exception
+
+    async def fan_out(self, fn: Callable[..., Awaitable[T]], arguments: Iterable[tuple],
+                  concurrency: Optional[int] = None) -> List[Any]:
+        """Call ``fn(*args)`` for every tuple in ``arguments``, at most ``concurrency`` at a time"""
+        return await gather_limited((fn(*args) for args in arguments), concurrency or self.concurrency)
+
+    async def create_rides(self, rides: List[Dict[str, Any]], concurrency: Optional[int] = None) -> List[Any]:
+        """Create rides one request each, concurrently"""
+        return await self.fan_out(self.create_ride, ((ride,) for ride in rides), concurrency)
+
+    async def get_rides(self, ride_ids: List[int], concurrency: Optional[int] = None) -> List[Any]:
+        """Fetch many rides by ID concurrently"""
+        return await self.fan_out(self.get_ride, ((ride_id,) for ride_id in ride_ids), concurrency)
+
+    async def accept_rides(self, pairs: List[tuple], concurrency: Optional[int] = None) -> List[Any]:
+        """Accept (ride_id, driver_id) pairs concurrently"""
+        return await self.fan_out(self.accept_ride, pairs, concurrency)
+
+    async def update_driver_locations(self, updates: List[tuple], concurrency: Optional[int] = None) -> List[Any]:
+        """Report (driver_id, latitude, longitude) positions concurrently"""
+        return await self.fan_out(self.update_driver_location, updates, concurrency)
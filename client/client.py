@@ -1,11 +1,37 @@
 import requests
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Tuple
 
 class MiniUberClient:
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", read_your_writes: bool = False):
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
+        self.next_cursor = None  # X-Next-Cursor of the last paginated call
+        self.etags: Dict[str, Tuple[str, Any]] = {}  # url -> (ETag, body) for conditional GETs
+        if read_your_writes:
+            self.session.hooks["response"].append(self._remember_last_write)
+
+    def _remember_last_write(self, response: requests.Response, *args, **kwargs) -> None:
+        """Echo the server's X-Last-Write so reads right after our writes skip lagging replicas"""
+        last_write = response.headers.get("X-Last-Write")
+        if last_write:
+            self.session.headers["X-Last-Write"] = last_write
+
+    def _conditional_get(self, url: str) -> Any:
+        """GET with If-None-Match; a 304 reuses the body we already hold"""
+        cached = self.etags.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etags[url] = (etag, body)
+        else:
+            self.etags.pop(url, None)
+        return body
 
     def ping(self, data: str = "ping") -> Dict[str, Any]:
         """Send ping request to the server"""
@@ -46,16 +72,38 @@ class MiniUberClient:
         except requests.exceptions.RequestException as e:
             return {"error": f"Create user failed: {str(e)}"}
 
-    def get_users(self) -> Dict[str, Any]:
-        """Get all users"""
+    def get_user(self, user_id: int) -> Dict[str, Any]:
+        """Get a user by ID (revalidated with its ETag)"""
+        url = f"{self.base_url}/api/users/{user_id}"
+        try:
+            return self._conditional_get(url)
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Get user failed: {str(e)}"}
+
+    def get_users(self, limit: int = 100, cursor: str = None) -> Dict[str, Any]:
+        """Get a page of users; the next page's cursor is kept in self.next_cursor"""
         url = f"{self.base_url}/api/users/"
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
         try:
-            response = self.session.get(url)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
+            self.next_cursor = response.headers.get("X-Next-Cursor")
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": f"Get users failed: {str(e)}"}
 
+    def bulk_create_users(self, users: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many users in one request"""
+        url = f"{self.base_url}/api/users/bulk"
+        try:
+            response = self.session.post(url, json=users)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Bulk create users failed: {str(e)}"}
+
     def create_ride(self, ride_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new ride"""
         url = f"{self.base_url}/api/rides/"
@@ -70,6 +118,24 @@ class MiniUberClient:
         except requests.exceptions.RequestException as e:
             return {"error": f"Create ride failed: {str(e)}"}
 
+    def bulk_create_rides(self, rides: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many ride requests in one request"""
+        url = f"{self.base_url}/api/rides/bulk"
+        try:
+            response = self.session.post(url, json=rides)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Bulk create rides failed: {str(e)}"}
+
+    def get_ride(self, ride_id: int) -> Dict[str, Any]:
+        """Get a ride by ID; cheap to poll, unchanged rides come back as 304"""
+        url = f"{self.base_url}/api/rides/{ride_id}"
+        try:
+            return self._conditional_get(url)
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Get ride failed: {str(e)}"}
+
     def get_available_rides(self) -> Dict[str, Any]:
         """Get available rides"""
         url = f"{self.base_url}/api/rides/"
@@ -80,6 +146,24 @@ class MiniUberClient:
         except requests.exceptions.RequestException as e:
             return {"error": f"Get rides failed: {str(e)}"}
 
+    def get_nearby_rides(self, latitude: float, longitude: float, radius_km: float = 5.0, limit: int = 20) -> Dict[str, Any]:
+        """Get the nearest requested rides around a position"""
+        url = f"{self.base_url}/api/rides/nearby"
+        try:
+            response = self.session.get(
+                url,
+                params={
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "radius_km": radius_km,
+                    "limit": limit
+                }
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Get nearby rides failed: {str(e)}"}
+
     def accept_ride(self, ride_id: int, driver_id: int) -> Dict[str, Any]:
         """Accept a ride"""
         url = f"{self.base_url}/api/rides/{ride_id}/accept"
@@ -103,33 +187,80 @@ class MiniUberClient:
         except requests.exceptions.RequestException as e:
             return {"error": f"Start ride failed: {str(e)}"}
 
-    def complete_ride(self, ride_id: int, fare: float, distance_km: float, duration_minutes: int) -> Dict[str, Any]:
-        """Complete a ride"""
+    def complete_ride(self, ride_id: int) -> Dict[str, Any]:
+        """Complete a ride (the server computes fare, distance and duration)"""
         url = f"{self.base_url}/api/rides/{ride_id}/complete"
+        try:
+            response = self.session.put(url)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Complete ride failed: {str(e)}"}
+
+    def get_quotes(self, trips: List[Dict[str, float]], tariff: str = None) -> Dict[str, Any]:
+        """Quote fare, distance and duration for many trips (pickup_/destination_ latitude/longitude)"""
+        url = f"{self.base_url}/api/pricing/quotes"
+        try:
+            response = self.session.post(url, json={"tariff": tariff, "trips": trips})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Get quotes failed: {str(e)}"}
+
+    def update_driver_location(self, driver_id: int, latitude: float, longitude: float, is_online: bool = True) -> Dict[str, Any]:
+        """Report a driver's current position"""
+        url = f"{self.base_url}/api/drivers/{driver_id}/location"
         try:
             response = self.session.put(
+                url,
+                json={"latitude": latitude, "longitude": longitude, "is_online": is_online}
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"Update driver location failed: {str(e)}"}
+
+    def get_nearby_drivers(self, latitude: float, longitude: float, radius_km: float = 5.0, limit: int = 10) -> Dict[str, Any]:
+        """Get the nearest online drivers around a position"""
+        url = f"{self.base_url}/api/drivers/nearby"
+        try:
+            response = self.session.get(
                 url,
                 params={
-                    "fare": fare,
-                    "distance_km": distance_km,
-                    "duration_minutes": duration_minutes
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "radius_km": radius_km,
+                    "limit": limit
                 }
             )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            return {"error": f"Complete ride failed: {str(e)}"}
+            return {"error": f"Get nearby drivers failed: {str(e)}"}
 
-    def get_user_rides(self, user_id: int, user_type: str = "passenger") -> Dict[str, Any]:
-        """Get rides for a specific user"""
+    def get_user_rides(self, user_id: int, user_type: str = "passenger", limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Get a page of rides for a specific user; the next page's cursor is kept in self.next_cursor"""
         url = f"{self.base_url}/api/rides/{user_type}/{user_id}"
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
         try:
-            response = self.session.get(url)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
+            self.next_cursor = response.headers.get("X-Next-Cursor")
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": f"Get user rides failed: {str(e)}"}
 
+    def export_rides(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Stream rides from the NDJSON export (driver_id, passenger_id, status, created_from, created_to)"""
+        url = f"{self.base_url}/api/rides/export"
+        with self.session.get(url, params=filters, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
 
 def main():
     """Example usage of the client"""
@@ -204,12 +335,7 @@ def main():
                 
                 # Test complete ride
                 print("\n8. Driver Completes Ride:")
-                complete_response = client.complete_ride(
-                    ride_response["id"], 
-                    fare=25.50, 
-                    distance_km=8.5, 
-                    duration_minutes=22
-                )
+                complete_response = client.complete_ride(ride_response["id"])
                 print(f"   {json.dumps(complete_response, indent=2, default=str)}")
                 
                 # Test get user ride history
@@ -7,7 +7,8 @@ from sqlalchemy import text
 # Add the app directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.database.connection import SessionLocal, engine, Base
+from app.database.connection import SessionLocal, engine
+from app.database.schema import migrate_schema
 from app.database.models import User, Ride, PingLog
 from app.models.user import UserCreate
 from app.services.user_services import UserService
@@ -27,7 +28,8 @@ def create_tables():
     """Create all database tables"""
     try:
         print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        for action in migrate_schema():
+            print(f"  {action}")
         print("✅ All tables created successfully!")
         return True
     except Exception as e:
@@ -0,0 +1,19 @@
+"""Dispatch API routes"""
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from app.database.connection import DBSession, get_write_db
+from app.models.dispatch import DispatchRoundResponse
+
+router = APIRouter(prefix="/api/dispatch", tags=["dispatch"])
+
+
+@router.post("/run", response_model=DispatchRoundResponse)
+async def run_dispatch(
+    strategy: Optional[str] = Query(None, pattern="^(greedy|optimal)$"),
+    db: DBSession = Depends(get_write_db)
+):
+    """Run one dispatch round now and return the assignments made"""
+    from app.services.dispatch_service import DispatchService  # numpy/scipy on first use
+
+    return await DispatchService.run_round(db, strategy)
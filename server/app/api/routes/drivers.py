@@ -0,0 +1,46 @@
+"""Driver location API routes"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+
+from app.core.geo import radius_param
+from app.database.connection import run_db, session_scope
+from app.models.driver import DriverLocationResponse, DriverLocationUpdate, NearbyDriverResponse
+from app.services.driver_location_service import DriverLocationService, driver_locations
+
+router = APIRouter(prefix="/api/drivers", tags=["drivers"])
+
+
+@router.get("/nearby", response_model=List[NearbyDriverResponse])
+async def get_nearby_drivers(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Depends(radius_param),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get the nearest online drivers around a position"""
+    nearby = driver_locations.nearest(latitude, longitude, limit, radius_km)
+    return [{**position.to_dict(), "distance_km": round(distance, 3)} for position, distance in nearby]
+
+
+@router.put("/{driver_id}/location", response_model=DriverLocationResponse)
+async def update_driver_location(driver_id: int, location: DriverLocationUpdate):
+    """Report a driver's position (memory only, persisted in batches)"""
+    if not driver_locations.is_known_driver(driver_id):
+        # Only the first report from a driver in this worker touches the database
+        async with session_scope() as db:
+            is_driver = await run_db(db, DriverLocationService.is_driver, driver_id)
+        if not is_driver:
+            raise HTTPException(status_code=404, detail="Driver not found")
+        driver_locations.mark_known_driver(driver_id)
+
+    position = driver_locations.update(driver_id, location.latitude, location.longitude, location.is_online)
+    return position.to_dict()
+
+
+@router.get("/{driver_id}/location", response_model=DriverLocationResponse)
+async def get_driver_location(driver_id: int):
+    """Get a driver's last reported position"""
+    position = driver_locations.get(driver_id)
+    if not position:
+        raise HTTPException(status_code=404, detail="No location reported for driver")
+    return position.to_dict()
@@ -0,0 +1,157 @@
+"""Real-time ride events over Server-Sent Events and WebSocket"""
+import asyncio
+import json
+import re
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.pubsub import SubscriberLimitReached, Subscription, pubsub
+from app.database.connection import run_db, session_scope
+from app.services.ride_events import (
+    REQUESTED_CHANNEL, driver_channel, encode_event, older_than, passenger_channel, ride_channel,
+)
+from app.services.ride_services import RideService
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+CHANNEL_PATTERN = re.compile(r"^(?:(?:ride|passenger|driver):\d+|rides:requested)$")
+
+# SSE responses must not be buffered by proxies
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def open_subscription(channels: List[str]) -> Subscription:
+    try:
+        return pubsub.subscribe(channels)
+    except SubscriberLimitReached:
+        raise HTTPException(status_code=503, detail="Too many event subscribers on this worker, retry later")
+
+
+async def sse_events(subscription: Subscription, first: Optional[str] = None) -> AsyncIterator[str]:
+    """SSE frames for a subscription, with keep-alive comments while idle; unsubscribes on disconnect"""
+    try:
+        if first is not None:
+            yield f"data: {first}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+async def ride_snapshot(ride_id: int, subscription: Subscription) -> str:
+    """
+    Current state of a ride as a ``ride.snapshot`` event, 404 if it does not exist.
+
+    Read after subscribing, so no change between the read and the subscription
+    is lost; events already queued that the snapshot covers are dropped.
+    """
+    # Own short session: the stream outlives the request and must not hold a connection
+    async with session_scope() as db:
+        ride = await run_db(db, RideService.get_ride_by_id, ride_id)
+    if ride is None:
+        raise HTTPException(status_code=404, detail="Ride not found")
+    subscription.discard(older_than(ride.status))
+    return encode_event("ride.snapshot", ride)
+
+
+@router.get("/rides/{ride_id}")
+async def ride_events(ride_id: int):
+    """Stream one ride's changes as SSE, starting with its current state"""
+    subscription = open_subscription([ride_channel(ride_id)])
+    try:
+        snapshot = await ride_snapshot(ride_id, subscription)
+    except BaseException:
+        subscription.close()
+        raise
+    return StreamingResponse(sse_events(subscription, snapshot), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/passengers/{passenger_id}")
+async def passenger_events(passenger_id: int):
+    """Stream changes to any of a passenger's rides as SSE"""
+    subscription = open_subscription([passenger_channel(passenger_id)])
+    return StreamingResponse(sse_events(subscription), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/drivers/{driver_id}")
+async def driver_events(driver_id: int, open_rides: bool = Query(True, description="Also stream new and taken requests")):
+    """Stream a driver's feed as SSE: their rides, plus open requests unless open_rides=false"""
+    channels = [driver_channel(driver_id)] + ([REQUESTED_CHANNEL] if open_rides else [])
+    subscription = open_subscription(channels)
+    return StreamingResponse(sse_events(subscription), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def command_error(command) -> Optional[str]:
+    """Why a WebSocket control message is invalid, None if it is a valid command"""
+    if not isinstance(command, dict) or not command or set(command) - {"subscribe", "unsubscribe"}:
+        return 'Expected {"subscribe": [...]} and/or {"unsubscribe": [...]}'
+    for channels in command.values():
+        if not isinstance(channels, list):
+            return 'Expected {"subscribe": [...]} and/or {"unsubscribe": [...]}'
+        invalid = [
+            channel for channel in channels
+            if not isinstance(channel, str) or not CHANNEL_PATTERN.fullmatch(channel)
+        ]
+        if invalid:
+            return f"Unknown channels: {invalid}"
+    return None
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, channels: List[str] = Query([])):
+    """
+    Multiplexed event socket.
+
+    Subscribe with ``?channels=ride:1&channels=driver:7`` and/or by sending
+    ``{"subscribe": [...]}`` / ``{"unsubscribe": [...]}``. Channels are
+    ``ride:<id>``, ``passenger:<id>``, ``driver:<id>`` and ``rides:requested``.
+    """
+    if any(not CHANNEL_PATTERN.fullmatch(channel) for channel in channels):
+        await websocket.close(code=1008, reason="Unknown channel")
+        return
+    try:
+        subscription = pubsub.subscribe(channels)
+    except SubscriberLimitReached:
+        await websocket.close(code=1013, reason="Too many event subscribers on this worker")
+        return
+    await websocket.accept()
+
+    async def forward():
+        while True:
+            await websocket.send_text(await subscription.get())
+
+    async def control():
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Commands must be JSON"})
+                continue
+            error = command_error(command)
+            if error:
+                await websocket.send_json({"type": "error", "detail": error})
+                continue
+            subscription.subscribe(*command.get("subscribe", []))
+            subscription.unsubscribe(*command.get("unsubscribe", []))
+            await websocket.send_json({"type": "subscribed", "channels": sorted(subscription.channels)})
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(control())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        subscription.close()
@@ -0,0 +1,65 @@
+"""Operational metrics API routes"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.admission import admission
+from app.core.cache import all_caches
+from app.core.instrumentation import prometheus_text
+from app.core.pubsub import pubsub
+from app.database.pool_metrics import all_pool_metrics
+from app.services.archive_service import ride_archiver
+from app.services.driver_location_service import driver_locations
+from app.services.ping_service import ping_log_buffer
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+# Scrape endpoint at the conventional path, outside the /api prefix
+prometheus_router = APIRouter(tags=["metrics"])
+
+
+@prometheus_router.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Per-route request latency, status and SQL statement metrics in Prometheus text format"""
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    """Live connection pool stats for every engine in this worker"""
+    return {name: metrics.snapshot() for name, metrics in all_pool_metrics().items()}
+
+
+@router.get("/driver-locations")
+async def get_driver_location_stats():
+    """Driver location store size and flush counters"""
+    return driver_locations.stats()
+
+
+@router.get("/ping-log")
+async def get_ping_log_stats():
+    """Ping log write-behind buffer depth and drop/flush counters"""
+    return ping_log_buffer.stats()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Entity cache sizes and hit/miss/eviction counters"""
+    return {name: cache.stats() for name, cache in all_caches().items()}
+
+
+@router.get("/events")
+async def get_event_stats():
+    """Event subscribers, channels and publish/delivery/drop counters"""
+    return pubsub.stats()
+
+
+@router.get("/archive")
+async def get_archive_stats():
+    """Ride archiver counters (rides moved to rides_archive, batches, errors)"""
+    return ride_archiver.stats()
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Rate limit buckets and admitted/rate-limited/shed request counters for this worker"""
+    return admission.stats()
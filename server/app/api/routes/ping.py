@@ -1,22 +1,20 @@
 """Ping/Pong API routes with database logging"""
-from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Request
 from app.models.ping import PingRequest, PongResponse
 from app.services.ping_service import PingService
-from app.database.connection import get_db
 
 router = APIRouter(prefix="/api", tags=["ping"])
 
 
 @router.post("/ping", response_model=PongResponse)
-async def ping_endpoint(request: PingRequest, req: Request, db: Session = Depends(get_db)):
+async def ping_endpoint(request: PingRequest, req: Request):
     """
     Ping endpoint that responds with pong when data is 'ping' and logs to database
+    (the log row is buffered and written in bulk, the request never waits on it)
     """
     try:
         client_ip = req.client.host
-        service = PingService()
-        response = service.process_ping(request, db, client_ip)
+        response = PingService.process_ping(request, client_ip)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,42 @@
+"""Pricing API routes"""
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from typing import List
+
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse
+from app.models.pricing import QuoteRequest, QuoteResponse, TariffResponse
+from app.services.pricing_service import PricingService
+
+router = APIRouter(prefix="/api/pricing", tags=["pricing"])
+
+
+@router.get("/tariffs", response_model=List[TariffResponse])
+async def get_tariffs():
+    """Configured tariff tables"""
+    return [TariffResponse(name=name, **tariff) for name, tariff in settings.pricing_tariffs.items()]
+
+
+@router.post("/quotes", response_model=QuoteResponse, response_class=FastJSONResponse)
+async def quote_trips(request: QuoteRequest):
+    """Quote fare, distance and duration for many trips in one call"""
+    tariff = request.tariff or settings.pricing_default_tariff
+    if tariff not in settings.pricing_tariffs:
+        raise HTTPException(status_code=404, detail=f"Unknown tariff '{tariff}'")
+    if len(request.trips) > settings.pricing_max_quote_pairs:
+        raise HTTPException(status_code=413, detail=f"At most {settings.pricing_max_quote_pairs} trips per request")
+
+    trips = request.trips
+    pickup_lat = [trip.pickup_latitude for trip in trips]
+    pickup_lon = [trip.pickup_longitude for trip in trips]
+    distance, minutes, fares = await run_in_threadpool(
+        PricingService.quote_batch, pickup_lat, pickup_lon,
+        [trip.destination_latitude for trip in trips], [trip.destination_longitude for trip in trips],
+        tariff,
+    )
+    multipliers, fares = PricingService.apply_surge(pickup_lat, pickup_lon, fares)
+    quotes = [
+        {"distance_km": km, "duration_minutes": mins, "fare": amount, "surge_multiplier": surge}
+        for km, mins, amount, surge in zip(distance.tolist(), minutes.tolist(), fares.tolist(), multipliers.tolist())
+    ]
+    return FastJSONResponse({"tariff": tariff, "quotes": quotes})
@@ -1,76 +1,164 @@
 """Ride management API routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-
-from app.database.connection import get_db
-from app.models.ride import RideCreate, RideResponse, RideUpdate
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.etag import etag_matches, not_modified, ride_etag, set_etag
+from app.core.geo import radius_param
+from app.core.pagination import NEXT_CURSOR_HEADER, cursor_param
+from app.core.serialization import FastJSONResponse, list_response
+from app.database.connection import DBSession, get_read_db, get_write_db, run_db
+from app.models.bulk import BulkCreateResponse
+from app.models.ride import NearbyRideResponse, RideCreate, RideResponse, RideUpdate
 from app.services.ride_services import RideService
 
 router = APIRouter(prefix="/api/rides", tags=["rides"])
 
 
 @router.post("/", response_model=RideResponse)
-async def create_ride(ride_data: RideCreate, db: Session = Depends(get_db)):
+async def create_ride(ride_data: RideCreate, db: DBSession = Depends(get_write_db)):
     """Create a new ride request"""
-    return RideService.create_ride(db, ride_data)
+    return await run_db(db, RideService.create_ride, ride_data)
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_rides(rides: List[RideCreate], db: DBSession = Depends(get_write_db)):
+    """Create many ride requests in one call, with a result per item"""
+    if len(rides) > settings.bulk_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_items} rides per request")
+    results = await run_db(db, RideService.bulk_create_rides, rides)
+    created = sum(1 for result in results if result.status == "created")
+    return BulkCreateResponse(created=created, failed=len(results) - created, results=results)
 
 
-@router.get("/", response_model=List[RideResponse])
-async def get_available_rides(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[RideResponse], response_class=FastJSONResponse)
+async def get_available_rides(db: DBSession = Depends(get_read_db)):
     """Get available rides for drivers"""
-    return RideService.get_available_rides(db)
+    fast = settings.fast_list_serialization
+    rides = await run_db(db, RideService.get_available_rides, fast)
+    return list_response(RideResponse, rides) if fast else rides
+
+
+@router.get("/nearby", response_model=List[NearbyRideResponse])
+async def get_nearby_rides(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Depends(radius_param),
+    limit: int = Query(20, ge=1, le=100),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get the nearest requested rides around a driver's position"""
+    nearby = await run_db(db, RideService.get_nearby_rides, latitude, longitude, radius_km, limit)
+    return [
+        NearbyRideResponse.model_validate(ride).model_copy(update={"pickup_distance_km": round(distance, 3)})
+        for ride, distance in nearby
+    ]
+
+
+@router.get("/export")
+async def export_rides(
+    driver_id: Optional[int] = None,
+    passenger_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    x_last_write: Optional[str] = Header(None),
+):
+    """Stream matching rides as NDJSON (one RideResponse object per line), oldest first"""
+    stmt = RideService.export_statement(driver_id, passenger_id, status, created_from, created_to)
+    return StreamingResponse(RideService.stream_export(stmt, x_last_write), media_type="application/x-ndjson")
 
 
-@router.get("/{ride_id}", response_model=RideResponse)
-async def get_ride(ride_id: int, db: Session = Depends(get_db)):
-    """Get ride by ID"""
-    ride = RideService.get_ride_by_id(db, ride_id)
+@router.get("/{ride_id}", response_model=RideResponse, responses={304: {"description": "Not modified"}})
+async def get_ride(
+    ride_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get ride by ID; 304 when If-None-Match holds the current ETag"""
+    # A ride_cache hit answers without touching the database
+    ride = await run_db(db, RideService.get_ride_by_id, ride_id)
     if not ride:
         raise HTTPException(status_code=404, detail="Ride not found")
+    etag = ride_etag(ride)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return ride
 
 
-@router.get("/passenger/{passenger_id}", response_model=List[RideResponse])
-async def get_passenger_rides(passenger_id: int, db: Session = Depends(get_db)):
-    """Get all rides for a passenger"""
-    return RideService.get_rides_by_passenger(db, passenger_id)
-
-
-@router.get("/driver/{driver_id}", response_model=List[RideResponse])
-async def get_driver_rides(driver_id: int, db: Session = Depends(get_db)):
-    """Get all rides for a driver"""
-    return RideService.get_rides_by_driver(db, driver_id)
+@router.get("/passenger/{passenger_id}", response_model=List[RideResponse], response_class=FastJSONResponse)
+async def get_passenger_rides(
+    passenger_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Depends(cursor_param),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get a page of rides for a passenger, newest first (next page cursor in X-Next-Cursor)"""
+    fast = settings.fast_list_serialization
+    rides, next_cursor = await run_db(db, RideService.get_rides_by_passenger, passenger_id, limit, cursor, fast)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fast:
+        return list_response(RideResponse, rides, headers)
+    response.headers.update(headers)
+    return rides
+
+
+@router.get("/driver/{driver_id}", response_model=List[RideResponse], response_class=FastJSONResponse)
+async def get_driver_rides(
+    driver_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Depends(cursor_param),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get a page of rides for a driver, newest first (next page cursor in X-Next-Cursor)"""
+    fast = settings.fast_list_serialization
+    rides, next_cursor = await run_db(db, RideService.get_rides_by_driver, driver_id, limit, cursor, fast)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fast:
+        return list_response(RideResponse, rides, headers)
+    response.headers.update(headers)
+    return rides
+
+
+async def raise_transition_failed(db: DBSession, ride_id: int, action: str):
+    """Turn a lost or impossible transition into 404 (no such ride) or 409 (wrong status)"""
+    status = await run_db(db, RideService.get_ride_status, ride_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Ride not found")
+    raise HTTPException(status_code=409, detail=f"Ride cannot be {action}, current status is '{status}'")
 
 
 @router.put("/{ride_id}/accept", response_model=RideResponse)
-async def accept_ride(ride_id: int, driver_id: int, db: Session = Depends(get_db)):
+async def accept_ride(ride_id: int, driver_id: int, response: Response, db: DBSession = Depends(get_write_db)):
     """Driver accepts a ride"""
-    ride = RideService.accept_ride(db, ride_id, driver_id)
+    ride = await run_db(db, RideService.accept_ride, ride_id, driver_id)
     if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found or cannot be accepted")
+        await raise_transition_failed(db, ride_id, "accepted")
+    set_etag(response, ride_etag(ride))
     return ride
 
 
 @router.put("/{ride_id}/start", response_model=RideResponse)
-async def start_ride(ride_id: int, db: Session = Depends(get_db)):
+async def start_ride(ride_id: int, response: Response, db: DBSession = Depends(get_write_db)):
     """Start a ride"""
-    ride = RideService.start_ride(db, ride_id)
+    ride = await run_db(db, RideService.start_ride, ride_id)
     if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found or cannot be started")
+        await raise_transition_failed(db, ride_id, "started")
+    set_etag(response, ride_etag(ride))
     return ride
 
 
 @router.put("/{ride_id}/complete", response_model=RideResponse)
-async def complete_ride(
-    ride_id: int, 
-    fare: float, 
-    distance_km: float, 
-    duration_minutes: int, 
-    db: Session = Depends(get_db)
-):
-    """Complete a ride"""
-    ride = RideService.complete_ride(db, ride_id, fare, distance_km, duration_minutes)
+async def complete_ride(ride_id: int, response: Response, db: DBSession = Depends(get_write_db)):
+    """Complete a ride; fare, distance and duration are computed server-side"""
+    ride = await run_db(db, RideService.complete_ride, ride_id)
     if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found or cannot be completed")
+        await raise_transition_failed(db, ride_id, "completed")
+    set_etag(response, ride_etag(ride))
     return ride
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Surge pricing API routes"""
+from fastapi import APIRouter, Query
+
+from app.models.surge import SurgeMultiplierResponse, SurgeSnapshotResponse
+from app.services.surge_service import surge_tracker
+
+router = APIRouter(prefix="/api/surge", tags=["surge"])
+
+
+@router.get("/", response_model=SurgeSnapshotResponse)
+async def get_surge_snapshot(limit: int = Query(100, ge=1, le=10000)):
+    """Busiest cells in the current window with their request/accept counts and multiplier"""
+    return {**surge_tracker.stats(), "cells": surge_tracker.snapshot(limit)}
+
+
+@router.get("/multiplier", response_model=SurgeMultiplierResponse)
+async def get_surge_multiplier(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180)
+):
+    """Current surge multiplier at a point"""
+    return {"latitude": latitude, "longitude": longitude,
+            "multiplier": surge_tracker.multiplier(latitude, longitude)}
@@ -1,58 +1,105 @@
 """User management API routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from typing import List, Optional
 
-from app.database.connection import get_db
+from app.core.config import settings
+from app.core.etag import etag_matches, not_modified, set_etag, user_etag
+from app.core.pagination import NEXT_CURSOR_HEADER, cursor_param
+from app.core.serialization import FastJSONResponse, list_response
+from app.database.connection import DBSession, get_read_db, get_write_db, run_db
+from app.models.bulk import BulkCreateResponse
+from app.models.stats import UserStatsResponse
 from app.models.user import UserCreate, UserResponse, UserUpdate
+from app.services.driver_location_service import driver_locations
+from app.services.stats_service import RideStatsService
 from app.services.user_services import UserService
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.post("/", response_model=UserResponse)
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, db: DBSession = Depends(get_write_db)):
     """Create a new user"""
-    # Check if user already exists
-    existing_user = UserService.get_user_by_email(db, user_data.email)
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    # Check if user already exists (email, username and phone in one query)
+    conflict = await run_db(db, UserService.find_conflict, user_data)
+    if conflict:
+        raise HTTPException(status_code=400, detail=conflict)
     
-    existing_username = UserService.get_user_by_username(db, user_data.username)
-    if existing_username:
-        raise HTTPException(status_code=400, detail="Username already taken")
-    
-    return UserService.create_user(db, user_data)
+    return await run_db(db, UserService.create_user, user_data)
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_users(users: List[UserCreate], db: DBSession = Depends(get_write_db)):
+    """Create many users in one call, with a result per item"""
+    if len(users) > settings.bulk_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_items} users per request")
+    results = await run_db(db, UserService.bulk_create_users, users)
+    created = sum(1 for result in results if result.status == "created")
+    return BulkCreateResponse(created=created, failed=len(results) - created, results=results)
 
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get list of users"""
-    return UserService.get_users(db, skip=skip, limit=limit)
+@router.get("/", response_model=List[UserResponse], response_class=FastJSONResponse)
+async def get_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Depends(cursor_param),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get a page of users (next page cursor in X-Next-Cursor)"""
+    fast = settings.fast_list_serialization
+    users, next_cursor = await run_db(db, UserService.get_users, limit, cursor, fast)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fast:
+        return list_response(UserResponse, users, headers)
+    response.headers.update(headers)
+    return users
 
 
-@router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    """Get user by ID"""
-    user = UserService.get_user_by_id(db, user_id)
+@router.get("/{user_id}", response_model=UserResponse, responses={304: {"description": "Not modified"}})
+async def get_user(
+    user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_read_db)
+):
+    """Get user by ID; 304 when If-None-Match holds the current ETag"""
+    user = await run_db(db, UserService.get_user_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    etag = user_etag(user)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return user
 
 
+@router.get("/{user_id}/stats", response_model=UserStatsResponse)
+async def get_user_stats(
+    user_id: int,
+    days: int = Query(30, ge=0, le=366, description="Daily buckets to include, 0 for none"),
+    db: DBSession = Depends(get_read_db)
+):
+    """Trips, fares, distance and duration as driver and as passenger, lifetime and per day"""
+    if not await run_db(db, UserService.get_user_by_id, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return await run_db(db, RideStatsService.get_user_stats, user_id, days)
+
+
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user_data: UserUpdate, response: Response, db: DBSession = Depends(get_write_db)):
     """Update user"""
-    user = UserService.update_user(db, user_id, user_data)
+    user = await run_db(db, UserService.update_user, user_id, user_data)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    set_etag(response, user_etag(user))
     return user
 
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: DBSession = Depends(get_write_db)):
     """Delete user"""
-    success = UserService.delete_user(db, user_id)
+    success = await run_db(db, UserService.delete_user, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
+    driver_locations.forget_driver(user_id)
     return {"message": "User deleted successfully"}
\ No newline at end of file
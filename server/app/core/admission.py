@@ -0,0 +1,183 @@
+"""Admission control: per-client token buckets and load shedding on database pool saturation"""
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from app.database.pool_metrics import all_pool_metrics
+
+
+class TokenBuckets:
+    """
+    One token bucket per client key, refilled at ``rate`` tokens/s up to ``burst``.
+    A request may be charged to several keys (address and user) and is only
+    admitted when every one of them can pay.
+
+    At most ``max_clients`` buckets are kept, in LRU order: a new client beyond
+    that evicts the least recently seen one. An evicted client comes back with
+    a full bucket, which it would have refilled to while idle anyway unless
+    the LRU is much smaller than the set of active clients.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # key -> [tokens, updated_at]
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refill(self, key: str, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def take(self, keys: Sequence[str], cost: float, reserve: float = 0.0, now: Optional[float] = None) -> float:
+        """
+        Spend ``cost`` tokens from every key's bucket if each keeps at least
+        ``reserve`` afterwards; 0.0 when admitted, else seconds until all could pay
+        """
+        now = time.monotonic() if now is None else now
+        cost = min(cost, self.burst - reserve)
+        buckets = [self._refill(key, now) for key in keys]
+        short = max(cost + reserve - bucket[0] for bucket in buckets)
+        if short <= 0:
+            for bucket in buckets:
+                bucket[0] -= cost
+            return 0.0
+        return short / self.rate
+
+
+def compile_route_costs(costs: Dict[str, float]) -> List[Tuple[str, re.Pattern, float]]:
+    """``{"GET /api/rides/{ride_id}": 2}`` -> [(method, path regex, cost)], in setting order"""
+    compiled = []
+    for route, cost in costs.items():
+        method, path = route.split(" ", 1)
+        compiled.append((method.upper(), compile_path(path.strip())[0], cost))
+    return compiled
+
+
+class AdmissionController:
+    """
+    Decides, before routing, whether a request is served.
+
+    - 429 when the client's bucket cannot pay the route's cost (first matching
+      entry of ``route_costs``, 1 otherwise; cost 0 is never limited)
+    - 503 while more than ``max_pool_waiting`` connection checkouts are queued
+      in this worker's pools, unless the client would keep half its bucket:
+      the database is already the bottleneck, so the heaviest clients are
+      shed first and light ones keep bounded latency, instead of everyone
+      queueing into pool timeouts
+
+    Both come with Retry-After. State is per worker and only touched from the
+    event loop, so it needs no locking.
+    """
+
+    def __init__(self):
+        self.buckets = TokenBuckets(rate=1.0, burst=1.0, max_clients=1)
+        self.route_costs: List[Tuple[str, re.Pattern, float]] = []
+        self.exempt_paths = frozenset()
+        self.max_pool_waiting = 0
+        self.overload_retry_after = 1
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def configure(self, rate: float, burst: float, max_clients: int, route_costs: Dict[str, float],
+                  max_pool_waiting: int, exempt_paths: Iterable[str], overload_retry_after: int) -> None:
+        self.buckets = TokenBuckets(rate, burst, max_clients)
+        self.route_costs = compile_route_costs(route_costs)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.max_pool_waiting = max_pool_waiting
+        self.overload_retry_after = overload_retry_after
+
+    def cost(self, method: str, path: str) -> float:
+        for route_method, regex, cost in self.route_costs:
+            if route_method == method and regex.match(path):
+                return cost
+        return 1.0
+
+    def pool_waiting(self) -> int:
+        return sum(metrics.waiting for metrics in all_pool_metrics().values())
+
+    def check(self, method: str, path: str, clients: Sequence[str]) -> Optional[Tuple[int, int, str]]:
+        """None to admit, else (status, Retry-After seconds, detail)"""
+        if path in self.exempt_paths:
+            return None
+        overloaded = bool(self.max_pool_waiting) and self.pool_waiting() > self.max_pool_waiting
+        cost = self.cost(method, path)
+        if cost or overloaded:
+            wait = self.buckets.take(clients, cost, reserve=self.buckets.burst / 2 if overloaded else 0.0)
+            if wait and overloaded:
+                self.shed += 1
+                return 503, self.overload_retry_after, "Server overloaded, retry later"
+            if wait:
+                self.rate_limited += 1
+                return 429, max(1, math.ceil(wait)), "Rate limit exceeded"
+        self.admitted += 1
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "rate": self.buckets.rate,
+            "burst": self.buckets.burst,
+            "clients": len(self.buckets),
+            "max_clients": self.buckets.max_clients,
+            "evictions": self.buckets.evictions,
+            "max_pool_waiting": self.max_pool_waiting,
+            "pool_waiting": self.pool_waiting(),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+        }
+
+
+admission = AdmissionController()
+
+
+def client_keys(scope) -> List[str]:
+    """
+    Buckets a request is charged to: always the client address (as resolved by
+    uvicorn, proxy headers included only from --forwarded-allow-ips), plus
+    the user once an authentication middleware has set ``scope["user"]``.
+    Request headers alone never pick the bucket, they are trivially forged.
+    """
+    client = scope.get("client")
+    keys = ["ip:" + (client[0] if client else "unknown")]
+    user = scope.get("user")
+    if user is not None and getattr(user, "is_authenticated", False):
+        keys.append("user:" + user.display_name)
+    return keys
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying ``admission`` to every HTTP request"""
+
+    def __init__(self, app, **config):
+        self.app = app
+        admission.configure(**config)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            rejected = admission.check(scope["method"], scope["path"], client_keys(scope))
+            if rejected:
+                status, retry_after, detail = rejected
+                response = JSONResponse({"detail": detail}, status_code=status,
+                                        headers={"Retry-After": str(retry_after)})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
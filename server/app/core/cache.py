@@ -0,0 +1,201 @@
+"""Pluggable entity cache with an in-process LRU/TTL default"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from app.core.config import settings
+
+
+class CacheBackend(ABC):
+    """
+    Key/value cache used in front of hot entity lookups.
+
+    Writers call ``set`` (write-through) or ``delete`` after committing; read-through
+    fills use ``add`` so a value loaded before a concurrent write never replaces
+    the fresher one. A shared backend only needs to implement these methods.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value or None on a miss"""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store or replace a value"""
+
+    @abstractmethod
+    def add(self, key: Hashable, value: Any) -> bool:
+        """Store a value only if the key is absent, True if stored"""
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """Drop a key if present"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every key"""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Size and hit/miss/eviction counters"""
+
+    def get_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        """Values for several keys, None for each miss (backends can batch the round trip)"""
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items: Dict[Hashable, Any]) -> None:
+        """Store several values"""
+        for key, value in items.items():
+            self.set(key, value)
+
+
+class NullCache(CacheBackend):
+    """Cache that stores nothing, every lookup goes to the database"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.misses = 0
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, value):
+        return False
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {"backend": "none", "hits": 0, "misses": self.misses}
+
+
+class LRUTTLCache(CacheBackend):
+    """Per-process LRU cache whose entries also expire ``ttl_seconds`` after being stored"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        super().__init__(name)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[1])
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                    self.expirations += 1
+                self.misses += 1
+                values.append(None)
+        return values
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def set_many(self, items):
+        with self._lock:
+            for key, value in items.items():
+                self._store(key, value)
+
+    def add(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._store(key, value)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Every cache created in this process, by name
+_caches: Dict[str, CacheBackend] = {}
+
+
+def create_cache(name: str, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> CacheBackend:
+    """Build the configured cache backend and register it for the metrics endpoint"""
+    if settings.cache_backend == "memory":
+        cache = LRUTTLCache(
+            name,
+            max_entries or settings.cache_max_entries,
+            ttl_seconds or settings.cache_ttl_seconds,
+        )
+    elif settings.cache_backend == "none":
+        cache = NullCache(name)
+    else:
+        raise ValueError(f"Unknown cache backend '{settings.cache_backend}', expected 'memory' or 'none'")
+    _caches[name] = cache
+    return cache
+
+
+def all_caches() -> Dict[str, CacheBackend]:
+    return dict(_caches)
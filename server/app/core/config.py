@@ -1,6 +1,8 @@
 """Configuration settings for the application"""
+import threading
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -9,7 +11,13 @@ class Settings(BaseSettings):
     version: str = "1.0.0"
     host: str = "0.0.0.0"
     port: int = 8000
-    debug: bool = True
+    debug: bool = False
+    reload: bool = False  # uvicorn auto-reload for local development (run.py)
+    # Server processes started by run.py, 0 = one per available CPU. Driver
+    # positions, surge, entity caches, rate limits and memory pubsub are per
+    # process, so more than one trades consistency for throughput (see run.py)
+    workers: int = 1
+    graceful_shutdown_seconds: int = 30  # on SIGTERM, in-flight requests get this long before being cancelled
     
     # Database settings - these will be loaded from .env
     database_url: str
@@ -19,15 +27,176 @@ class Settings(BaseSettings):
     postgres_host: str = "localhost"
     postgres_port: int = 5432
 
+    # Schema management - normally done by `python manage.py migrate`;
+    # enable to create missing tables at startup in local development
+    db_create_tables_on_startup: bool = False
+
+    # Async database settings - set DB_ASYNC=False to fall back to the
+    # sync engine (service calls then run in the threadpool)
+    db_async: bool = True
+    async_database_url: Optional[str] = None  # derived from database_url when unset
+
+    # Read replicas - JSON list of URLs in REPLICA_DATABASE_URLS; read-only
+    # routes use them, writes and everything else stay on database_url
+    replica_database_urls: List[str] = []
+    replica_selection: str = "round_robin"  # or "least_loaded": fewest busy + waiting connections
+    read_your_writes_seconds: float = 5.0  # reads echoing a younger X-Last-Write go to the primary, 0 disables
+
+    # Connection pool settings (per engine, per worker process)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_pool_pre_ping: bool = True
+    db_echo: bool = False  # log every SQL statement
+
+    # Geo index settings - changing the cell size requires re-deriving
+    # rides.pickup_cell for existing rows
+    geo_cell_size_deg: float = 0.01  # ~1.1 km of latitude per grid cell
+    nearby_max_radius_km: float = 50.0
+
+    # Driver location settings
+    driver_location_flush_interval: float = 5.0  # seconds between batched DB writes
+    driver_location_ttl_seconds: float = 120.0  # positions older than this count as offline
+
+    # Entity cache settings (per worker; the TTL bounds how stale another
+    # worker's writes can look)
+    cache_backend: str = "memory"  # or "none" to disable
+    cache_max_entries: int = 10000  # per cache, least recently used evicted first
+    cache_ttl_seconds: float = 5.0
+
+    # List endpoints: column-only queries encoded straight to JSON instead of
+    # ORM objects + response_model validation
+    fast_list_serialization: bool = True
+
+    # Pricing - tariffs can be overridden with a JSON object in PRICING_TARIFFS
+    pricing_tariffs: Dict[str, Dict[str, float]] = {
+        "standard": {"base": 2.50, "per_km": 1.20, "per_minute": 0.30, "minimum": 5.00},
+        "premium": {"base": 5.00, "per_km": 2.10, "per_minute": 0.50, "minimum": 10.00},
+    }
+    pricing_default_tariff: str = "standard"
+    pricing_road_factor: float = 1.3  # straight-line km -> estimated road km
+    pricing_avg_speed_kmh: float = 25.0  # for quote duration estimates
+    pricing_quote_cell_deg: float = 0.002  # quotes are memoised per (pickup cell, destination cell)
+    pricing_quote_cache_size: int = 200000
+    pricing_max_quote_pairs: int = 10000  # per request
+
+    # Surge pricing - sliding window of ride requests vs acceptances per cell
+    surge_enabled: bool = True
+    surge_cell_deg: float = 0.02  # ~2 km cells
+    surge_window_seconds: int = 600
+    surge_bucket_seconds: int = 30  # ring buffer slot width
+    surge_min_requests: int = 5  # quieter cells never surge
+    surge_sensitivity: float = 0.5  # multiplier gained per unit of requests / (accepts + 1) above 1
+    surge_max_multiplier: float = 3.0
+    surge_step: float = 0.1
+
+    # Ride archive - completed rides move from the hot rides table to rides_archive
+    # (monthly partitions by created_at on PostgreSQL); history reads span both
+    rides_archive_enabled: bool = True
+    rides_archive_after_seconds: float = 3600.0  # completed rides stay in rides this long
+    rides_archive_interval_seconds: float = 60.0
+    rides_archive_batch_size: int = 5000  # rides moved per transaction
+    rides_archive_partitions_ahead: int = 3  # monthly partitions created in advance (PostgreSQL)
+
+    # Ride export: rows fetched per server-side cursor batch (and per streamed chunk)
+    export_batch_size: int = 1000
+
+    # Bulk create settings
+    bulk_max_items: int = 10000  # per request, larger imports must be split
+    bulk_chunk_size: int = 1000  # rows per lookup/INSERT statement and commit
+
+    # Ping log write-behind buffer
+    ping_log_buffer_size: int = 10000  # max queued records before the overflow policy applies
+    ping_log_flush_size: int = 500
+    ping_log_flush_interval: float = 1.0
+    ping_log_overflow_policy: str = "drop_oldest"  # or "drop_newest"
+
+    # Dispatch settings - enable the background loop on one worker only
+    dispatch_enabled: bool = False
+    dispatch_interval_seconds: float = 2.0
+    dispatch_strategy: str = "greedy"  # "greedy" or "optimal" (needs scipy)
+    dispatch_max_pickup_km: float = 5.0
+    dispatch_batch_size: int = 10000  # max requested rides per round
+    dispatch_candidates_per_ride: int = 8  # nearest drivers kept per ride by greedy
+    dispatch_optimal_max_cells: int = 4_000_000  # larger problems fall back to greedy
+
+    # Real-time ride events (WebSocket / Server-Sent Events)
+    pubsub_backend: str = "memory"  # or "postgres": LISTEN/NOTIFY, shared by every worker
+    pubsub_pg_channel: str = "mini_uber_events"
+    events_queue_size: int = 64  # per connection; the oldest undelivered events are dropped beyond this
+    events_max_subscribers: int = 20000  # per worker
+    events_heartbeat_seconds: float = 15.0
+
+    # Request instrumentation (per-route latency and SQL counts at /metrics)
+    instrumentation_enabled: bool = True
+    slow_request_ms: float = 0.0  # log requests slower than this with their SQL, 0 disables
+    slow_request_log_statements: int = 10  # slowest statements included in a slow-request log line
+
+    # Admission control (per worker): token bucket per client address (and per authenticated user)
+    admission_enabled: bool = True
+    admission_rate: float = 20.0  # tokens refilled per second per client
+    admission_burst: float = 60.0  # bucket capacity
+    admission_max_clients: int = 100000  # buckets kept, least recently seen evicted beyond this
+    # "METHOD /route/{template}" -> tokens, first match wins; other routes cost 1, cost 0 is unlimited
+    admission_route_costs: Dict[str, float] = {
+        "GET /api/rides/export": 30,
+        "POST /api/rides/bulk": 30,
+        "POST /api/users/bulk": 30,
+        "GET /api/rides/": 10,  # every available ride, the endpoint driver apps poll
+        "POST /api/ping": 2,
+    }
+    admission_exempt_paths: List[str] = ["/", "/api/health", "/metrics"]
+    admission_max_pool_waiting: int = 20  # shed requests with 503 while more checkouts queue, 0 disables
+    admission_overload_retry_after_seconds: int = 1
+
     class Config:
         env_file = ".env"
         env_file_encoding = 'utf-8'
 
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Settings loaded from the environment and .env on first use"""
+    return Settings()
+
+
+class _LazySettings:
+    """Module-level ``settings`` that only reads the environment when first used"""
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(get_settings(), name, value)
+
+
+settings = _LazySettings()
+
+
+class Lazy:
+    """
+    Module-level singleton built by ``factory`` on first attribute access, for
+    objects configured from settings: importing their module reads nothing
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def __getattr__(self, name: str):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", self._factory())
+                instance = self._instance
+        return getattr(instance, name)
 
 # Print config for debugging (remove in production)
 if __name__ == "__main__":
     print("Current settings:")
     print(f"Database URL: {settings.database_url}")
-    print(f"Debug mode: {settings.debug}")
\ No newline at end of file
+    print(f"Debug mode: {settings.debug}")
+    print(f"Async database: {settings.db_async}")
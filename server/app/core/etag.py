@@ -0,0 +1,60 @@
+"""Strong ETags and conditional GET (If-None-Match) for single-resource endpoints"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+# Clients may keep the representation but must revalidate it on every use
+CACHE_CONTROL = "no-cache"
+
+
+def compute_etag(*parts) -> str:
+    """Quoted strong ETag over the given version fields"""
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest() + '"'
+
+
+def ride_etag(ride) -> str:
+    """
+    ETag of a ride (ORM row or RideResponse).
+
+    Rides only change through the status transitions, each of which stamps its
+    own timestamp, so status plus the transition timestamps identify the version.
+    """
+    return compute_etag("ride", ride.id, ride.status, ride.driver_id,
+                        ride.accepted_at, ride.started_at, ride.completed_at)
+
+
+def user_etag(user) -> str:
+    """
+    ETag of a user (ORM row or UserResponse).
+
+    updated_at alone is only second-precise on some backends, so the editable
+    fields are part of the version too.
+    """
+    return compute_etag("user", user.id, user.updated_at, user.email, user.username,
+                        user.full_name, user.phone_number, user.is_driver, user.is_active)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header lists ``etag`` (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 for a client that already holds the current version"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,97 @@
+"""Geographic helpers: great-circle distance and the lat/lon grid used for spatial lookups"""
+import math
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query
+
+from app.core.config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+# Same sphere as haversine_km, so degree-based boxes agree with the distances
+# they are filtered by (111.19 km)
+KM_PER_DEGREE_LAT = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def lon_cell_count(size: float) -> int:
+    """Number of grid columns around the globe"""
+    return int(math.ceil(360.0 / size))
+
+
+def cell_coords(latitude: float, longitude: float, size: Optional[float] = None) -> Tuple[int, int]:
+    """Grid (row, column) containing a point; rows count up from the south pole"""
+    size = size or settings.geo_cell_size_deg
+    row = int(math.floor((latitude + 90.0) / size))
+    col = int(math.floor((longitude + 180.0) / size)) % lon_cell_count(size)
+    return row, col
+
+
+def cell_id(latitude: float, longitude: float, size: Optional[float] = None) -> int:
+    """
+    Packed integer grid cell for a point.
+
+    Cells in one grid row are consecutive integers, so a lat/lon box maps to one
+    contiguous range per row and can be served by a B-tree index.
+    """
+    size = size or settings.geo_cell_size_deg
+    row, col = cell_coords(latitude, longitude, size)
+    return row * lon_cell_count(size) + col
+
+
+def lon_half_width(latitude: float, radius_km: float) -> float:
+    """
+    Longitude half-width in degrees of a circle (its tangent meridians), 180
+    when the circle contains a pole
+    """
+    angle = radius_km / EARTH_RADIUS_KM  # radians of arc
+    spread = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    return 180.0 if angle >= math.pi / 2 or spread >= 1.0 else math.degrees(math.asin(spread))
+
+
+def search_box(latitude: float, radius_km: float, size: Optional[float] = None) -> Tuple[int, int, float]:
+    """Grid rows (first, last) and longitude half-width in degrees of the box around a circle"""
+    size = size or settings.geo_cell_size_deg
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    south = max(-90.0, latitude - lat_delta)
+    north = min(90.0 - 1e-9, latitude + lat_delta)
+    return cell_coords(south, 0.0, size)[0], cell_coords(north, 0.0, size)[0], lon_half_width(latitude, radius_km)
+
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float,
+                size: Optional[float] = None) -> List[Tuple[int, int]]:
+    """Inclusive cell-id ranges covering a circle, one or two per grid row"""
+    size = size or settings.geo_cell_size_deg
+    columns = lon_cell_count(size)
+    first_row, last_row, lon_delta = search_box(latitude, radius_km, size)
+    if lon_delta >= 180.0:
+        return [(row * columns, row * columns + columns - 1) for row in range(first_row, last_row + 1)]
+
+    west = int(math.floor((longitude - lon_delta + 180.0) / size))
+    east = int(math.floor((longitude + lon_delta + 180.0) / size))
+    ranges = []
+    for row in range(first_row, last_row + 1):
+        base = row * columns
+        if west < 0:
+            ranges.append((base + west % columns, base + columns - 1))
+            ranges.append((base, base + east))
+        elif east >= columns:
+            ranges.append((base + west, base + columns - 1))
+            ranges.append((base, base + east % columns))
+        else:
+            ranges.append((base + west, base + east))
+    return ranges
+
+
+def radius_param(radius_km: float = Query(5.0, gt=0, description="At most NEARBY_MAX_RADIUS_KM")) -> float:
+    """Dependency for nearby searches' ``radius_km`` (422 above nearby_max_radius_km, read per request)"""
+    if radius_km > settings.nearby_max_radius_km:
+        raise HTTPException(status_code=422, detail=f"radius_km must be at most {settings.nearby_max_radius_km:g}")
+    return radius_km
@@ -0,0 +1,19 @@
+"""Vectorised (NumPy) great-circle distance helpers"""
+import numpy as np
+
+from app.core.geo import EARTH_RADIUS_KM
+
+
+def haversine_pairs(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Element-wise distance in km between two equally sized coordinate arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distance in km from every point in set 1 (rows) to every point in set 2 (columns)"""
+    lat1, lon1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None], np.radians(np.asarray(lon1, dtype=np.float64))[:, None]
+    lat2, lon2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :], np.radians(np.asarray(lon2, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,216 @@
+"""Per-route request latency and database statement instrumentation"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds for statements issued per request
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 12, 20, 50, 100)
+
+
+class RequestStats:
+    """Database work done on behalf of the current request"""
+
+    __slots__ = ("statements", "db_seconds", "rows", "queries")
+
+    def __init__(self, keep_queries: bool):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        # (seconds, SQL) per statement, only kept when the slow-request log is on
+        self.queries: Optional[List[Tuple[float, str]]] = [] if keep_queries else None
+
+
+# Set by the middleware for the duration of a request; service code running in
+# the threadpool or in run_sync sees the same RequestStats through the copied context
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class RouteMetrics:
+    """Aggregates for one (method, route template)"""
+
+    __slots__ = ("latency", "statements", "statuses", "db_seconds", "rows", "_lock")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statements = Histogram(STATEMENT_COUNT_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.db_seconds = 0.0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def record(self, status: int, seconds: float, stats: RequestStats) -> None:
+        self.latency.observe(seconds)
+        self.statements.observe(stats.statements)
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.db_seconds += stats.db_seconds
+            self.rows += stats.rows
+
+
+# (method, route template) -> RouteMetrics
+_routes: Dict[Tuple[str, str], RouteMetrics] = {}
+_routes_lock = threading.Lock()
+
+
+def route_metrics(method: str, route: str) -> RouteMetrics:
+    metrics = _routes.get((method, route))
+    if metrics is None:
+        with _routes_lock:
+            metrics = _routes.setdefault((method, route), RouteMetrics())
+    return metrics
+
+
+def all_route_metrics() -> Dict[Tuple[str, str], RouteMetrics]:
+    return dict(_routes)
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request per route template.
+
+    Labels use the matched route's path template (``/api/rides/{ride_id}``),
+    not the raw path, so the number of series stays bounded. Streaming
+    responses are timed until their last chunk.
+    """
+
+    def __init__(self, app, slow_request_ms: Optional[float] = None):
+        self.app = app
+        self.slow_seconds = (slow_request_ms or 0) / 1000.0
+        self._templates: Dict = {}
+
+    def route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            routes = scope["app"].routes if "app" in scope else []
+            template = next((route.path for route in routes if getattr(route, "endpoint", None) is endpoint), "unmatched")
+            self._templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(keep_queries=self.slow_seconds > 0)
+        token = _current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+            route = self.route_template(scope)
+            route_metrics(scope["method"], route).record(status, elapsed, stats)
+            if self.slow_seconds and elapsed >= self.slow_seconds:
+                log_slow_request(scope["method"], scope["path"], route, status, elapsed, stats)
+
+
+def log_slow_request(method: str, path: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+    slowest = sorted(stats.queries or (), reverse=True)[:settings.slow_request_log_statements]
+    lines = "".join(f"\n    {query_seconds * 1000:8.1f} ms  {' '.join(sql.split())[:500]}"
+                    for query_seconds, sql in slowest)
+    logger.warning(
+        "Slow request %s %s (%s) -> %s in %.1f ms: %d statements, %.1f ms in the database%s",
+        method, path, route, status, seconds * 1000, stats.statements, stats.db_seconds * 1000, lines,
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    seconds = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    stats.statements += 1
+    stats.db_seconds += seconds
+    # Rows returned by SELECTs (affected rows for DML) as reported by the driver;
+    # psycopg2 and asyncpg report both, sqlite3 only the latter
+    rowcount = cursor.rowcount
+    if rowcount and rowcount > 0:
+        stats.rows += rowcount
+    if stats.queries is not None:
+        stats.queries.append((seconds, statement))
+
+
+_installed = False
+
+
+def install_sqlalchemy_hooks() -> None:
+    """Count statements, time and rows of every engine (sync and async) per request, once per process"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, labels: Dict) -> List[str]:
+    snapshot = histogram.snapshot()
+    lines = [f"{name}_bucket{_labels(**labels, le=bound)} {count}" for bound, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{_labels(**labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(**labels)} {snapshot['count']}")
+    return lines
+
+
+def prometheus_text() -> str:
+    """Every route's metrics in the Prometheus text exposition format (0.0.4)"""
+    routes = sorted(all_route_metrics().items())
+    sections = [
+        ("http_request_duration_seconds", "histogram", "Request latency by route"),
+        ("http_requests_total", "counter", "Requests by route and status"),
+        ("db_statements_per_request", "histogram", "SQL statements issued per request"),
+        ("db_query_seconds_total", "counter", "Time spent executing SQL statements"),
+        ("db_rows_total", "counter", "Rows returned (SELECT) or affected (DML) as reported by the driver"),
+    ]
+    lines: List[str] = []
+    for name, kind, help_text in sections:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (method, route), metrics in routes:
+            labels = {"method": method, "route": route}
+            if name == "http_request_duration_seconds":
+                lines.extend(_histogram_lines(name, metrics.latency, labels))
+            elif name == "http_requests_total":
+                lines.extend(f"{name}{_labels(**labels, status=status)} {count}"
+                             for status, count in sorted(metrics.statuses.items()))
+            elif name == "db_statements_per_request":
+                lines.extend(_histogram_lines(name, metrics.statements, labels))
+            elif name == "db_query_seconds_total":
+                lines.append(f"{name}{_labels(**labels)} {metrics.db_seconds}")
+            else:
+                lines.append(f"{name}{_labels(**labels)} {metrics.rows}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+"""Keyset (cursor) pagination over (created_at, id)"""
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Query as QueryParam
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# Header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the given row"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor, raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def cursor_param(cursor: Optional[str] = QueryParam(None, description="Opaque cursor from X-Next-Cursor")) -> Optional[str]:
+    """Dependency validating the ``cursor`` query parameter (400 when malformed)"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return cursor
+
+
+def _seek(query: Query, created_col, id_col, limit: int,
+          cursor: Optional[str], descending: bool) -> List:
+    """Up to limit + 1 rows of ``query`` after ``cursor`` in (created_col, id_col) order"""
+    key = tuple_(created_col, id_col)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.filter(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col.asc(), id_col.asc())
+    return query.limit(limit + 1).all()
+
+
+def _page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def keyset_page(query: Query, created_col, id_col, limit: int,
+                cursor: Optional[str] = None, descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    One page of ``query`` ordered by (created_col, id_col) starting after ``cursor``.
+
+    Seeks with a row-value comparison instead of OFFSET, so any page costs one
+    index range scan. Fetches limit + 1 rows to tell whether another page exists.
+    """
+    return _page(_seek(query, created_col, id_col, limit, cursor, descending), limit)
+
+
+def keyset_page_union(sources: List[Tuple[Query, Any, Any]], limit: int,
+                      cursor: Optional[str] = None, descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    ``keyset_page`` across several tables holding rows of the same shape (rides
+    and rides_archive): each (query, created_col, id_col) is paged on its own
+    index and the results are merged. Rows are de-duplicated by id, in case
+    one moved between tables while the page was read.
+    """
+    rows = {}
+    for query, created_col, id_col in sources:
+        for row in _seek(query, created_col, id_col, limit, cursor, descending):
+            rows.setdefault(row.id, row)
+    merged = sorted(rows.values(), key=lambda row: (row.created_at, row.id), reverse=descending)
+    return _page(merged, limit)
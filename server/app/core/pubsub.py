@@ -0,0 +1,238 @@
+"""In-process pub/sub for real-time events, with an optional Postgres LISTEN/NOTIFY transport"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from app.core.config import Lazy, settings
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriberLimitReached(Exception):
+    """This worker already holds events_max_subscribers subscriptions"""
+
+
+class Subscription:
+    """
+    One connection's bounded event queue.
+
+    Messages are pre-encoded JSON strings. When the consumer falls behind and
+    the queue is full, the oldest message is dropped; the next ``get`` then
+    returns an ``overflow`` event first so the client knows to refetch.
+    """
+
+    def __init__(self, hub: "PubSubBackend", maxsize: int):
+        self.hub = hub
+        self.channels: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self._reported = 0
+
+    def put(self, message: str) -> None:
+        """Queue a message without blocking the publisher (event loop thread only)"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> str:
+        """Next message, or an overflow notice if messages were dropped since the last call"""
+        if self.dropped > self._reported:
+            missed, self._reported = self.dropped - self._reported, self.dropped
+            return json.dumps({"type": "overflow", "dropped": missed})
+        return await self.queue.get()
+
+    def discard(self, stale: Callable[[str], bool]) -> int:
+        """Drop queued messages for which ``stale`` is true (event loop thread only), returns how many"""
+        queued = [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+        for message in queued:
+            if not stale(message):
+                self.queue.put_nowait(message)
+        return len(queued) - self.queue.qsize()
+
+    def subscribe(self, *channels: str) -> None:
+        self.hub.add_channels(self, channels)
+
+    def unsubscribe(self, *channels: str) -> None:
+        self.hub.remove_channels(self, channels)
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class PubSubBackend(ABC):
+    """
+    Channel fan-out to local subscriptions.
+
+    ``publish`` can be called from any thread (service code runs in the
+    threadpool on the sync database path) and never blocks. Subclasses decide
+    how a message reaches ``deliver``: directly, or through a shared transport
+    so that subscribers on every worker see it.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._subscriptions: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self) -> None:
+        """Bind to the running event loop (application startup)"""
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    def subscribe(self, channels: Iterable[str] = (), maxsize: Optional[int] = None) -> Subscription:
+        """New subscription for some channels, raises SubscriberLimitReached at the per-worker cap"""
+        if len(self._subscriptions) >= settings.events_max_subscribers:
+            raise SubscriberLimitReached(f"{len(self._subscriptions)} subscribers already connected")
+        subscription = Subscription(self, maxsize or settings.events_queue_size)
+        self._subscriptions.add(subscription)
+        self.add_channels(subscription, channels)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.remove_channels(subscription, list(subscription.channels))
+        self._subscriptions.discard(subscription)
+
+    def add_channels(self, subscription: Subscription, channels: Iterable[str]) -> None:
+        for channel in channels:
+            self._channels.setdefault(channel, set()).add(subscription)
+            subscription.channels.add(channel)
+
+    def remove_channels(self, subscription: Subscription, channels: Iterable[str]) -> None:
+        for channel in channels:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+            subscription.channels.discard(channel)
+
+    def publish(self, channels: Iterable[str], message: str) -> None:
+        """Send one pre-encoded message to several channels (no-op before start)"""
+        loop = self._loop
+        if loop is None:
+            return
+        channels = tuple(channels)
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._send(channels, message)
+        else:
+            loop.call_soon_threadsafe(self._send, channels, message)
+
+    @abstractmethod
+    def _send(self, channels: tuple, message: str) -> None:
+        """Hand a message to the transport (event loop thread)"""
+
+    def deliver(self, channels: Iterable[str], message: str) -> None:
+        """Queue a message for every local subscription of any of the channels, once each"""
+        targets: Set[Subscription] = set()
+        for channel in channels:
+            targets.update(self._channels.get(channel, ()))
+        for subscription in targets:
+            subscription.put(message)
+        self.delivered += len(targets)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend_name,
+            "subscribers": len(self._subscriptions),
+            "channels": len(self._channels),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions),
+        }
+
+
+class InMemoryPubSub(PubSubBackend):
+    """Fan-out within this worker only"""
+
+    backend_name = "memory"
+
+    def _send(self, channels, message):
+        self.deliver(channels, message)
+
+
+class PostgresPubSub(PubSubBackend):
+    """
+    Fan-out through Postgres LISTEN/NOTIFY, so every worker (and host) sees every event.
+
+    Each worker holds one asyncpg connection that LISTENs on ``pg_channel`` and
+    one that sends the NOTIFYs, fed by a queue so publishers never wait on the
+    database. Local subscribers are served from the notification, including
+    for events this worker published. NOTIFY payloads are limited to 8000 bytes.
+    """
+
+    backend_name = "postgres"
+
+    def __init__(self, dsn: str, pg_channel: str):
+        super().__init__()
+        self.dsn = dsn
+        self.pg_channel = pg_channel
+        self._outbox: Optional[asyncio.Queue] = None
+        self._listener = None
+        self._sender_task: Optional[asyncio.Task] = None
+        self.notify_errors = 0
+
+    async def start(self) -> None:
+        import asyncpg
+
+        await super().start()
+        self._outbox = asyncio.Queue()
+        self._listener = await asyncpg.connect(self.dsn)
+        await self._listener.add_listener(self.pg_channel, self._on_notification)
+        self._sender_task = asyncio.create_task(self._send_loop(await asyncpg.connect(self.dsn)))
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            await asyncio.gather(self._sender_task, return_exceptions=True)
+        if self._listener is not None:
+            await self._listener.close()
+
+    def _send(self, channels, message):
+        self._outbox.put_nowait(json.dumps({"channels": channels, "message": message}))
+
+    async def _send_loop(self, connection) -> None:
+        try:
+            while True:
+                payload = await self._outbox.get()
+                try:
+                    await connection.execute("SELECT pg_notify($1, $2)", self.pg_channel, payload)
+                except Exception:
+                    self.notify_errors += 1
+                    logger.exception("NOTIFY failed, event dropped")
+        finally:
+            await connection.close()
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        event = json.loads(payload)
+        self.deliver(event["channels"], event["message"])
+
+    def stats(self) -> Dict:
+        return dict(super().stats(), notify_errors=self.notify_errors)
+
+
+def create_pubsub() -> PubSubBackend:
+    """Build the configured pub/sub backend"""
+    if settings.pubsub_backend == "memory":
+        return InMemoryPubSub()
+    if settings.pubsub_backend == "postgres":
+        from sqlalchemy.engine import make_url
+
+        dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresPubSub(dsn, settings.pubsub_pg_channel)
+    raise ValueError(f"Unknown pub/sub backend '{settings.pubsub_backend}', expected 'memory' or 'postgres'")
+
+
+pubsub: PubSubBackend = Lazy(create_pubsub)
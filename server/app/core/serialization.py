@@ -0,0 +1,76 @@
+"""Fast JSON path for large list responses"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional dependency, falls back to pydantic-core encoding
+    orjson = None
+
+# Same JSON values as pydantic for the column types we serialize (UTC as "Z").
+# Not necessarily the same bytes: orjson and pydantic-core format floats
+# independently (exponent forms like 1e16 differ between versions), and the
+# rows skip validation, so a driver returning an int for a float column
+# emits 1 rather than 1.0. Clients must parse numbers, not compare text.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when installed; pre-encoded bytes pass through"""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is not None:
+            return orjson.dumps(content, option=ORJSON_OPTIONS)
+        return super().render(content)
+
+
+@lru_cache(maxsize=None)
+def response_columns(orm_model, schema: Type[BaseModel]) -> tuple:
+    """ORM columns backing every field of a response schema, for column-only queries"""
+    return tuple(getattr(orm_model, name) for name in schema.model_fields)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for List[schema], built once per schema"""
+    return TypeAdapter(List[schema])
+
+
+@lru_cache(maxsize=None)
+def item_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for a single schema object, built once per schema"""
+    return TypeAdapter(schema)
+
+
+def encode_rows(schema: Type[BaseModel], rows: Sequence) -> bytes:
+    """
+    Encode column-only result rows as a JSON array of ``schema`` objects.
+
+    The rows come from ``response_columns`` so they already have the schema's
+    shape; with orjson they are dumped directly, otherwise they go through the
+    cached list adapter (validation and encoding both in pydantic-core).
+    """
+    items = [dict(row._mapping) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(items, option=ORJSON_OPTIONS)
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(items))
+
+
+def encode_ndjson(schema: Type[BaseModel], rows: Sequence) -> bytes:
+    """Encode column-only result rows as newline-delimited JSON, one object per line"""
+    if orjson is not None:
+        return b"".join(orjson.dumps(dict(row._mapping), option=ORJSON_OPTIONS) + b"\n" for row in rows)
+    adapter = item_adapter(schema)
+    return b"".join(adapter.dump_json(adapter.validate_python(dict(row._mapping))) + b"\n" for row in rows)
+
+
+def list_response(schema: Type[BaseModel], rows: Sequence,
+                  headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Response for a column-only row list, bypassing response_model validation"""
+    return FastJSONResponse(encode_rows(schema, rows), headers=headers)
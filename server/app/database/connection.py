@@ -1,26 +1,324 @@
 """Database connection and session management"""
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional, TypeVar, Union
+
+from fastapi import Header, Response
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.database.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, reset_pool_metrics
+
+T = TypeVar("T")
+
+# Session handed to route handlers: AsyncSession normally, Session in sync fallback mode
+DBSession = Union[AsyncSession, Session]
+
+# Async driver used for each sync backend when async_database_url is not set
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+# Response header stamped by write routes (epoch seconds); clients that echo it
+# back have their reads served by the primary for read_your_writes_seconds
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def async_url_for(database_url: str) -> str:
+    """Same database as ``database_url`` through its async driver"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}', set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def get_async_database_url() -> str:
+    """Build the async engine URL from the configured database URL"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    return async_url_for(settings.database_url)
+
+
+def engine_options(url: str, name: str, async_engine: bool = False) -> dict:
+    """Engine keyword arguments for the configured pool settings"""
+    options = {"echo": settings.db_echo}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite needs its single-connection pool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+# Engines and session factories are built on first use, so importing the app
+# does not touch the database drivers or the pool
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Sync engine for the configured database"""
+    if "sync" not in _engines:
+        with _engines_lock:
+            if "sync" not in _engines:
+                _engines["sync"] = create_engine(settings.database_url, **engine_options(settings.database_url, "primary"))
+    return _engines["sync"]
+
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    """Async engine, None when the async path is disabled (DB_ASYNC=False)"""
+    if not settings.db_async:
+        return None
+    if "async" not in _engines:
+        with _engines_lock:
+            if "async" not in _engines:
+                url = get_async_database_url()
+                _engines["async"] = create_async_engine(url, **engine_options(url, "primary-async", async_engine=True))
+    return _engines["async"]
+
+
+def get_replica_engines() -> List[Engine]:
+    """Sync engines for the configured read replicas, empty when there are none"""
+    if "replicas" not in _engines:
+        with _engines_lock:
+            if "replicas" not in _engines:
+                _engines["replicas"] = [
+                    create_engine(url, **engine_options(url, f"replica-{index}"))
+                    for index, url in enumerate(settings.replica_database_urls)
+                ]
+    return _engines["replicas"]
+
+
+def get_async_replica_engines() -> List[AsyncEngine]:
+    """Async engines for the configured read replicas, empty when the async path is disabled"""
+    if not settings.db_async:
+        return []
+    if "replicas-async" not in _engines:
+        with _engines_lock:
+            if "replicas-async" not in _engines:
+                engines = []
+                for index, url in enumerate(settings.replica_database_urls):
+                    url = async_url_for(url)
+                    engines.append(create_async_engine(
+                        url, **engine_options(url, f"replica-{index}-async", async_engine=True)
+                    ))
+                _engines["replicas-async"] = engines
+    return _engines["replicas-async"]
+
+
+@lru_cache(maxsize=None)
+def get_session_factory() -> sessionmaker:
+    """Sync session factory"""
+    # expire_on_commit=False: rows returned by UPDATE ... RETURNING stay loaded after commit
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_engine())
+
+
+@lru_cache(maxsize=None)
+def get_async_session_factory() -> Optional[async_sessionmaker]:
+    """Async session factory, None when the async path is disabled"""
+    if not settings.db_async:
+        return None
+    # expire_on_commit=False: responses are serialized outside the session's greenlet,
+    # where expired attributes could not be lazily reloaded
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+@lru_cache(maxsize=None)
+def get_replica_session_factories() -> List[Union[sessionmaker, async_sessionmaker]]:
+    """One session factory per read replica, for the configured database mode"""
+    if settings.db_async:
+        return [async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+                for engine in get_async_replica_engines()]
+    return [sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+            for engine in get_replica_engines()]
+
+
+# Backwards-compatible module attributes (engine, SessionLocal, ...), built lazily
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_session_factory,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug  # Log SQL queries in debug mode
-)
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[DBSession]:
+    """Open a session for the configured database mode"""
+    if settings.db_async:
+        async with get_async_session_factory()() as db:
+            yield db
+    else:
+        db = get_session_factory()()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+_replica_counter = itertools.count()
+
+
+def _pool_load(factory: Union[sessionmaker, async_sessionmaker]) -> int:
+    """Connections checked out of, plus callers waiting on, a factory's pool"""
+    pool = factory.kw["bind"].pool
+    checked_out = getattr(pool, "checkedout", None)
+    metrics = getattr(pool, "metrics", None)
+    return (checked_out() if checked_out else 0) + (metrics.waiting if metrics else 0)
+
+
+def choose_replica(factories: List) -> Union[sessionmaker, async_sessionmaker]:
+    """Next replica by round robin, or the least loaded one (ties rotate) per REPLICA_SELECTION"""
+    start = next(_replica_counter) % len(factories)
+    if settings.replica_selection != "least_loaded":
+        return factories[start]
+    order = factories[start:] + factories[:start]
+    return min(order, key=_pool_load)
+
+
+def within_write_window(last_write: Optional[str]) -> bool:
+    """True while an echoed X-Last-Write is recent enough that replicas may not have the write yet"""
+    if not last_write or settings.read_your_writes_seconds <= 0:
+        return False
     try:
+        written_at = float(last_write)
+    except ValueError:
+        return False
+    return time.time() - written_at < settings.read_your_writes_seconds
+
+
+@asynccontextmanager
+async def read_session_scope(last_write: Optional[str] = None) -> AsyncIterator[DBSession]:
+    """
+    Open a session for read-only work: on a replica when any are configured,
+    on the primary without replicas or inside the read-your-writes window.
+    The session is tagged for the entity caches (``may_read_cache``/``may_fill_cache``).
+    """
+    factories = get_replica_session_factories()
+    if within_write_window(last_write):
+        async with session_scope() as db:
+            db.info["bypass_cache"] = True
+            yield db
+        return
+    if not factories:
+        async with session_scope() as db:
+            yield db
+        return
+    factory = choose_replica(factories)
+    if settings.db_async:
+        async with factory() as db:
+            db.info["replica"] = True
+            yield db
+    else:
+        db = factory()
+        db.info["replica"] = True
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+def may_read_cache(db: Session) -> bool:
+    """False inside the read-your-writes window: another worker's write may not be in this worker's cache"""
+    return not db.info.get("bypass_cache")
+
+
+def may_fill_cache(db: Session) -> bool:
+    """False on replica sessions: a lagging replica must not put stale rows (or deleted ones) back in the cache"""
+    return not db.info.get("replica")
+
+
+async def get_db() -> AsyncIterator[DBSession]:
+    """Dependency to get database session (primary)"""
+    async with session_scope() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+async def get_write_db(response: Response) -> AsyncIterator[DBSession]:
+    """Dependency for routes that modify data: a primary session, and X-Last-Write on the response"""
+    response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+    async with session_scope() as db:
+        yield db
+
+
+async def get_read_db(x_last_write: Optional[str] = Header(None)) -> AsyncIterator[DBSession]:
+    """Dependency for read-only routes: a replica session unless X-Last-Write is recent"""
+    async with read_session_scope(x_last_write) as db:
+        yield db
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Await a sync-style service call without blocking the event loop.
+
+    With an AsyncSession the call runs through ``run_sync`` on the async driver;
+    with a sync Session it is pushed to the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of every engine created so far (application shutdown)"""
+    if "async" in _engines:
+        await _engines["async"].dispose()
+    for engine in _engines.get("replicas-async", []):
+        await engine.dispose()
+    if "sync" in _engines:
+        await run_in_threadpool(_engines["sync"].dispose)
+    for engine in _engines.get("replicas", []):
+        await run_in_threadpool(engine.dispose)
+
+
+def _reset_after_fork() -> None:
+    """
+    Forget the parent's engines in a forked child (gunicorn --preload,
+    multiprocessing): pooled connections must never be shared by two
+    processes, so the child builds its own engines, pools and pool metrics
+    on first use. ``dispose(close=False)`` drops the inherited pool without closing the
+    parent's connections from under it.
+    """
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for engines in list(_engines.values()):
+        for engine in engines if isinstance(engines, list) else [engines]:
+            getattr(engine, "sync_engine", engine).dispose(close=False)
+    _engines.clear()
+    get_session_factory.cache_clear()
+    get_async_session_factory.cache_clear()
+    get_replica_session_factories.cache_clear()
+    reset_pool_metrics()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,13 @@
+"""Dialect-specific statement helpers"""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_insert(db: Session, table):
+    """INSERT construct supporting on_conflict_* for the session's backend"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upsert is not supported on '{dialect}'")
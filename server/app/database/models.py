@@ -1,10 +1,26 @@
 """SQLAlchemy database models"""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Boolean, Float, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from app.core.geo import cell_id
 from app.database.connection import Base
 
 
+# SQLite's CURRENT_TIMESTAMP has whole seconds; bind created_at values in the same
+# text format there, otherwise keyset comparisons against cursors misorder ties
+CreatedAt = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+
+def pickup_cell_default(context) -> int:
+    """Derive the pickup grid cell from the inserted coordinates"""
+    params = context.get_current_parameters()
+    return cell_id(params["pickup_latitude"], params["pickup_longitude"])
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -15,12 +31,17 @@ class User(Base):
     phone_number = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True, index=True)
     is_driver = Column(Boolean, default=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(CreatedAt, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     rides_as_passenger = relationship("Ride", foreign_keys="Ride.passenger_id", back_populates="passenger")
     rides_as_driver = relationship("Ride", foreign_keys="Ride.driver_id", back_populates="driver")
+    
+    # Keyset pagination order for user listing
+    __table_args__ = (
+        Index('idx_users_created_id', 'created_at', 'id'),
+    )
 
 
 class Ride(Base):
@@ -37,15 +58,17 @@ class Ride(Base):
     destination_address = Column(String, nullable=False)
     destination_latitude = Column(Float, nullable=False)
     destination_longitude = Column(Float, nullable=False)
+    pickup_cell = Column(BigInteger, default=pickup_cell_default)  # see app.core.geo.cell_id
     
     # Ride details
     status = Column(String, default="requested", index=True)
     fare = Column(Float, nullable=True)
     distance_km = Column(Float, nullable=True)
     duration_minutes = Column(Integer, nullable=True)
+    surge_multiplier = Column(Float, nullable=False, default=1.0, server_default="1")  # locked in at request time
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(CreatedAt, server_default=func.now(), index=True)
     accepted_at = Column(DateTime(timezone=True), nullable=True)
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -59,9 +82,89 @@ class Ride(Base):
         Index('idx_rides_status_created', 'status', 'created_at'),
         Index('idx_rides_passenger_status', 'passenger_id', 'status'),
         Index('idx_rides_driver_status', 'driver_id', 'status'),
+        Index('idx_rides_status_cell', 'status', 'pickup_cell'),
+        # Keyset pagination of ride history, newest first
+        Index('idx_rides_passenger_created', 'passenger_id', 'created_at', 'id'),
+        Index('idx_rides_driver_created', 'driver_id', 'created_at', 'id'),
+        # Archived rides leave rides; without AUTOINCREMENT SQLite would hand
+        # the highest archived ids out again
+        {"sqlite_autoincrement": True},
     )
 
 
+class RideArchive(Base):
+    """
+    Completed rides moved out of ``rides`` by the archiver (app.services.archive_service).
+
+    Same columns as Ride, so keep the two in step. Range-partitioned by month of
+    created_at on PostgreSQL, a plain table elsewhere. The primary key includes
+    created_at because a partitioned table's keys must contain the partition key.
+    There are no foreign keys: archived history is immutable and moved in bulk.
+    """
+    __tablename__ = "rides_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    passenger_id = Column(Integer, nullable=False)
+    driver_id = Column(Integer, nullable=True)
+    
+    # Location details
+    pickup_address = Column(String, nullable=False)
+    pickup_latitude = Column(Float, nullable=False)
+    pickup_longitude = Column(Float, nullable=False)
+    destination_address = Column(String, nullable=False)
+    destination_latitude = Column(Float, nullable=False)
+    destination_longitude = Column(Float, nullable=False)
+    pickup_cell = Column(BigInteger)
+    
+    # Ride details
+    status = Column(String, nullable=False)
+    fare = Column(Float, nullable=True)
+    distance_km = Column(Float, nullable=True)
+    duration_minutes = Column(Integer, nullable=True)
+    surge_multiplier = Column(Float, nullable=False, default=1.0, server_default="1")
+    
+    # Timestamps
+    created_at = Column(CreatedAt, primary_key=True)
+    accepted_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # History only: keyset pagination per passenger/driver and time-range export
+    __table_args__ = (
+        Index('idx_rides_archive_passenger_created', 'passenger_id', 'created_at', 'id'),
+        Index('idx_rides_archive_driver_created', 'driver_id', 'created_at', 'id'),
+        Index('idx_rides_archive_created', 'created_at'),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class UserRideStats(Base):
+    """Lifetime totals of a user's completed rides in one role, updated by RideService.complete_ride"""
+    __tablename__ = "user_ride_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    role = Column(String, primary_key=True)  # "driver" (fares earned) or "passenger" (fares paid)
+    trips = Column(Integer, nullable=False, default=0)
+    total_fare = Column(Float, nullable=False, default=0.0)
+    total_distance_km = Column(Float, nullable=False, default=0.0)
+    total_duration_minutes = Column(Integer, nullable=False, default=0)
+    first_trip_at = Column(DateTime(timezone=True), nullable=True)
+    last_trip_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class UserDailyRideStats(Base):
+    """Per-day (UTC, by completion time) totals of a user's completed rides in one role"""
+    __tablename__ = "user_daily_ride_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    role = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    trips = Column(Integer, nullable=False, default=0)
+    total_fare = Column(Float, nullable=False, default=0.0)
+    total_distance_km = Column(Float, nullable=False, default=0.0)
+    total_duration_minutes = Column(Integer, nullable=False, default=0)
+
+
 class PingLog(Base):
     __tablename__ = "ping_logs"
     
@@ -69,4 +172,15 @@ class PingLog(Base):
     ping_data = Column(String, nullable=False)
     response_message = Column(String, nullable=False)
     ip_address = Column(String, nullable=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class DriverLocation(Base):
+    """Last persisted position of a driver (live positions are kept in memory)"""
+    __tablename__ = "driver_locations"
+    
+    driver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    is_online = Column(Boolean, default=True, index=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,115 @@
+"""Connection pool instrumentation"""
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import Histogram
+
+
+class PoolMetrics:
+    """Checkout counters and latency histogram for one named pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[Pool] = None
+        self.checkout_latency = Histogram()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self._lock = threading.Lock()
+
+    def attach(self, pool: Pool) -> None:
+        """Point live gauges at the current pool (pools are recreated on dispose)"""
+        self.pool = pool
+
+    def begin_checkout(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def end_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+        self.checkout_latency.observe(seconds)
+
+    def snapshot(self) -> Dict:
+        """Live pool gauges plus cumulative checkout statistics"""
+        pool = self.pool
+        latency = self.checkout_latency.snapshot()
+        return {
+            "name": self.name,
+            "pool_size": pool.size() if pool is not None else 0,
+            "checked_out": pool.checkedout() if pool is not None else 0,
+            "checked_in": pool.checkedin() if pool is not None else 0,
+            "overflow": pool.overflow() if pool is not None else 0,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_checkout_seconds": latency["sum"] / latency["count"] if latency["count"] else 0.0,
+            "checkout_latency_seconds": latency,
+        }
+
+
+_registry: Dict[str, PoolMetrics] = {}
+_registry_lock = threading.Lock()
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    """Return (creating if needed) the metrics for a named pool"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = PoolMetrics(name)
+        return _registry[name]
+
+
+def all_pool_metrics() -> Dict[str, PoolMetrics]:
+    """All registered pool metrics keyed by pool name"""
+    with _registry_lock:
+        return dict(_registry)
+
+
+def reset_pool_metrics() -> None:
+    """Forget every registered pool (a forked child starts with its own pools)"""
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    _registry.clear()
+
+
+class _InstrumentedPoolMixin:
+    """Times ``connect()``: queue wait, new connections and pre-ping included"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = get_pool_metrics(self._orig_logging_name or "default")
+        self.metrics.attach(self)
+
+    def connect(self):
+        self.metrics.begin_checkout()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.end_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        except Exception:
+            self.metrics.end_checkout(time.perf_counter() - start)
+            raise
+        self.metrics.end_checkout(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool reporting to PoolMetrics"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool reporting to PoolMetrics"""
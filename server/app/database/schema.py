@@ -0,0 +1,184 @@
+"""Schema management: explicit create/migrate steps, never run at import"""
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from app.core.config import settings
+from app.core.geo import cell_id
+from app.database.connection import Base, get_engine
+from app.database import models  # noqa: F401  (registers every table on Base.metadata)
+
+
+def create_schema(bind: Optional[Engine] = None) -> None:
+    """Create every missing table and its indexes"""
+    bind = bind or get_engine()
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as connection:
+        ensure_archive_partitions(connection, [datetime.now(timezone.utc)])
+
+
+def migrate_schema(bind: Optional[Engine] = None) -> List[str]:
+    """
+    Bring an existing database up to the models, returns the actions taken.
+
+    Additive only: creates missing tables, adds missing columns (nullable or with
+    a server default) and indexes, and backfills derived columns. Renames, drops
+    and type changes still need a hand-written migration.
+    """
+    bind = bind or get_engine()
+    actions = []
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(connection)
+                actions.append(f"created table {table.name}")
+                continue
+
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    actions.append(f"SKIPPED {table.name}.{column.name}: NOT NULL without a server default")
+                    continue
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                actions.append(f"added column {table.name}.{column.name}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+                    actions.append(f"created index {index.name}")
+
+        if ensure_sqlite_ride_autoincrement(connection):
+            actions.append("rebuilt rides with AUTOINCREMENT (ids are never reused after archiving)")
+
+        backfilled = backfill_pickup_cells(connection)
+        if backfilled:
+            actions.append(f"backfilled pickup_cell on {backfilled} rides")
+
+        # Partitions for every month already in rides, so archived history never
+        # arrives at a month that is not covered
+        oldest = connection.execute(select(func.min(models.Ride.created_at))).scalar()
+        months = [datetime.now(timezone.utc)] + ([oldest] if oldest is not None else [])
+        actions.extend(f"created partition {name}" for name in ensure_archive_partitions(connection, months))
+    return actions
+
+
+def ensure_sqlite_ride_autoincrement(connection) -> bool:
+    """
+    Rebuild a SQLite rides table created without AUTOINCREMENT, returns True if
+    rebuilt. A plain INTEGER PRIMARY KEY reuses the highest ids once those rows
+    are deleted, which the archiver does; the sequence is started above every
+    id in rides and rides_archive so archived rides keep theirs to themselves.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    table = models.Ride.__table__
+    sql = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {"name": table.name}).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return False
+
+    rebuild = f"_{table.name}_rebuild"
+    ddl = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.execute(text(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {rebuild} ", 1)))
+    columns = ", ".join(column.name for column in table.columns)
+    connection.execute(text(f"INSERT INTO {rebuild} ({columns}) SELECT {columns} FROM {table.name}"))
+    connection.execute(text(f"DROP TABLE {table.name}"))
+    connection.execute(text(f"ALTER TABLE {rebuild} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(connection)
+
+    archive = models.RideArchive.__table__
+    high = connection.execute(select(func.max(func.coalesce(
+        select(func.max(table.c.id)).scalar_subquery(), 0
+    ), func.coalesce(select(func.max(archive.c.id)).scalar_subquery(), 0)))).scalar()
+    connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+    connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                       {"name": table.name, "seq": high})
+    return True
+
+
+def month_start(value: datetime) -> date:
+    """First day of the UTC month containing value (naive values are taken as UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_partitions(connection) -> List[str]:
+    """Names of the existing rides_archive partitions (PostgreSQL)"""
+    return list(connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :parent"
+    ), {"parent": models.RideArchive.__tablename__}).scalars())
+
+
+def ensure_archive_partitions(connection, timestamps: Iterable[datetime]) -> List[str]:
+    """
+    Create the monthly rides_archive partitions needed for rows created at the
+    given times, from the oldest month through rides_archive_partitions_ahead
+    months past the newest. PostgreSQL only; returns the partitions created.
+
+    There is deliberately no DEFAULT partition: a month with rows in DEFAULT
+    could no longer get its own partition, so an uncovered insert fails instead.
+    """
+    if connection.dialect.name != "postgresql":
+        return []
+    months = sorted({month_start(value) for value in timestamps})
+    if not months:
+        return []
+    parent = models.RideArchive.__tablename__
+    existing = set(archive_partitions(connection))
+    created = []
+    month, last = months[0], add_months(months[-1], settings.rides_archive_partitions_ahead)
+    while month <= last:
+        name = f"{parent}_{month:%Y_%m}"
+        if name not in existing:
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {parent} "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{add_months(month, 1)} 00:00:00+00')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def backfill_pickup_cells(connection, batch_size: int = 5000) -> int:
+    """Derive rides.pickup_cell for rows created before the column existed"""
+    rides = models.Ride.__table__
+    stmt = (
+        update(rides)
+        .where(rides.c.id == bindparam("ride_id"))
+        .values(pickup_cell=bindparam("cell"))
+    )
+    total = 0
+    while True:
+        rows = connection.execute(
+            select(rides.c.id, rides.c.pickup_latitude, rides.c.pickup_longitude)
+            .where(rides.c.pickup_cell.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+        connection.execute(stmt, [
+            {"ride_id": ride_id, "cell": cell_id(latitude, longitude)}
+            for ride_id, latitude, longitude in rows
+        ])
+        total += len(rows)
@@ -1,14 +1,25 @@
 """Main FastAPI application setup with database"""
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, install_sqlalchemy_hooks
 from app.api.routes.ping import router as ping_router
 from app.api.routes.user import router as users_router
 from app.api.routes.rides import router as rides_router
-from app.database.connection import engine, Base
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.api.routes.metrics import prometheus_router, router as metrics_router
+from app.api.routes.drivers import router as drivers_router
+from app.api.routes.dispatch import router as dispatch_router
+from app.api.routes.pricing import router as pricing_router
+from app.api.routes.surge import router as surge_router
+from app.api.routes.events import router as events_router
+from app.core.pubsub import pubsub
+from app.database.connection import dispose_engines, run_db, session_scope
+from app.services.archive_service import ride_archiver
+from app.services.driver_location_service import DriverLocationService, driver_locations
+from app.services.ping_service import ping_log_buffer
 
 
 def create_application() -> FastAPI:
@@ -20,6 +31,19 @@ def create_application() -> FastAPI:
         description="A modular FastAPI-based Mini-Uber project with PostgreSQL integration"
     )
 
+    # Innermost of the three: rejections still get CORS headers and are instrumented
+    if settings.admission_enabled:
+        app.add_middleware(
+            AdmissionMiddleware,
+            rate=settings.admission_rate,
+            burst=settings.admission_burst,
+            max_clients=settings.admission_max_clients,
+            route_costs=settings.admission_route_costs,
+            max_pool_waiting=settings.admission_max_pool_waiting,
+            exempt_paths=settings.admission_exempt_paths,
+            overload_retry_after=settings.admission_overload_retry_after_seconds,
+        )
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -29,10 +53,51 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Outermost, so the timings include every other middleware
+    if settings.instrumentation_enabled:
+        install_sqlalchemy_hooks()
+        app.add_middleware(InstrumentationMiddleware, slow_request_ms=settings.slow_request_ms)
+
     # Include routers
     app.include_router(ping_router)
     app.include_router(users_router)
     app.include_router(rides_router)
+    app.include_router(metrics_router)
+    app.include_router(prometheus_router)
+    app.include_router(drivers_router)
+    app.include_router(dispatch_router)
+    app.include_router(pricing_router)
+    app.include_router(surge_router)
+    app.include_router(events_router)
+
+    background_tasks = []
+
+    @app.on_event("startup")
+    async def startup():
+        if settings.db_create_tables_on_startup:
+            from app.database.schema import create_schema
+            await run_in_threadpool(create_schema)
+        await pubsub.start()
+        async with session_scope() as db:
+            await run_db(db, driver_locations.load)
+        background_tasks.append(asyncio.create_task(DriverLocationService.flush_loop()))
+        background_tasks.append(asyncio.create_task(ping_log_buffer.run()))
+        if settings.rides_archive_enabled:
+            background_tasks.append(asyncio.create_task(ride_archiver.run()))
+        if settings.dispatch_enabled:
+            from app.services.dispatch_service import DispatchService
+            background_tasks.append(asyncio.create_task(DispatchService.dispatch_loop()))
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        background_tasks.clear()
+        await DriverLocationService.flush()
+        await ping_log_buffer.flush()
+        await pubsub.stop()
+        await dispose_engines()
 
     @app.get("/")
     async def root():
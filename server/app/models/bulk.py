@@ -0,0 +1,16 @@
+"""Pydantic models for bulk create operations"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class BulkItemResult(BaseModel):
+    index: int  # position of the item in the request array
+    status: str  # "created", "conflict" or "invalid"
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
@@ -0,0 +1,18 @@
+"""Pydantic models for dispatch operations"""
+from pydantic import BaseModel
+from typing import List
+
+
+class DispatchAssignment(BaseModel):
+    ride_id: int
+    driver_id: int
+    pickup_distance_km: float
+
+
+class DispatchRoundResponse(BaseModel):
+    strategy: str
+    rides_considered: int
+    drivers_considered: int
+    assignments: List[DispatchAssignment]
+    match_ms: float
+    total_ms: float
@@ -0,0 +1,21 @@
+"""Pydantic models for driver location operations"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class DriverLocationUpdate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    is_online: bool = True
+
+
+class DriverLocationResponse(BaseModel):
+    driver_id: int
+    latitude: float
+    longitude: float
+    is_online: bool
+    updated_at: datetime
+
+
+class NearbyDriverResponse(DriverLocationResponse):
+    distance_km: float
@@ -0,0 +1,35 @@
+"""Pydantic models for pricing operations"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class QuoteTrip(BaseModel):
+    pickup_latitude: float = Field(..., ge=-90, le=90)
+    pickup_longitude: float = Field(..., ge=-180, le=180)
+    destination_latitude: float = Field(..., ge=-90, le=90)
+    destination_longitude: float = Field(..., ge=-180, le=180)
+
+
+class QuoteRequest(BaseModel):
+    tariff: Optional[str] = None  # default tariff when omitted
+    trips: List[QuoteTrip]
+
+
+class QuoteResult(BaseModel):
+    distance_km: float
+    duration_minutes: int
+    fare: float  # includes surge_multiplier
+    surge_multiplier: float = 1.0
+
+
+class QuoteResponse(BaseModel):
+    tariff: str
+    quotes: List[QuoteResult]
+
+
+class TariffResponse(BaseModel):
+    name: str
+    base: float
+    per_km: float
+    per_minute: float
+    minimum: float
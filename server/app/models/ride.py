@@ -33,10 +33,15 @@ class RideResponse(RideBase):
     fare: Optional[float] = None
     distance_km: Optional[float] = None
     duration_minutes: Optional[int] = None
+    surge_multiplier: float = 1.0
     created_at: datetime
     accepted_at: Optional[datetime] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class NearbyRideResponse(RideResponse):
+    pickup_distance_km: Optional[float] = None
@@ -0,0 +1,30 @@
+"""Pydantic models for ride statistics"""
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+
+
+class RoleStats(BaseModel):
+    trips: int = 0
+    total_fare: float = 0.0  # earned as driver, paid as passenger
+    average_fare: Optional[float] = None
+    total_distance_km: float = 0.0
+    total_duration_minutes: int = 0
+    first_trip_at: Optional[datetime] = None
+    last_trip_at: Optional[datetime] = None
+
+
+class DailyStats(BaseModel):
+    day: date
+    role: str
+    trips: int
+    total_fare: float
+    total_distance_km: float
+    total_duration_minutes: int
+
+
+class UserStatsResponse(BaseModel):
+    user_id: int
+    driver: RoleStats
+    passenger: RoleStats
+    daily: List[DailyStats]  # most recent first
@@ -0,0 +1,27 @@
+"""Pydantic models for surge pricing"""
+from pydantic import BaseModel
+from typing import List
+
+
+class SurgeCell(BaseModel):
+    cell: List[int]  # [row, column] in the surge grid
+    latitude: float  # cell centre
+    longitude: float
+    requests: int
+    accepts: int
+    multiplier: float
+
+
+class SurgeSnapshotResponse(BaseModel):
+    enabled: bool
+    tracked_cells: int
+    cell_size_deg: float
+    window_seconds: int
+    bucket_seconds: int
+    cells: List[SurgeCell]
+
+
+class SurgeMultiplierResponse(BaseModel):
+    latitude: float
+    longitude: float
+    multiplier: float
@@ -0,0 +1,102 @@
+"""Archival of completed rides from the hot rides table into rides_archive"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.connection import run_db, session_scope
+from app.database.models import Ride, RideArchive
+from app.database.schema import ensure_archive_partitions
+
+logger = logging.getLogger(__name__)
+
+# Terminal statuses: live traffic never reads or updates these rides again
+ARCHIVED_STATUSES = ("completed",)
+
+
+def archive_cutoff() -> datetime:
+    """Rides completed before this are due for the archive"""
+    return datetime.utcnow() - timedelta(seconds=settings.rides_archive_after_seconds)
+
+
+class RideArchiver:
+    """
+    Keeps ``rides`` down to active and recently completed rides.
+
+    Each batch is one transaction: DELETE ... RETURNING a batch of eligible
+    rides, then INSERT the returned rows into rides_archive. On PostgreSQL the
+    batch is selected with FOR UPDATE SKIP LOCKED, so running the archiver on
+    every worker is safe.
+    """
+
+    def __init__(self):
+        self.moved = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+
+    @staticmethod
+    def move_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+        """Move up to batch_size rides completed before cutoff, returns how many moved"""
+        rides = Ride.__table__
+        eligible = (
+            select(rides.c.id)
+            .where(rides.c.status.in_(ARCHIVED_STATUSES), rides.c.completed_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = db.execute(
+            delete(rides).where(rides.c.id.in_(eligible.scalar_subquery())).returning(*rides.columns)
+        ).all()
+        if rows:
+            ensure_archive_partitions(db.connection(), {row.created_at for row in rows})
+            db.execute(insert(RideArchive.__table__), [row._asdict() for row in rows])
+        db.commit()
+        return len(rows)
+
+    async def run_once(self) -> int:
+        """Archive every ride due now, one batch per transaction"""
+        cutoff = archive_cutoff()
+        batch_size = settings.rides_archive_batch_size
+        moved = 0
+        while True:
+            try:
+                async with session_scope() as db:
+                    count = await run_db(db, self.move_batch, cutoff, batch_size)
+            except Exception:
+                self.errors += 1
+                logger.exception("Ride archive batch failed")
+                break
+            moved += count
+            self.moved += count
+            self.batches += 1
+            if count < batch_size:
+                break
+        self.last_run_at = datetime.utcnow()
+        if moved:
+            logger.info("Archived %d completed rides", moved)
+        return moved
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """Background task: archive due rides every ``interval`` seconds"""
+        interval = interval or settings.rides_archive_interval_seconds
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_once()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": settings.rides_archive_enabled,
+            "after_seconds": settings.rides_archive_after_seconds,
+            "moved": self.moved,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+ride_archiver = RideArchiver()
@@ -0,0 +1,224 @@
+"""Batch dispatch: assign requested rides to nearby idle drivers"""
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.geo import KM_PER_DEGREE_LAT, lon_half_width
+from app.core.geo_vector import haversine_matrix
+from app.database.connection import DBSession, run_db, session_scope
+from app.database.models import Ride
+from app.services.driver_location_service import driver_locations
+from app.services.ride_services import RideService
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_linear_sum_assignment():
+    """scipy's Hungarian solver, imported on first use (None when scipy is missing)"""
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:  # optional dependency, "optimal" falls back to greedy
+        return None
+    return linear_sum_assignment
+
+
+class Assignment(NamedTuple):
+    ride_index: int
+    driver_index: int
+    distance_km: float
+
+
+def _grid_buckets(lat: np.ndarray, lon: np.ndarray, cell_lat: float, cell_lon: float) -> Dict:
+    """Point indices grouped by (row, column) of a grid with the given cell size"""
+    rows = np.floor(lat / cell_lat).astype(np.int64).tolist()
+    cols = np.floor(lon / cell_lon).astype(np.int64).tolist()
+    buckets: Dict = {}
+    for index, key in enumerate(zip(rows, cols)):
+        buckets.setdefault(key, []).append(index)
+    return buckets
+
+
+def candidate_edges(ride_lat: np.ndarray, ride_lon: np.ndarray,
+                    driver_lat: np.ndarray, driver_lon: np.ndarray,
+                    max_km: float, per_ride: int):
+    """
+    Nearest ``per_ride`` drivers for every ride, within ``max_km``.
+
+    Rides and drivers are bucketed into cells at least ``max_km`` wide, so each
+    ride cell is only compared with drivers in the 3x3 cells around it and the
+    work follows local density rather than rides x drivers. Returns parallel
+    (ride index, driver index, distance) arrays. Does not wrap at the antimeridian.
+    """
+    widest_lat = float(np.max(np.abs(np.concatenate([ride_lat, driver_lat]))))
+    cell_lat = max_km / KM_PER_DEGREE_LAT
+    # A pair within max_km is at most this far apart in longitude at any of
+    # the points' latitudes (180 near a pole: a couple of columns for the globe)
+    cell_lon = lon_half_width(widest_lat, max_km)
+    ride_cells = _grid_buckets(ride_lat, ride_lon, cell_lat, cell_lon)
+    driver_cells = _grid_buckets(driver_lat, driver_lon, cell_lat, cell_lon)
+
+    rides, drivers, distances = [], [], []
+    for (row, col), cell_rides in ride_cells.items():
+        local = [
+            index
+            for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)
+            for index in driver_cells.get((row + d_row, col + d_col), ())
+        ]
+        if not local:
+            continue
+        cell_rides, local = np.asarray(cell_rides), np.asarray(local)
+        block = haversine_matrix(ride_lat[cell_rides], ride_lon[cell_rides], driver_lat[local], driver_lon[local])
+
+        keep = min(per_ride, len(local))
+        if keep < len(local):
+            nearest = np.argpartition(block, keep - 1, axis=1)[:, :keep]
+        else:
+            nearest = np.broadcast_to(np.arange(len(local)), block.shape)
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        hit_row, hit_col = np.nonzero(nearest_distances <= max_km)
+        rides.append(cell_rides[hit_row])
+        drivers.append(local[nearest[hit_row, hit_col]])
+        distances.append(nearest_distances[hit_row, hit_col])
+
+    if not rides:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty
+    return np.concatenate(rides), np.concatenate(drivers), np.concatenate(distances)
+
+
+def greedy_assignment(ride_lat, ride_lon, driver_lat, driver_lon,
+                      max_km: float, per_ride: int) -> List[Assignment]:
+    """Repeatedly take the globally shortest remaining ride/driver edge"""
+    rides, drivers, distances = candidate_edges(ride_lat, ride_lon, driver_lat, driver_lon, max_km, per_ride)
+    order = np.argsort(distances, kind="stable")
+    ride_taken = np.zeros(len(ride_lat), dtype=bool)
+    driver_taken = np.zeros(len(driver_lat), dtype=bool)
+
+    assignments = []
+    for edge in order.tolist():
+        ride, driver = rides[edge], drivers[edge]
+        if ride_taken[ride] or driver_taken[driver]:
+            continue
+        ride_taken[ride] = driver_taken[driver] = True
+        assignments.append(Assignment(int(ride), int(driver), float(distances[edge])))
+    return assignments
+
+
+def optimal_assignment(ride_lat, ride_lon, driver_lat, driver_lon, max_km: float) -> List[Assignment]:
+    """Min-cost assignment (Hungarian) over the full distance matrix"""
+    distances = haversine_matrix(ride_lat, ride_lon, driver_lat, driver_lon)
+    # Out-of-range pairs get a prohibitive cost and are dropped afterwards
+    cost = np.where(distances <= max_km, distances, max_km * 1e6)
+    rows, cols = get_linear_sum_assignment()(cost)
+    return [
+        Assignment(int(ride), int(driver), float(distances[ride, driver]))
+        for ride, driver in zip(rows, cols)
+        if distances[ride, driver] <= max_km
+    ]
+
+
+def compute_assignment(ride_lat, ride_lon, driver_lat, driver_lon,
+                       strategy: Optional[str] = None,
+                       max_km: Optional[float] = None,
+                       per_ride: Optional[int] = None) -> List[Assignment]:
+    """Pair rides with drivers minimising pickup distance"""
+    strategy = strategy or settings.dispatch_strategy
+    max_km = max_km or settings.dispatch_max_pickup_km
+    per_ride = per_ride or settings.dispatch_candidates_per_ride
+    if len(ride_lat) == 0 or len(driver_lat) == 0:
+        return []
+
+    ride_lat, ride_lon = np.asarray(ride_lat, dtype=np.float64), np.asarray(ride_lon, dtype=np.float64)
+    driver_lat, driver_lon = np.asarray(driver_lat, dtype=np.float64), np.asarray(driver_lon, dtype=np.float64)
+    if (strategy == "optimal" and get_linear_sum_assignment() is not None
+            and len(ride_lat) * len(driver_lat) <= settings.dispatch_optimal_max_cells):
+        return optimal_assignment(ride_lat, ride_lon, driver_lat, driver_lon, max_km)
+    return greedy_assignment(ride_lat, ride_lon, driver_lat, driver_lon, max_km, per_ride)
+
+
+class DispatchService:
+    @staticmethod
+    def load_candidates(db: Session) -> Tuple[List, List]:
+        """Oldest requested rides and the idle drivers not on a ride"""
+        rides = (
+            db.query(Ride.id, Ride.pickup_latitude, Ride.pickup_longitude)
+            .filter(Ride.status == "requested")
+            .order_by(Ride.created_at)
+            .limit(settings.dispatch_batch_size)
+            .all()
+        )
+        busy = {
+            driver_id for (driver_id,) in
+            db.query(Ride.driver_id).filter(Ride.status.in_(("accepted", "in_progress"))).all()
+        }
+        drivers = [position for position in driver_locations.available_drivers() if position.driver_id not in busy]
+        db.commit()  # end the read transaction, releasing the connection during matching
+        return rides, drivers
+
+    @staticmethod
+    async def run_round(db: DBSession, strategy: Optional[str] = None) -> Dict:
+        """
+        Match all requested rides to idle drivers and accept the pairs.
+
+        The reads and the accepting UPDATE go through ``run_db``; the matching
+        itself (NumPy, scipy) runs in the threadpool, so a large round never
+        holds the event loop, and no connection is checked out while it runs.
+        """
+        started = time.perf_counter()
+        rides, drivers = await run_db(db, DispatchService.load_candidates)
+
+        pairs = await run_in_threadpool(
+            compute_assignment,
+            [ride.pickup_latitude for ride in rides], [ride.pickup_longitude for ride in rides],
+            [driver.latitude for driver in drivers], [driver.longitude for driver in drivers],
+            strategy=strategy,
+        )
+        matched_at = time.perf_counter()
+
+        # One conditional UPDATE for the whole round; rides a driver accepted
+        # directly in the meantime are not in the result
+        accepted = await run_db(db, RideService.accept_rides, {
+            rides[pair.ride_index].id: drivers[pair.driver_index].driver_id for pair in pairs
+        })
+        accepted_ids = {ride.id for ride in accepted}
+        assignments = [
+            {
+                "ride_id": rides[pair.ride_index].id,
+                "driver_id": drivers[pair.driver_index].driver_id,
+                "pickup_distance_km": round(pair.distance_km, 3),
+            }
+            for pair in pairs
+            if rides[pair.ride_index].id in accepted_ids
+        ]
+
+        return {
+            "strategy": strategy or settings.dispatch_strategy,
+            "rides_considered": len(rides),
+            "drivers_considered": len(drivers),
+            "assignments": assignments,
+            "match_ms": round((matched_at - started) * 1000, 2),
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    @staticmethod
+    async def dispatch_loop(interval: Optional[float] = None) -> None:
+        """Background task: run a dispatch round every ``interval`` seconds"""
+        interval = interval or settings.dispatch_interval_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_scope() as db:
+                    result = await DispatchService.run_round(db)
+                if result["assignments"]:
+                    logger.info("Dispatch assigned %d rides in %.1f ms",
+                                len(result["assignments"]), result["total_ms"])
+            except Exception:
+                logger.exception("Dispatch round failed")
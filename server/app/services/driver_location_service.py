@@ -0,0 +1,316 @@
+"""In-memory driver location store with batched persistence"""
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import Lazy, settings
+from app.core.geo import EARTH_RADIUS_KM, cell_coords, haversine_km, lon_cell_count, search_box
+from app.database.connection import run_db, session_scope
+from app.database.dialects import upsert_insert
+from app.database.models import DriverLocation, User
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPosition:
+    """Latest known position of one driver"""
+
+    __slots__ = ("driver_id", "latitude", "longitude", "cell", "is_online", "updated_at")
+
+    def __init__(self, driver_id: int, latitude: float, longitude: float,
+                 cell: Tuple[int, int], is_online: bool, updated_at: float):
+        self.driver_id = driver_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.cell = cell
+        self.is_online = is_online
+        self.updated_at = updated_at
+
+    def to_dict(self) -> Dict:
+        return {
+            "driver_id": self.driver_id,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "is_online": self.is_online,
+            "updated_at": datetime.fromtimestamp(self.updated_at, tz=timezone.utc),
+        }
+
+
+class DriverLocationStore:
+    """
+    Driver positions bucketed into the lat/lon grid from app.core.geo.
+
+    Updates only touch memory; changed drivers are marked dirty and written to
+    ``driver_locations`` in one upsert per flush. The store is per process, so
+    with several workers each one sees the drivers whose updates it received.
+    """
+
+    def __init__(self, cell_size: Optional[float] = None, ttl_seconds: Optional[float] = None):
+        self.cell_size = cell_size or settings.geo_cell_size_deg
+        self.ttl_seconds = ttl_seconds or settings.driver_location_ttl_seconds
+        self._columns = lon_cell_count(self.cell_size)
+        self._positions: Dict[int, DriverPosition] = {}
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._dirty: Set[int] = set()
+        self._known_drivers: Set[int] = set()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+
+    def is_known_driver(self, driver_id: int) -> bool:
+        return driver_id in self._known_drivers
+
+    def mark_known_driver(self, driver_id: int) -> None:
+        self._known_drivers.add(driver_id)
+
+    def forget_driver(self, driver_id: int) -> None:
+        """Drop a driver entirely (e.g. the user was deleted)"""
+        with self._lock:
+            position = self._positions.pop(driver_id, None)
+            if position is not None:
+                self._remove_from_cell(position)
+            self._dirty.discard(driver_id)
+            self._known_drivers.discard(driver_id)
+
+    def update(self, driver_id: int, latitude: float, longitude: float,
+               is_online: bool = True, timestamp: Optional[float] = None) -> DriverPosition:
+        """Record a position report"""
+        cell = cell_coords(latitude, longitude, self.cell_size)
+        timestamp = timestamp or time.time()
+        with self._lock:
+            position = self._positions.get(driver_id)
+            if position is None:
+                position = DriverPosition(driver_id, latitude, longitude, cell, is_online, timestamp)
+                self._positions[driver_id] = position
+                self._cells.setdefault(cell, set()).add(driver_id)
+            else:
+                if position.cell != cell:
+                    self._remove_from_cell(position)
+                    self._cells.setdefault(cell, set()).add(driver_id)
+                    position.cell = cell
+                position.latitude = latitude
+                position.longitude = longitude
+                position.is_online = is_online
+                position.updated_at = timestamp
+            self._dirty.add(driver_id)
+            self.updates += 1
+        return position
+
+    def get(self, driver_id: int) -> Optional[DriverPosition]:
+        return self._positions.get(driver_id)
+
+    def is_available(self, position: DriverPosition, now: Optional[float] = None) -> bool:
+        """Online and reported recently enough to be trusted"""
+        return position.is_online and (now or time.time()) - position.updated_at <= self.ttl_seconds
+
+    def nearest(self, latitude: float, longitude: float, k: int,
+                radius_km: float) -> List[Tuple[DriverPosition, float]]:
+        """k nearest available drivers within radius_km, closest first"""
+        now = time.time()
+        center_row, center_col = cell_coords(latitude, longitude, self.cell_size)
+        # Only cells in the same lat/lon box as cell_ranges can hold a match:
+        # rows stop at the poles and columns at the box's longitude span
+        first_row, last_row, lon_delta = search_box(latitude, radius_km, self.cell_size)
+        reach = int(math.ceil(lon_delta / self.cell_size)) + 1
+        if lon_delta >= 180.0 or 2 * reach + 1 >= self._columns:
+            # Every column, each exactly once
+            west, east = self._columns // 2, (self._columns - 1) // 2
+        else:
+            west = east = reach
+        bounds = (first_row, last_row, center_col - west, center_col + east)
+
+        best: List[Tuple[float, int, DriverPosition]] = []  # max-heap via negated distance
+
+        def visit(cell: Tuple[int, int]) -> None:
+            for driver_id in tuple(self._cells.get(cell, ())):
+                position = self._positions.get(driver_id)
+                if position is None or not self.is_available(position, now):
+                    continue
+                distance = haversine_km(latitude, longitude, position.latitude, position.longitude)
+                if distance > radius_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, driver_id, position))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, driver_id, position))
+
+        if (last_row - first_row + 1) * (west + east + 1) > len(self._cells):
+            # Wide box (large radius, near a pole): fewer occupied cells than
+            # box cells, so check those directly instead of walking rings
+            for row, col in list(self._cells):
+                if first_row <= row <= last_row and (col - center_col + west) % self._columns <= west + east:
+                    visit((row, col))
+        else:
+            for ring in range(max(center_row - first_row, last_row - center_row, west, east) + 1):
+                for cell in self._ring_cells(center_row, center_col, ring, bounds):
+                    visit(cell)
+                if len(best) >= k and -best[0][0] <= self._beyond_ring_km(latitude, ring):
+                    break
+
+        return [(position, -negated) for negated, _, position in sorted(best, reverse=True)]
+
+    def _beyond_ring_km(self, latitude: float, ring: int) -> float:
+        """Lower bound on the distance from a point to any cell more than ``ring`` rings from its own"""
+        degrees = ring * self.cell_size
+        # Further rows: at least ``degrees`` of latitude away, along a meridian
+        along = EARTH_RADIUS_KM * math.radians(degrees)
+        # Further columns: at least the cross-track distance to the meridian
+        # ``degrees`` of longitude away (which shrinks to nothing at the poles)
+        across = EARTH_RADIUS_KM * math.asin(
+            math.cos(math.radians(latitude)) * math.sin(math.radians(min(degrees, 90.0)))
+        )
+        return min(along, across)
+
+    def available_drivers(self) -> List[DriverPosition]:
+        """Snapshot of every available driver"""
+        now = time.time()
+        return [position for position in list(self._positions.values()) if self.is_available(position, now)]
+
+    def stats(self) -> Dict:
+        return {
+            "tracked_drivers": len(self._positions),
+            "occupied_cells": len(self._cells),
+            "dirty": len(self._dirty),
+            "updates": self.updates,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+        }
+
+    def persist(self, db: Session) -> int:
+        """Upsert every position changed since the last flush in one statement"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = [self._positions[driver_id].to_dict() for driver_id in dirty if driver_id in self._positions]
+        if not rows:
+            return 0
+
+        flushed = False
+        try:
+            try:
+                self._upsert(db, rows)
+            except IntegrityError:
+                # A driver deleted since their last report (possibly through
+                # another worker) fails the users FK: drop them, keep the rest
+                db.rollback()
+                rows = self._drop_deleted_drivers(db, rows)
+                if rows:
+                    self._upsert(db, rows)
+            flushed = True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if not flushed:
+                # Retry on the next flush, also when cancelled mid-write (shutdown);
+                # newer updates keep their dirty mark anyway
+                with self._lock:
+                    self._dirty.update(row["driver_id"] for row in rows)
+                self.flush_errors += 1
+
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _upsert(db: Session, rows: List[Dict]) -> None:
+        stmt = upsert_insert(db, DriverLocation)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DriverLocation.driver_id],
+            set_={
+                "latitude": stmt.excluded.latitude,
+                "longitude": stmt.excluded.longitude,
+                "is_online": stmt.excluded.is_online,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt, rows)
+        db.commit()
+
+    def _drop_deleted_drivers(self, db: Session, rows: List[Dict]) -> List[Dict]:
+        """Forget drivers whose user no longer exists, returns the rows of the others"""
+        driver_ids = {row["driver_id"] for row in rows}
+        existing = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(driver_ids))}
+        db.commit()
+        deleted = driver_ids - existing
+        for driver_id in deleted:
+            self.forget_driver(driver_id)
+        if deleted:
+            logger.info("Dropped positions of deleted drivers %s", sorted(deleted))
+        return [row for row in rows if row["driver_id"] in existing]
+
+    def load(self, db: Session) -> int:
+        """Warm the store from the last persisted online positions"""
+        locations = db.query(DriverLocation).filter(DriverLocation.is_online == True).all()
+        for location in locations:
+            updated_at = location.updated_at
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            self.update(location.driver_id, location.latitude, location.longitude,
+                        location.is_online, updated_at.timestamp())
+            self.mark_known_driver(location.driver_id)
+        with self._lock:
+            self._dirty.clear()
+        return len(locations)
+
+    def _remove_from_cell(self, position: DriverPosition) -> None:
+        members = self._cells.get(position.cell)
+        if members is not None:
+            members.discard(position.driver_id)
+            if not members:
+                del self._cells[position.cell]
+
+    def _ring_cells(self, row: int, col: int, ring: int, bounds: Tuple[int, int, int, int]):
+        """Grid cells on the square ring ``ring`` steps from (row, col), inside (rows, unwrapped columns) bounds"""
+        first_row, last_row, first_col, last_col = bounds
+        if ring == 0:
+            yield row, col
+            return
+        cols = range(max(col - ring, first_col), min(col + ring, last_col) + 1)
+        for edge_row in (row - ring, row + ring):
+            if first_row <= edge_row <= last_row:
+                for edge_col in cols:
+                    yield edge_row, edge_col % self._columns
+        for edge_col in (col - ring, col + ring):
+            if first_col <= edge_col <= last_col:
+                for edge_row in range(max(row - ring + 1, first_row), min(row + ring - 1, last_row) + 1):
+                    yield edge_row, edge_col % self._columns
+
+
+driver_locations: DriverLocationStore = Lazy(DriverLocationStore)
+
+
+class DriverLocationService:
+    @staticmethod
+    def is_driver(db: Session, driver_id: int) -> bool:
+        """Check the user exists and is registered as a driver"""
+        user = db.query(User).filter(User.id == driver_id).first()
+        return bool(user and user.is_driver)
+
+    @staticmethod
+    async def flush_loop(interval: Optional[float] = None) -> None:
+        """Background task: persist dirty positions every ``interval`` seconds"""
+        interval = interval or settings.driver_location_flush_interval
+        while True:
+            await asyncio.sleep(interval)
+            await DriverLocationService.flush()
+
+    @staticmethod
+    async def flush() -> int:
+        """Persist dirty positions now"""
+        try:
+            async with session_scope() as db:
+                return await run_db(db, driver_locations.persist)
+        except Exception:
+            logger.exception("Driver location flush failed")
+            return 0
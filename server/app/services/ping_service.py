@@ -1,14 +1,159 @@
-"""Business logic for ping/pong functionality with database logging"""
+"""Business logic for ping/pong functionality with write-behind database logging"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+
+from app.core.config import Lazy, settings
+from app.database.connection import run_db, session_scope
 from app.models.ping import PingRequest, PongResponse
 from app.database.models import PingLog
 
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+class PingLogBuffer:
+    """
+    Bounded in-memory queue of PingLog rows written in bulk by a background task.
+
+    A flush is triggered when ``flush_size`` records are queued or every
+    ``flush_interval`` seconds, whichever comes first. When the queue is full the
+    overflow policy drops either the oldest queued record or the incoming one.
+    """
+
+    def __init__(self, max_size: int, flush_size: int, flush_interval: float, policy: str = "drop_oldest"):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', expected one of {OVERFLOW_POLICIES}")
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._queue: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def add(self, record: Dict) -> bool:
+        """Queue a record without touching the database, False if it was dropped"""
+        with self._lock:
+            if len(self._queue) >= self.max_size:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    return False
+                self._queue.popleft()
+            self._queue.append(record)
+            self.enqueued += 1
+            queued = len(self._queue)
+        if queued >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _take(self, count: int) -> List[Dict]:
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(count, len(self._queue)))]
+
+    def _requeue(self, records: List[Dict]) -> None:
+        """Put a failed batch back at the front, dropping what no longer fits"""
+        with self._lock:
+            room = max(self.max_size - len(self._queue), 0)
+            kept = records[:room]
+            self.dropped += len(records) - len(kept)
+            self._queue.extendleft(reversed(kept))
+
+    @staticmethod
+    def write(db: Session, records: List[Dict]) -> None:
+        """Insert a batch of ping logs in one executemany"""
+        db.execute(insert(PingLog), records)
+        db.commit()
+
+    async def _write_batch(self, batch: List[Dict]) -> bool:
+        """Write one batch, requeueing it on failure"""
+        try:
+            async with session_scope() as db:
+                await run_db(db, self.write, batch)
+        except Exception:
+            self.flush_errors += 1
+            self._requeue(batch)
+            logger.exception("Ping log flush failed, %d records requeued", len(batch))
+            return False
+        self.flushed += len(batch)
+        self.flushes += 1
+        return True
+
+    async def flush(self) -> int:
+        """Write everything queued right now, in batches of flush_size"""
+        written = 0
+        # Records arriving during the flush wait for the next one instead of
+        # being chased in tiny batches
+        pending = len(self._queue)
+        while written < pending:
+            batch = self._take(min(self.flush_size, pending - written))
+            if not batch:
+                return written
+            write = asyncio.ensure_future(self._write_batch(batch))
+            try:
+                ok = await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The batch is already off the queue: let it land (or be
+                # requeued) before stopping, so cancelling never loses it
+                await asyncio.wait([write])
+                raise
+            if not ok:
+                return written
+            written += len(batch)
+        return written
+
+    async def run(self) -> None:
+        """Background task: flush on size threshold or interval"""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+        finally:
+            self._wakeup = None
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self._queue),
+            "max_size": self.max_size,
+            "policy": self.policy,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+ping_log_buffer: PingLogBuffer = Lazy(lambda: PingLogBuffer(
+    max_size=settings.ping_log_buffer_size,
+    flush_size=settings.ping_log_flush_size,
+    flush_interval=settings.ping_log_flush_interval,
+    policy=settings.ping_log_overflow_policy,
+))
+
 
 class PingService:
     @staticmethod
-    def process_ping(ping_data: PingRequest, db: Session, ip_address: str = None) -> PongResponse:
-        """Process ping request and return pong response with database logging"""
-        
+    def process_ping(ping_data: PingRequest, ip_address: str = None) -> PongResponse:
+        """Process ping request and return pong response, queueing the database log"""
+
         if ping_data.data.lower() == "ping":
             response = PongResponse(message="pong")
         else:
@@ -16,14 +161,13 @@ class PingService:
                 message=f"Received: {ping_data.data}, but expected 'ping'",
                 status="warning"
             )
-        
-        # Log to database
-        ping_log = PingLog(
-            ping_data=ping_data.data,
-            response_message=response.message,
-            ip_address=ip_address
-        )
-        db.add(ping_log)
-        db.commit()
-        
-        return response
\ No newline at end of file
+
+        # Log to database (written behind by ping_log_buffer)
+        ping_log_buffer.add({
+            "ping_data": ping_data.data,
+            "response_message": response.message,
+            "ip_address": ip_address,
+            "created_at": datetime.now(timezone.utc),
+        })
+
+        return response
@@ -0,0 +1,149 @@
+"""Fare engine: trip distance/duration estimates, tariffs and batch quotes"""
+import math
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from app.core.cache import CacheBackend, create_cache
+from app.core.config import Lazy, settings
+from app.core.geo import haversine_km, lon_cell_count
+from app.services.surge_service import surge_tracker
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Quotes for a (tariff, pickup cell, destination cell) pair; tariffs only change
+# with the settings, so entries live until evicted
+quote_cache: CacheBackend = Lazy(lambda: create_cache(
+    "quotes", max_entries=settings.pricing_quote_cache_size, ttl_seconds=24 * 3600
+))
+
+
+class Tariff(NamedTuple):
+    base: float
+    per_km: float
+    per_minute: float
+    minimum: float
+
+
+class Quote(NamedTuple):
+    distance_km: float
+    duration_minutes: int
+    fare: float
+
+
+def get_tariff(name: Optional[str] = None) -> Tariff:
+    """Tariff by name (default tariff when None), raises KeyError if unknown"""
+    return Tariff(**settings.pricing_tariffs[name or settings.pricing_default_tariff])
+
+
+def road_distance_km(pickup_lat: float, pickup_lon: float, dest_lat: float, dest_lon: float) -> float:
+    """Estimated road distance: great-circle distance times the road factor"""
+    return haversine_km(pickup_lat, pickup_lon, dest_lat, dest_lon) * settings.pricing_road_factor
+
+
+def fare(tariff: Tariff, distance_km: float, duration_minutes: float) -> float:
+    """Price of a trip under a tariff, never below its minimum"""
+    amount = tariff.base + tariff.per_km * distance_km + tariff.per_minute * duration_minutes
+    return round(max(amount, tariff.minimum), 2)
+
+
+def quote_arrays(pickup_lat, pickup_lon, dest_lat, dest_lon, tariff: Tariff):
+    """Vectorised distance (km), duration (whole minutes) and fare for equally sized coordinate arrays"""
+    import numpy as np
+    from app.core.geo_vector import haversine_pairs
+
+    distance = haversine_pairs(pickup_lat, pickup_lon, dest_lat, dest_lon) * settings.pricing_road_factor
+    minutes = np.ceil(distance / settings.pricing_avg_speed_kmh * 60.0)
+    amounts = tariff.base + tariff.per_km * distance + tariff.per_minute * minutes
+    return distance, minutes, np.round(np.maximum(amounts, tariff.minimum), 2)
+
+
+def unique_pairs(first: "np.ndarray", second: "np.ndarray"):
+    """Distinct (first, second) pairs and, for every input position, the index of its pair"""
+    import numpy as np
+
+    order = np.lexsort((second, first))
+    first, second = first[order], second[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (np.diff(first) != 0) | (np.diff(second) != 0)
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.cumsum(starts) - 1
+    return first[starts], second[starts], inverse
+
+
+class PricingService:
+    @staticmethod
+    def quote_batch(pickup_lat: List[float], pickup_lon: List[float],
+                    dest_lat: List[float], dest_lon: List[float],
+                    tariff_name: Optional[str] = None) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Quote many trips at once, returns (distance_km, duration_minutes, fare) arrays.
+
+        Fares are before surge; see ``apply_surge``.
+
+        Coordinates are snapped to the centre of their pricing_quote_cell_deg cell,
+        so every trip between the same two cells gets the same memoised quote.
+        Each distinct cell pair is looked up once and only unseen pairs are
+        priced, in one vectorised pass.
+        """
+        import numpy as np
+
+        name = tariff_name or settings.pricing_default_tariff
+        tariff = get_tariff(name)
+        size = settings.pricing_quote_cell_deg
+        columns = lon_cell_count(size)
+        rows = np.floor((np.asarray([pickup_lat, dest_lat], dtype=np.float64) + 90.0) / size).astype(np.int64)
+        cols = np.floor((np.asarray([pickup_lon, dest_lon], dtype=np.float64) + 180.0) / size).astype(np.int64) % columns
+        pickup_cells, dest_cells = rows * columns + cols
+        pickup_cells, dest_cells, trip_pair = unique_pairs(pickup_cells, dest_cells)
+
+        keys = [(name, pickup, dest) for pickup, dest in zip(pickup_cells.tolist(), dest_cells.tolist())]
+        cached = quote_cache.get_many(keys)
+        quotes = np.empty((len(keys), 3), dtype=np.float64)
+        hits = [index for index, quote in enumerate(cached) if quote is not None]
+        if hits:
+            quotes[hits] = [cached[index] for index in hits]
+
+        if len(hits) < len(keys):
+            missing = np.setdiff1d(np.arange(len(keys)), hits, assume_unique=True)
+            pickup, dest = pickup_cells[missing], dest_cells[missing]
+            distance, minutes, amounts = quote_arrays(
+                (pickup // columns + 0.5) * size - 90.0, (pickup % columns + 0.5) * size - 180.0,
+                (dest // columns + 0.5) * size - 90.0, (dest % columns + 0.5) * size - 180.0,
+                tariff,
+            )
+            priced = np.column_stack([np.round(distance, 3), minutes, amounts])
+            quotes[missing] = priced
+            quote_cache.set_many({
+                keys[index]: tuple(quote) for index, quote in zip(missing.tolist(), priced.tolist())
+            })
+
+        per_trip = quotes[trip_pair]
+        return per_trip[:, 0], per_trip[:, 1].astype(np.int64), per_trip[:, 2]
+
+    @staticmethod
+    def apply_surge(pickup_lat: List[float], pickup_lon: List[float],
+                    fares: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Current surge multiplier at every pickup point and the surged fares"""
+        import numpy as np
+
+        multipliers = np.fromiter(
+            (surge_tracker.multiplier(lat, lon) for lat, lon in zip(pickup_lat, pickup_lon)),
+            dtype=np.float64, count=len(pickup_lat)
+        )
+        return multipliers, np.round(fares * multipliers, 2)
+
+    @staticmethod
+    def settle(pickup_lat: float, pickup_lon: float, dest_lat: float, dest_lon: float,
+               started_at: Optional[datetime], completed_at: datetime,
+               tariff_name: Optional[str] = None, surge_multiplier: float = 1.0) -> Quote:
+        """Final distance, duration and fare of a completed ride"""
+        distance_km = road_distance_km(pickup_lat, pickup_lon, dest_lat, dest_lon)
+        if started_at is not None:
+            if started_at.tzinfo is not None:
+                started_at = started_at.astimezone(timezone.utc).replace(tzinfo=None)
+            duration_minutes = max(1, math.ceil((completed_at - started_at).total_seconds() / 60.0))
+        else:
+            duration_minutes = math.ceil(distance_km / settings.pricing_avg_speed_kmh * 60.0)
+        return Quote(round(distance_km, 3), duration_minutes,
+                     round(fare(get_tariff(tariff_name), distance_km, duration_minutes) * surge_multiplier, 2))
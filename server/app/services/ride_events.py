@@ -0,0 +1,50 @@
+"""Ride change events pushed to WebSocket / SSE subscribers"""
+import json
+
+from app.core.pubsub import pubsub
+from app.models.ride import RideResponse
+
+# New requests and requests taken by a driver, for the driver apps' open-rides feed
+REQUESTED_CHANNEL = "rides:requested"
+
+# Rides only move forward through these, so an event's status orders it
+# against a snapshot of the same ride
+STATUS_ORDER = {"requested": 0, "accepted": 1, "in_progress": 2, "completed": 3}
+
+
+def ride_channel(ride_id: int) -> str:
+    return f"ride:{ride_id}"
+
+
+def passenger_channel(passenger_id: int) -> str:
+    return f"passenger:{passenger_id}"
+
+
+def driver_channel(driver_id: int) -> str:
+    return f"driver:{driver_id}"
+
+
+def encode_event(event_type: str, ride: RideResponse) -> str:
+    """JSON event, encoded once however many subscribers receive it"""
+    return '{"type":"%s","ride":%s}' % (event_type, ride.model_dump_json())
+
+
+def publish_ride_event(event_type: str, ride: RideResponse) -> None:
+    """Publish a ride change to its ride, passenger and driver channels (after commit)"""
+    channels = [ride_channel(ride.id), passenger_channel(ride.passenger_id)]
+    if ride.driver_id is not None:
+        channels.append(driver_channel(ride.driver_id))
+    if ride.status in ("requested", "accepted"):
+        channels.append(REQUESTED_CHANNEL)
+    pubsub.publish(channels, encode_event(event_type, ride))
+
+
+def older_than(status: str):
+    """Predicate for a ride channel's events that a snapshot in ``status`` already covers"""
+    rank = STATUS_ORDER.get(status, 0)
+
+    def stale(message: str) -> bool:
+        ride = json.loads(message).get("ride")
+        return ride is not None and STATUS_ORDER.get(ride["status"], 0) <= rank
+
+    return stale
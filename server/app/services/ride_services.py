@@ -1,74 +1,349 @@
 """Ride service with database operations"""
+from sqlalchemy import Select, and_, case, insert, or_, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.models import Ride, User
-from app.models.ride import RideCreate, RideUpdate
-from typing import List, Optional
+from starlette.concurrency import iterate_in_threadpool
+from app.core.cache import CacheBackend, create_cache
+from app.core.config import Lazy, settings
+from app.core.geo import cell_ranges, haversine_km
+from app.core.pagination import keyset_page_union
+from app.core.serialization import encode_ndjson, response_columns
+from app.database.connection import may_fill_cache, may_read_cache, read_session_scope
+from app.database.models import Ride, RideArchive, User
+from app.models.bulk import BulkItemResult
+from app.models.ride import RideCreate, RideResponse, RideUpdate
+from app.services.pricing_service import PricingService
+from app.services.ride_events import publish_ride_event
+from app.services.stats_service import RideStatsService
+from app.services.surge_service import surge_tracker
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Read-through cache of serialized rides, kept current by the status transitions
+ride_cache: CacheBackend = Lazy(lambda: create_cache("rides"))
+
 
 class RideService:
     @staticmethod
     def create_ride(db: Session, ride_data: RideCreate) -> Ride:
-        """Create a new ride request"""
-        db_ride = Ride(**ride_data.dict())
+        """Create a new ride request at the current surge multiplier"""
+        surge = surge_tracker.multiplier(ride_data.pickup_latitude, ride_data.pickup_longitude)
+        db_ride = Ride(**ride_data.dict(), surge_multiplier=surge)
         db.add(db_ride)
         db.commit()
         db.refresh(db_ride)
+        surge_tracker.record_request(db_ride.pickup_latitude, db_ride.pickup_longitude)
+        publish_ride_event("ride.requested", RideResponse.model_validate(db_ride))
         return db_ride
     
     @staticmethod
-    def get_ride_by_id(db: Session, ride_id: int) -> Optional[Ride]:
-        """Get ride by ID"""
-        return db.query(Ride).filter(Ride.id == ride_id).first()
+    def bulk_create_rides(db: Session, rides: List[RideCreate]) -> List[BulkItemResult]:
+        """
+        Create many ride requests with per-item results.
+
+        Passenger IDs are checked with one lookup per chunk; valid rows go in as
+        one multi-row INSERT per chunk.
+        """
+        results: List[BulkItemResult] = []
+        for start in range(0, len(rides), settings.bulk_chunk_size):
+            chunk = list(enumerate(rides[start:start + settings.bulk_chunk_size], start))
+            passenger_ids = {ride.passenger_id for _, ride in chunk}
+            known = {
+                user_id for (user_id,) in
+                db.query(User.id).filter(User.id.in_(passenger_ids)).all()
+            }
+
+            pending = []
+            for index, ride in chunk:
+                if ride.passenger_id not in known:
+                    results.append(BulkItemResult(index=index, status="invalid", detail="Passenger not found"))
+                else:
+                    pending.append((index, ride))
+            if not pending:
+                continue
+
+            rows = [
+                dict(ride.dict(), surge_multiplier=surge_tracker.multiplier(ride.pickup_latitude, ride.pickup_longitude))
+                for _, ride in pending
+            ]
+            try:
+                created = db.execute(
+                    insert(Ride).returning(*response_columns(Ride, RideResponse), sort_by_parameter_order=True), rows
+                ).all()
+                db.commit()
+            except IntegrityError:
+                # A passenger was deleted after the lookup: only their rides
+                # should fail, so retry one by one
+                db.rollback()
+                results.extend(
+                    RideService._create_one(db, index, row)
+                    for (index, _), row in zip(pending, rows)
+                )
+                continue
+            for _, ride in pending:
+                surge_tracker.record_request(ride.pickup_latitude, ride.pickup_longitude)
+            for row in created:
+                publish_ride_event("ride.requested", RideResponse.model_validate(row))
+            results.extend(
+                BulkItemResult(index=index, status="created", id=row.id)
+                for (index, _), row in zip(pending, created)
+            )
+
+        results.sort(key=lambda result: result.index)
+        return results
+
+    @staticmethod
+    def _create_one(db: Session, index: int, row: Dict) -> BulkItemResult:
+        """Insert one bulk item in its own transaction, an invalid result if its passenger is gone"""
+        try:
+            created = db.execute(insert(Ride).returning(*response_columns(Ride, RideResponse)), [row]).one()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return BulkItemResult(index=index, status="invalid", detail="Passenger not found")
+        surge_tracker.record_request(row["pickup_latitude"], row["pickup_longitude"])
+        publish_ride_event("ride.requested", RideResponse.model_validate(created))
+        return BulkItemResult(index=index, status="created", id=created.id)
+    
+    @staticmethod
+    def get_ride_by_id(db: Session, ride_id: int) -> Optional[RideResponse]:
+        """Get ride by ID (active or archived), served from ride_cache when possible"""
+        cached = ride_cache.get(ride_id) if may_read_cache(db) else None
+        if cached is not None:
+            return cached
+        db_ride = db.query(Ride).filter(Ride.id == ride_id).first()
+        if db_ride is None:
+            db_ride = db.query(RideArchive).filter(RideArchive.id == ride_id).first()
+        if db_ride is None:
+            return None
+        ride = RideResponse.model_validate(db_ride)
+        if may_fill_cache(db):
+            ride_cache.add(ride_id, ride)
+        return ride
     
     @staticmethod
-    def get_rides_by_passenger(db: Session, passenger_id: int) -> List[Ride]:
-        """Get all rides for a passenger"""
-        return db.query(Ride).filter(Ride.passenger_id == passenger_id).all()
+    def get_rides_by_passenger(db: Session, passenger_id: int, limit: int = 50,
+                               cursor: Optional[str] = None,
+                               columns_only: bool = False) -> Tuple[List[Ride], Optional[str]]:
+        """Get one page of a passenger's rides (active and archived), newest first, and the next-page cursor"""
+        return keyset_page_union([
+            (RideService._list_query(db, columns_only, model).filter(model.passenger_id == passenger_id),
+             model.created_at, model.id)
+            for model in (Ride, RideArchive)
+        ], limit, cursor, descending=True)
     
     @staticmethod
-    def get_rides_by_driver(db: Session, driver_id: int) -> List[Ride]:
-        """Get all rides for a driver"""
-        return db.query(Ride).filter(Ride.driver_id == driver_id).all()
+    def get_rides_by_driver(db: Session, driver_id: int, limit: int = 50,
+                            cursor: Optional[str] = None,
+                            columns_only: bool = False) -> Tuple[List[Ride], Optional[str]]:
+        """Get one page of a driver's rides (active and archived), newest first, and the next-page cursor"""
+        return keyset_page_union([
+            (RideService._list_query(db, columns_only, model).filter(model.driver_id == driver_id),
+             model.created_at, model.id)
+            for model in (Ride, RideArchive)
+        ], limit, cursor, descending=True)
     
     @staticmethod
-    def get_available_rides(db: Session) -> List[Ride]:
+    def get_available_rides(db: Session, columns_only: bool = False) -> List[Ride]:
         """Get rides that are available for drivers to accept"""
-        return db.query(Ride).filter(Ride.status == "requested").all()
+        return RideService._list_query(db, columns_only).filter(Ride.status == "requested").all()
+    
+    @staticmethod
+    def _list_query(db: Session, columns_only: bool, model=Ride):
+        """Query for full Ride (or RideArchive) objects, or plain RideResponse-shaped rows"""
+        if columns_only:
+            return db.query(*response_columns(model, RideResponse))
+        return db.query(model)
+    
+    @staticmethod
+    def export_statement(driver_id: Optional[int] = None, passenger_id: Optional[int] = None,
+                         status: Optional[str] = None, created_from: Optional[datetime] = None,
+                         created_to: Optional[datetime] = None) -> Select:
+        """Column-only SELECT of the rides to export (active and archived), oldest first, fetched in batches"""
+        parts = []
+        for model in (Ride, RideArchive):
+            stmt = select(*response_columns(model, RideResponse))
+            if driver_id is not None:
+                stmt = stmt.where(model.driver_id == driver_id)
+            if passenger_id is not None:
+                stmt = stmt.where(model.passenger_id == passenger_id)
+            if status is not None:
+                stmt = stmt.where(model.status == status)
+            if created_from is not None:
+                stmt = stmt.where(model.created_at >= created_from)
+            if created_to is not None:
+                stmt = stmt.where(model.created_at < created_to)
+            parts.append(stmt)
+        # Filters sit inside each branch, so they use each table's indexes (and
+        # prune archive partitions on PostgreSQL)
+        rides = union_all(*parts).subquery()
+        # yield_per streams from a server-side cursor where the driver has one
+        return (
+            select(rides).order_by(rides.c.created_at, rides.c.id)
+            .execution_options(yield_per=settings.export_batch_size)
+        )
+    
+    @staticmethod
+    async def stream_export(stmt: Select, last_write: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        NDJSON chunks of an export statement, one per fetched batch.
+
+        Opens its own (read replica) session, since the stream outlives the
+        request handler; only one batch of rows is held in memory at a time.
+        """
+        async with read_session_scope(last_write) as db:
+            if isinstance(db, AsyncSession):
+                result = await db.stream(stmt)
+                async for batch in result.partitions():
+                    yield encode_ndjson(RideResponse, batch)
+            else:
+                def batches():
+                    for batch in db.execute(stmt).partitions():
+                        yield encode_ndjson(RideResponse, batch)
+
+                async for chunk in iterate_in_threadpool(batches()):
+                    yield chunk
+    
+    @staticmethod
+    def get_nearby_rides(db: Session, latitude: float, longitude: float,
+                         radius_km: float, limit: int) -> List[Tuple[Ride, float]]:
+        """Get the nearest requested rides within radius_km, closest first"""
+        cells = or_(*(
+            Ride.pickup_cell.between(low, high)
+            for low, high in cell_ranges(latitude, longitude, radius_km)
+        ))
+        candidates = db.query(Ride).filter(and_(Ride.status == "requested", cells)).all()
+
+        nearby = []
+        for ride in candidates:
+            distance = haversine_km(latitude, longitude, ride.pickup_latitude, ride.pickup_longitude)
+            if distance <= radius_km:
+                nearby.append((ride, distance))
+        nearby.sort(key=lambda item: item[1])
+        return nearby[:limit]
+    
+    @staticmethod
+    def get_ride_status(db: Session, ride_id: int) -> Optional[str]:
+        """Get the current status of a ride (active or archived), None if it does not exist"""
+        row = db.query(Ride.status).filter(Ride.id == ride_id).first()
+        if row is None:
+            row = db.query(RideArchive.status).filter(RideArchive.id == ride_id).first()
+        return row.status if row else None
+    
+    @staticmethod
+    def _transition(db: Session, ride_id: int, expected_status: str,
+                    before_commit: Optional[Callable[[Session, Ride], None]] = None, **values) -> Optional[Ride]:
+        """
+        Move a ride out of expected_status in a single conditional UPDATE ... RETURNING.
+
+        Returns the updated ride, or None when the ride does not exist or another
+        request changed its status first (the UPDATE matched no row).
+        ``before_commit`` runs in the same transaction, only when the UPDATE won.
+        """
+        stmt = (
+            update(Ride)
+            .where(Ride.id == ride_id, Ride.status == expected_status)
+            .values(**values)
+            .returning(Ride)
+        )
+        db_ride = db.execute(stmt).scalars().first()
+        if db_ride is not None and before_commit is not None:
+            before_commit(db, db_ride)
+        db.commit()
+        if db_ride is not None:
+            ride = RideResponse.model_validate(db_ride)
+            ride_cache.set(ride_id, ride)
+            publish_ride_event(f"ride.{ride.status}", ride)
+        return db_ride
     
     @staticmethod
     def accept_ride(db: Session, ride_id: int, driver_id: int) -> Optional[Ride]:
         """Driver accepts a ride"""
-        db_ride = db.query(Ride).filter(Ride.id == ride_id).first()
-        if db_ride and db_ride.status == "requested":
-            db_ride.driver_id = driver_id
-            db_ride.status = "accepted"
-            db_ride.accepted_at = datetime.utcnow()
-            db.commit()
-            db.refresh(db_ride)
+        db_ride = RideService._transition(
+            db, ride_id, "requested",
+            driver_id=driver_id,
+            status="accepted",
+            accepted_at=datetime.utcnow()
+        )
+        if db_ride is not None:
+            surge_tracker.record_accept(db_ride.pickup_latitude, db_ride.pickup_longitude)
         return db_ride
-    
+
+    @staticmethod
+    def accept_rides(db: Session, drivers_by_ride: Dict[int, int]) -> List[Ride]:
+        """
+        Accept many rides in one conditional UPDATE ... RETURNING (ride id -> driver id).
+
+        Only rides still requested are updated; the others were accepted or
+        cancelled in the meantime and are simply missing from the result.
+        """
+        if not drivers_by_ride:
+            return []
+        stmt = (
+            update(Ride)
+            .where(Ride.id.in_(list(drivers_by_ride)), Ride.status == "requested")
+            .values(
+                driver_id=case(drivers_by_ride, value=Ride.id),
+                status="accepted",
+                accepted_at=datetime.utcnow()
+            )
+            .returning(Ride)
+            .execution_options(synchronize_session=False)
+        )
+        db_rides = db.execute(stmt).scalars().all()
+        db.commit()
+        for db_ride in db_rides:
+            ride = RideResponse.model_validate(db_ride)
+            ride_cache.set(ride.id, ride)
+            publish_ride_event("ride.accepted", ride)
+            surge_tracker.record_accept(db_ride.pickup_latitude, db_ride.pickup_longitude)
+        return db_rides
+
     @staticmethod
     def start_ride(db: Session, ride_id: int) -> Optional[Ride]:
         """Start a ride"""
-        db_ride = db.query(Ride).filter(Ride.id == ride_id).first()
-        if db_ride and db_ride.status == "accepted":
-            db_ride.status = "in_progress"
-            db_ride.started_at = datetime.utcnow()
-            db.commit()
-            db.refresh(db_ride)
-        return db_ride
+        return RideService._transition(
+            db, ride_id, "accepted",
+            status="in_progress",
+            started_at=datetime.utcnow()
+        )
     
     @staticmethod
-    def complete_ride(db: Session, ride_id: int, fare: float, distance_km: float, duration_minutes: int) -> Optional[Ride]:
-        """Complete a ride"""
-        db_ride = db.query(Ride).filter(Ride.id == ride_id).first()
-        if db_ride and db_ride.status == "in_progress":
-            db_ride.status = "completed"
-            db_ride.completed_at = datetime.utcnow()
-            db_ride.fare = fare
-            db_ride.distance_km = distance_km
-            db_ride.duration_minutes = duration_minutes
-            db.commit()
-            db.refresh(db_ride)
-        return db_ride
\ No newline at end of file
+    def complete_ride(db: Session, ride_id: int) -> Optional[Ride]:
+        """
+        Complete a ride, pricing it server-side from its coordinates and trip time.
+
+        The fare needs the trip's coordinates, start time and surge, which are
+        fixed once a ride is in progress; they come from ride_cache when
+        start_ride cached it in this worker, else from one extra SELECT.
+        Pricing in SQL instead would need haversine and timestamp arithmetic
+        in every dialect.
+        """
+        trip = ride_cache.get(ride_id)
+        if trip is None or trip.status != "in_progress":
+            trip = db.query(
+                Ride.pickup_latitude, Ride.pickup_longitude,
+                Ride.destination_latitude, Ride.destination_longitude,
+                Ride.started_at, Ride.surge_multiplier
+            ).filter(Ride.id == ride_id, Ride.status == "in_progress").first()
+        if trip is None:
+            return None
+
+        completed_at = datetime.utcnow()
+        quote = PricingService.settle(
+            trip.pickup_latitude, trip.pickup_longitude, trip.destination_latitude, trip.destination_longitude,
+            trip.started_at, completed_at, surge_multiplier=trip.surge_multiplier or 1.0
+        )
+        # Still conditional on in_progress: a concurrent completion (or one on
+        # another worker, behind a stale cache entry) makes this a no-op, and
+        # adds nothing to the stats, which commit together with the UPDATE
+        return RideService._transition(
+            db, ride_id, "in_progress",
+            before_commit=RideStatsService.record_completion,
+            status="completed",
+            completed_at=completed_at,
+            fare=quote.fare,
+            distance_km=quote.distance_km,
+            duration_minutes=quote.duration_minutes
+        )
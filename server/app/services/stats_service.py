@@ -0,0 +1,147 @@
+"""Per-user ride statistics, maintained incrementally and rebuildable from the ride history"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.database.dialects import upsert_insert
+from app.database.models import Ride, RideArchive, User, UserDailyRideStats, UserRideStats
+from app.models.stats import DailyStats, RoleStats, UserStatsResponse
+
+ROLES = ("driver", "passenger")
+
+# Additive columns shared by the lifetime and daily tables
+TOTALS = ("trips", "total_fare", "total_distance_km", "total_duration_minutes")
+
+
+def utc_day(value: datetime):
+    """Calendar day (UTC) of a timestamp; naive values are taken as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+class RideStatsService:
+    @staticmethod
+    def record_completion(db: Session, ride: Ride) -> None:
+        """
+        Add a just-completed ride to its driver's and passenger's totals and
+        daily buckets. Runs inside the completing transaction (the caller
+        commits), so the stats never count a ride twice or miss one.
+        """
+        totals = {
+            "trips": 1,
+            "total_fare": ride.fare or 0.0,
+            "total_distance_km": ride.distance_km or 0.0,
+            "total_duration_minutes": ride.duration_minutes or 0,
+        }
+        users = [(user_id, role) for user_id, role in ((ride.driver_id, "driver"), (ride.passenger_id, "passenger"))
+                 if user_id is not None]
+
+        stmt = upsert_insert(db, UserRideStats).values([
+            dict(totals, user_id=user_id, role=role, first_trip_at=ride.completed_at, last_trip_at=ride.completed_at)
+            for user_id, role in users
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserRideStats.user_id, UserRideStats.role],
+            set_=dict(
+                {name: getattr(UserRideStats, name) + getattr(stmt.excluded, name) for name in TOTALS},
+                first_trip_at=func.coalesce(UserRideStats.first_trip_at, stmt.excluded.first_trip_at),
+                last_trip_at=stmt.excluded.last_trip_at,
+            ),
+        ))
+
+        day = utc_day(ride.completed_at)
+        stmt = upsert_insert(db, UserDailyRideStats).values([
+            dict(totals, user_id=user_id, role=role, day=day) for user_id, role in users
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserDailyRideStats.user_id, UserDailyRideStats.role, UserDailyRideStats.day],
+            set_={name: getattr(UserDailyRideStats, name) + getattr(stmt.excluded, name) for name in TOTALS},
+        ))
+
+    @staticmethod
+    def get_user_stats(db: Session, user_id: int, days: int = 30) -> UserStatsResponse:
+        """Lifetime totals per role plus the last ``days`` daily buckets, by primary key"""
+        roles = {role: RoleStats() for role in ROLES}
+        for row in db.query(UserRideStats).filter(UserRideStats.user_id == user_id).all():
+            roles[row.role] = RoleStats(
+                trips=row.trips,
+                total_fare=round(row.total_fare, 2),
+                average_fare=round(row.total_fare / row.trips, 2) if row.trips else None,
+                total_distance_km=round(row.total_distance_km, 3),
+                total_duration_minutes=row.total_duration_minutes,
+                first_trip_at=row.first_trip_at,
+                last_trip_at=row.last_trip_at,
+            )
+
+        daily = []
+        if days:
+            since = utc_day(datetime.utcnow()) - timedelta(days=days - 1)
+            daily = [
+                DailyStats(day=row.day, role=row.role, trips=row.trips, total_fare=round(row.total_fare, 2),
+                           total_distance_km=round(row.total_distance_km, 3),
+                           total_duration_minutes=row.total_duration_minutes)
+                for row in db.query(UserDailyRideStats)
+                .filter(UserDailyRideStats.user_id == user_id, UserDailyRideStats.day >= since)
+                .order_by(UserDailyRideStats.day.desc(), UserDailyRideStats.role)
+                .all()
+            ]
+        return UserStatsResponse(user_id=user_id, driver=roles["driver"], passenger=roles["passenger"], daily=daily)
+
+    @staticmethod
+    def _totals(db: Session) -> Dict:
+        rows, trips, fare = db.execute(select(
+            func.count(), func.coalesce(func.sum(UserRideStats.trips), 0),
+            func.coalesce(func.sum(UserRideStats.total_fare), 0.0),
+        )).one()
+        return {"rows": rows, "trips": trips, "total_fare": round(fare, 2)}
+
+    @staticmethod
+    def rebuild(db: Session) -> Dict:
+        """
+        Recompute both stats tables from every completed ride (rides and
+        rides_archive) with set-based INSERT ... SELECT, in one transaction.
+        Archived rides have no FK to users, so rides of deleted users are skipped.
+        Returns the lifetime totals before and after, so drift in the
+        incrementally maintained rows shows up as a difference.
+        """
+        before = RideStatsService._totals(db)
+        completed = union_all(*(
+            select(model.driver_id, model.passenger_id, model.fare, model.distance_km,
+                   model.duration_minutes, model.completed_at)
+            .where(model.status == "completed")
+            for model in (Ride, RideArchive)
+        )).subquery()
+        if db.get_bind().dialect.name == "postgresql":
+            day = cast(func.timezone("UTC", completed.c.completed_at), Date)
+        else:
+            day = func.date(completed.c.completed_at)
+        sums = (
+            func.count(),
+            func.coalesce(func.sum(completed.c.fare), 0.0),
+            func.coalesce(func.sum(completed.c.distance_km), 0.0),
+            func.coalesce(func.sum(completed.c.duration_minutes), 0),
+        )
+
+        db.execute(delete(UserRideStats))
+        db.execute(delete(UserDailyRideStats))
+        for role, user_id in (("driver", completed.c.driver_id), ("passenger", completed.c.passenger_id)):
+            db.execute(insert(UserRideStats).from_select(
+                ["user_id", "role", *TOTALS, "first_trip_at", "last_trip_at"],
+                select(user_id, literal(role), *sums,
+                       func.min(completed.c.completed_at), func.max(completed.c.completed_at))
+                .where(user_id.in_(select(User.id)))
+                .group_by(user_id),
+            ))
+            db.execute(insert(UserDailyRideStats).from_select(
+                ["user_id", "role", "day", *TOTALS],
+                select(user_id, literal(role), day, *sums)
+                .where(user_id.in_(select(User.id)))
+                .group_by(user_id, day),
+            ))
+        after = RideStatsService._totals(db)
+        daily_rows = db.execute(select(func.count()).select_from(UserDailyRideStats)).scalar()
+        db.commit()
+        return {"before": before, "after": after, "daily_rows": daily_rows}
@@ -0,0 +1,155 @@
+"""Surge pricing: sliding-window demand/supply counters per geo cell"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import Lazy, settings
+from app.core.geo import cell_coords
+
+
+class CellWindow:
+    """Ring buffer of per-bucket request/accept counts for one cell, with running totals"""
+
+    __slots__ = ("requests", "accepts", "last_bucket", "total_requests", "total_accepts", "multiplier")
+
+    def __init__(self, slots: int, bucket: int):
+        self.requests = [0] * slots
+        self.accepts = [0] * slots
+        self.last_bucket = bucket
+        self.total_requests = 0
+        self.total_accepts = 0
+        self.multiplier = 1.0
+
+
+class SurgeTracker:
+    """
+    Requests and acceptances per coarse cell over the last ``window_seconds``.
+
+    Each cell keeps a fixed ring of ``window_seconds / bucket_seconds`` slots.
+    Moving to a new bucket clears at most one ring's worth of expired slots and
+    every event or read touches one slot, so updates and multiplier reads are
+    O(1). Counters are per process: with several workers each one surges on
+    the share of traffic it serves.
+    """
+
+    def __init__(self, cell_size: Optional[float] = None, window_seconds: Optional[int] = None,
+                 bucket_seconds: Optional[int] = None):
+        self.cell_size = cell_size or settings.surge_cell_deg
+        self.bucket_seconds = bucket_seconds or settings.surge_bucket_seconds
+        self.slots = max(1, math.ceil((window_seconds or settings.surge_window_seconds) / self.bucket_seconds))
+        self._cells: Dict[Tuple[int, int], CellWindow] = {}
+        self._lock = threading.Lock()
+        self._events_since_prune = 0
+
+    def record_request(self, latitude: float, longitude: float, now: Optional[float] = None) -> None:
+        """Count a ride request at its pickup point"""
+        self._record(latitude, longitude, now, requests=1)
+
+    def record_accept(self, latitude: float, longitude: float, now: Optional[float] = None) -> None:
+        """Count an accepted ride at its pickup point"""
+        self._record(latitude, longitude, now, accepts=1)
+
+    def multiplier(self, latitude: float, longitude: float, now: Optional[float] = None) -> float:
+        """Current surge multiplier at a point (1.0 when there is no surge)"""
+        if not settings.surge_enabled:
+            return 1.0
+        cell = cell_coords(latitude, longitude, self.cell_size)
+        window = self._cells.get(cell)
+        if window is None:
+            return 1.0
+        bucket = self._bucket(now)
+        if window.last_bucket == bucket:
+            return window.multiplier
+        with self._lock:
+            self._advance(window, bucket)
+            return window.multiplier
+
+    def snapshot(self, limit: int = 100, now: Optional[float] = None) -> List[Dict]:
+        """Busiest cells first, dropping cells whose window has emptied"""
+        bucket = self._bucket(now)
+        with self._lock:
+            self._prune(bucket)
+            cells = sorted(
+                self._cells.items(),
+                key=lambda item: (item[1].multiplier, item[1].total_requests),
+                reverse=True,
+            )[:limit]
+            return [
+                {
+                    "cell": [row, col],
+                    "latitude": round((row + 0.5) * self.cell_size - 90.0, 6),
+                    "longitude": round((col + 0.5) * self.cell_size - 180.0, 6),
+                    "requests": window.total_requests,
+                    "accepts": window.total_accepts,
+                    "multiplier": window.multiplier,
+                }
+                for (row, col), window in cells
+            ]
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": settings.surge_enabled,
+            "tracked_cells": len(self._cells),
+            "cell_size_deg": self.cell_size,
+            "window_seconds": self.slots * self.bucket_seconds,
+            "bucket_seconds": self.bucket_seconds,
+        }
+
+    def _bucket(self, now: Optional[float]) -> int:
+        return int((now or time.time()) // self.bucket_seconds)
+
+    def _record(self, latitude: float, longitude: float, now: Optional[float],
+                requests: int = 0, accepts: int = 0) -> None:
+        cell = cell_coords(latitude, longitude, self.cell_size)
+        bucket = self._bucket(now)
+        with self._lock:
+            window = self._cells.get(cell)
+            if window is None:
+                window = self._cells[cell] = CellWindow(self.slots, bucket)
+            else:
+                self._advance(window, bucket)
+            slot = bucket % self.slots
+            window.requests[slot] += requests
+            window.accepts[slot] += accepts
+            window.total_requests += requests
+            window.total_accepts += accepts
+            window.multiplier = self._multiplier(window)
+
+            self._events_since_prune += 1
+            if self._events_since_prune >= 10000:
+                self._prune(bucket)
+
+    def _advance(self, window: CellWindow, bucket: int) -> None:
+        """Expire the slots between the window's last bucket and ``bucket``"""
+        if bucket <= window.last_bucket:
+            return
+        for expired in range(window.last_bucket + 1, min(bucket, window.last_bucket + self.slots) + 1):
+            slot = expired % self.slots
+            window.total_requests -= window.requests[slot]
+            window.total_accepts -= window.accepts[slot]
+            window.requests[slot] = window.accepts[slot] = 0
+        window.last_bucket = bucket
+        window.multiplier = self._multiplier(window)
+
+    @staticmethod
+    def _multiplier(window: CellWindow) -> float:
+        """Multiplier from the unmet-demand ratio requests / (accepts + 1), in surge_step steps"""
+        if window.total_requests < settings.surge_min_requests:
+            return 1.0
+        pressure = window.total_requests / (window.total_accepts + 1)
+        raw = 1.0 + settings.surge_sensitivity * (pressure - 1.0)
+        # The epsilon keeps exact multiples exact: 1.3 / 0.1 is 12.999999999999998 in floats
+        stepped = math.floor(raw / settings.surge_step + 1e-9) * settings.surge_step
+        return round(min(max(stepped, 1.0), settings.surge_max_multiplier), 2)
+
+    def _prune(self, bucket: int) -> None:
+        self._events_since_prune = 0
+        for cell in list(self._cells):
+            window = self._cells[cell]
+            self._advance(window, bucket)
+            if window.total_requests == 0 and window.total_accepts == 0:
+                del self._cells[cell]
+
+
+surge_tracker: SurgeTracker = Lazy(SurgeTracker)
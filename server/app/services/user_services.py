@@ -1,8 +1,26 @@
 """User service with database operations"""
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.cache import CacheBackend, create_cache
+from app.core.config import Lazy, settings
+from app.core.pagination import keyset_page
+from app.core.serialization import response_columns
+from app.database.connection import may_fill_cache, may_read_cache
 from app.database.models import User
-from app.models.user import UserCreate, UserUpdate
-from typing import List, Optional
+from app.models.bulk import BulkItemResult
+from app.models.user import UserCreate, UserResponse, UserUpdate
+from typing import Dict, List, Optional, Tuple
+
+# Read-through cache of serialized users, updated by update_user/delete_user
+user_cache: CacheBackend = Lazy(lambda: create_cache("users"))
+
+# Unique user fields and the error reported when one is already taken
+UNIQUE_FIELDS = (
+    ("email", "Email already registered"),
+    ("username", "Username already taken"),
+    ("phone_number", "Phone number already registered"),
+)
 
 
 class UserService:
@@ -16,9 +34,106 @@ class UserService:
         return db_user
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-        """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+    def find_conflict(db: Session, user_data: UserCreate) -> Optional[str]:
+        """Check all unique fields in one query, returns the first conflict message"""
+        taken = UserService._taken_values(db, [user_data])
+        for field, message in UNIQUE_FIELDS:
+            if getattr(user_data, field) in taken[field]:
+                return message
+        return None
+    
+    @staticmethod
+    def _taken_values(db: Session, users: List[UserCreate]) -> Dict[str, set]:
+        """Existing email/username/phone values among the given users, one SELECT"""
+        values = {field: {getattr(user, field) for user in users} for field, _ in UNIQUE_FIELDS}
+        rows = db.query(User.email, User.username, User.phone_number).filter(or_(
+            User.email.in_(values["email"]),
+            User.username.in_(values["username"]),
+            User.phone_number.in_(values["phone_number"]),
+        )).all()
+        return {
+            field: {getattr(row, field) for row in rows} & values[field]
+            for field, _ in UNIQUE_FIELDS
+        }
+    
+    @staticmethod
+    def bulk_create_users(db: Session, users: List[UserCreate]) -> List[BulkItemResult]:
+        """
+        Create many users with per-item results.
+
+        Conflicts (inside the batch or with existing rows) are found with one
+        lookup per chunk; the remaining rows go in as one multi-row INSERT per chunk.
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(users)
+        seen = {field: set() for field, _ in UNIQUE_FIELDS}
+
+        for start in range(0, len(users), settings.bulk_chunk_size):
+            chunk = list(enumerate(users[start:start + settings.bulk_chunk_size], start))
+            taken = UserService._taken_values(db, [user for _, user in chunk])
+
+            pending = []
+            for index, user in chunk:
+                conflict = None
+                for field, message in UNIQUE_FIELDS:
+                    value = getattr(user, field)
+                    if value in taken[field]:
+                        conflict = message
+                    elif value in seen[field]:
+                        conflict = f"Duplicate {field} in batch"
+                    if conflict:
+                        break
+                if conflict:
+                    results[index] = BulkItemResult(index=index, status="conflict", detail=conflict)
+                    continue
+                for field, _ in UNIQUE_FIELDS:
+                    seen[field].add(getattr(user, field))
+                pending.append((index, user))
+
+            if not pending:
+                continue
+            try:
+                ids = db.execute(
+                    insert(User).returning(User.id, sort_by_parameter_order=True),
+                    [user.dict() for _, user in pending]
+                ).scalars().all()
+                db.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent insert of the same values: only
+                # the rows that actually collide should fail, so retry one by one
+                db.rollback()
+                for index, user in pending:
+                    results[index] = UserService._create_one(db, index, user)
+                continue
+            for (index, _), user_id in zip(pending, ids):
+                results[index] = BulkItemResult(index=index, status="created", id=user_id)
+
+        return results
+
+    @staticmethod
+    def _create_one(db: Session, index: int, user: UserCreate) -> BulkItemResult:
+        """Insert one bulk item in its own transaction, a conflict result if it collides"""
+        try:
+            user_id = db.execute(insert(User).returning(User.id), [user.dict()]).scalar_one()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            detail = UserService.find_conflict(db, user) or "Conflicted with a concurrent insert, retry the item"
+            return BulkItemResult(index=index, status="conflict", detail=detail)
+        return BulkItemResult(index=index, status="created", id=user_id)
+    
+    @staticmethod
+    def get_user_by_id(db: Session, user_id: int) -> Optional[UserResponse]:
+        """Get user by ID, served from user_cache when possible"""
+        cached = user_cache.get(user_id) if may_read_cache(db) else None
+        if cached is not None:
+            return cached
+        db_user = db.query(User).filter(User.id == user_id).first()
+        if db_user is None:
+            return None
+        user = UserResponse.model_validate(db_user)
+        if may_fill_cache(db):
+            user_cache.add(user_id, user)
+        return user
     
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -31,9 +146,11 @@ class UserService:
         return db.query(User).filter(User.username == username).first()
     
     @staticmethod
-    def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-        """Get list of users"""
-        return db.query(User).offset(skip).limit(limit).all()
+    def get_users(db: Session, limit: int = 100, cursor: Optional[str] = None,
+                  columns_only: bool = False) -> Tuple[List[User], Optional[str]]:
+        """Get one page of users in signup order and the next-page cursor"""
+        query = db.query(*response_columns(User, UserResponse)) if columns_only else db.query(User)
+        return keyset_page(query, User.created_at, User.id, limit, cursor)
     
     @staticmethod
     def update_user(db: Session, user_id: int, user_data: UserUpdate) -> Optional[User]:
@@ -44,6 +161,7 @@ class UserService:
                 setattr(db_user, key, value)
             db.commit()
             db.refresh(db_user)
+            user_cache.set(user_id, UserResponse.model_validate(db_user))
         return db_user
     
     @staticmethod
@@ -53,5 +171,6 @@ class UserService:
         if db_user:
             db.delete(db_user)
             db.commit()
+            user_cache.delete(user_id)
             return True
         return False
\ No newline at end of file
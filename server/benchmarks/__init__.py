@@ -0,0 +1 @@
+"""Benchmark scripts for the Mini-Uber API"""
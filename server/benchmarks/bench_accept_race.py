@@ -0,0 +1,85 @@
+"""
+Concurrent accept race check.
+
+Creates one requested ride and fires --drivers simultaneous
+PUT /api/rides/{id}/accept calls from different drivers. Exactly one must
+win (200); every other caller must get 409. Exits non-zero otherwise.
+
+Usage: python benchmarks/bench_accept_race.py --drivers 50 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench_env  # noqa: F401  (environment defaults)
+
+
+async def race(client, passenger_id: int, driver_ids) -> Counter:
+    """One round: a fresh ride and one accept per driver, all at once"""
+    ride = (await client.post("/api/rides/", json={
+        "passenger_id": passenger_id,
+        "pickup_address": "Race pickup",
+        "pickup_latitude": 40.7128,
+        "pickup_longitude": -74.0060,
+        "destination_address": "Race destination",
+        "destination_latitude": 40.7589,
+        "destination_longitude": -73.9851,
+    })).json()
+    responses = await asyncio.gather(*(
+        client.put(f"/api/rides/{ride['id']}/accept", params={"driver_id": driver_id})
+        for driver_id in driver_ids
+    ))
+    return Counter(response.status_code for response in responses)
+
+
+async def run(drivers: int, rounds: int) -> bool:
+    import httpx
+    from app.main import app
+    from app.database.schema import create_schema
+    from app.database.connection import dispose_engines
+
+    create_schema()
+    stamp = time.time_ns()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            users = []
+            for index in range(drivers + 1):
+                response = await client.post("/api/users/", json={
+                    "email": f"race.{stamp}.{index}@example.com",
+                    "username": f"race_{stamp}_{index}",
+                    "full_name": f"Race User {index}",
+                    "phone_number": f"+2{stamp}{index}",
+                    "is_driver": index > 0,
+                })
+                users.append(response.json()["id"])
+
+            ok = True
+            for round_number in range(1, rounds + 1):
+                statuses = await race(client, users[0], users[1:])
+                won = statuses.get(200, 0) == 1 and statuses.get(409, 0) == drivers - 1
+                ok = ok and won
+                print(f"  round {round_number}: {dict(statuses)} {'✅' if won else '❌'}")
+            return ok
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drivers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🏎️  {args.drivers} drivers racing to accept the same ride")
+    print("=" * 50)
+    if not asyncio.run(run(args.drivers, args.rounds)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
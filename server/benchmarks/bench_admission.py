@@ -0,0 +1,167 @@
+"""
+Admission control benchmark: well-behaved clients next to an abusive one.
+
+Spawns a uvicorn server on a throwaway SQLite database (seeded with
+--rides rides), then for --duration seconds runs at the same time:
+
+  - --pollers well-behaved clients, each polling GET /api/rides/{id} every
+    --poll-interval seconds (a passenger app)
+  - --abusers misbehaving clients, each with --abuser-concurrency requests in
+    a tight loop on GET /api/rides/, which lists every requested ride (a
+    driver app stuck polling)
+
+Rate limits are per client address, so every client connects from its own
+loopback address (127.0.1.x for pollers, 127.0.2.x for abusers; Linux routes
+all of 127.0.0.0/8 to lo).
+
+The scenario runs once with ADMISSION_ENABLED=false and once with it on.
+Reports the pollers' latency percentiles and errors, and what the abusers
+got through, so the effect on everyone else's tail latency is visible. The load runs in a
+lower-priority (niced) process, standing in for clients on other machines:
+on a small box, abusers retrying 429s in a tight loop would otherwise take
+the CPU from the server that is rejecting them.
+
+Usage: python benchmarks/bench_admission.py --pollers 50 --abusers 2 --duration 15
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_load import percentile, start_server
+from bench_replicas import ride_payload
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def seed(base_url: str, rides: int) -> list:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        stamp = time.time_ns()
+        user = (await client.post("/api/users/", json={
+            "email": f"adm.{stamp}@example.com", "username": f"adm_{stamp}",
+            "full_name": "Admission", "phone_number": f"+7{stamp}",
+        })).json()
+        created = []
+        for start in range(0, rides, 1000):
+            response = await client.post("/api/rides/bulk", json=[
+                ride_payload(user["id"]) for _ in range(min(1000, rides - start))
+            ])
+            created += [result["id"] for result in response.json()["results"]]
+    return created
+
+
+async def run(base_url: str, ride_ids: list, args) -> dict:
+    import httpx
+
+    poller_latencies = []
+    poller_errors = 0
+    abuser_codes = {}
+    async with contextlib.AsyncExitStack() as stack:
+        async def client_from(address: str, connections: int) -> httpx.AsyncClient:
+            transport = httpx.AsyncHTTPTransport(local_address=address,
+                                                 limits=httpx.Limits(max_connections=connections))
+            return await stack.enter_async_context(httpx.AsyncClient(base_url=base_url, timeout=30,
+                                                                     transport=transport))
+
+        pollers = [await client_from(f"127.0.1.{index + 1}", 1) for index in range(args.pollers)]
+        abusers = [await client_from(f"127.0.2.{index + 1}", args.abuser_concurrency) for index in range(args.abusers)]
+        deadline = time.perf_counter() + args.duration
+
+        async def poller(index: int) -> None:
+            nonlocal poller_errors
+            client = pollers[index]
+            path = f"/api/rides/{ride_ids[index % len(ride_ids)]}"
+            await asyncio.sleep(args.poll_interval * index / args.pollers)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                poller_latencies.append(elapsed)
+                poller_errors += not ok
+                await asyncio.sleep(max(0.0, args.poll_interval - elapsed))
+
+        async def abuser(client: httpx.AsyncClient) -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    status = (await client.get("/api/rides/")).status_code
+                except httpx.HTTPError:
+                    status = "error"
+                abuser_codes[status] = abuser_codes.get(status, 0) + 1
+
+        await asyncio.gather(
+            *(poller(index) for index in range(args.pollers)),
+            *(abuser(client) for client in abusers for _ in range(args.abuser_concurrency)),
+        )
+    poller_latencies.sort()
+    return {
+        "requests": len(poller_latencies),
+        "errors": poller_errors,
+        "p50_ms": percentile(poller_latencies, 0.5) * 1000,
+        "p95_ms": percentile(poller_latencies, 0.95) * 1000,
+        "p99_ms": percentile(poller_latencies, 0.99) * 1000,
+        "abuser": abuser_codes,
+    }
+
+
+def run_load(base_url: str, ride_ids: list, args) -> dict:
+    return asyncio.run(run(base_url, ride_ids, args))
+
+
+def run_niced(base_url: str, ride_ids: list, args) -> dict:
+    with multiprocessing.Pool(1, initializer=os.nice, initargs=(10,)) as pool:
+        return pool.apply(run_load, (base_url, ride_ids, args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pollers", type=int, default=50, help="at most 254")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--abusers", type=int, default=2, help="at most 254")
+    parser.add_argument("--abuser-concurrency", type=int, default=16)
+    parser.add_argument("--rides", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'admission.db')}",
+                   DISPATCH_ENABLED="false", ADMISSION_ENABLED="false")
+        subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                       check=True, capture_output=True)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(env, args.port, 1)
+        try:
+            ride_ids = asyncio.run(seed(base_url, args.rides))
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(f"🚦 Admission control: {args.pollers} pollers every {args.poll_interval:g}s, "
+              f"{args.abusers} abuser(s) x {args.abuser_concurrency} in flight, {args.duration:.0f}s")
+        print("=" * 78)
+        print(f"  {'admission':<11}{'polls':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}   abuser responses")
+        for enabled in (False, True):
+            server = start_server(dict(env, ADMISSION_ENABLED=str(enabled).lower()), args.port, 1)
+            try:
+                result = run_niced(base_url, ride_ids, args)
+            finally:
+                server.terminate()
+                server.wait()
+            abuser = ", ".join(f"{status}: {count:,}" for status, count in sorted(result["abuser"].items(), key=str))
+            print(f"  {'on' if enabled else 'off':<11}{result['requests']:>8,}{result['errors']:>8,}"
+                  f"{result['p50_ms']:>10,.1f}{result['p95_ms']:>10,.1f}{result['p99_ms']:>10,.1f}   {abuser}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Ride archive benchmark: one big rides table vs hot rides + rides_archive.
+
+Builds two databases holding the same --historical completed rides (spread
+over --months months) plus --active requested rides:
+
+  single    every ride in ``rides`` (the layout before archiving)
+  archived  completed rides in ``rides_archive`` (monthly partitions on
+            PostgreSQL), only the active rides in ``rides``
+
+Rows are generated with set-based INSERT ... SELECT and the indexes are
+built after loading, so 50M rows take minutes rather than hours. Reports,
+per layout:
+
+  - index size of ``rides`` (and of ``rides_archive``)
+  - RideService.get_available_rides latency
+  - RideService.accept_ride latency (conditional UPDATE on the hot table)
+  - first page of a passenger's history (spans both tables when archived)
+
+and the archiver's throughput draining --move-sample rides from the single
+layout.
+
+The default is temp SQLite files. For PostgreSQL, pass two empty databases
+with --database-url and --archived-database-url.
+
+Usage: python benchmarks/bench_archive.py --historical 50000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("RIDES_ARCHIVE_PARTITIONS_AHEAD", "1")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database.connection import Base  # noqa: E402
+from app.database.models import Ride, RideArchive  # noqa: E402
+from app.database.schema import ensure_archive_partitions  # noqa: E402
+from app.services.archive_service import RideArchiver  # noqa: E402
+from app.services.ride_services import RideService, ride_cache  # noqa: E402
+
+HISTORY_START = "2024-01-01 00:00:00"
+CHUNK = 1_000_000
+PASSENGERS = 100_000
+DRIVERS = 10_000
+
+RIDE_COLUMNS = (
+    "id, passenger_id, driver_id, pickup_address, pickup_latitude, pickup_longitude, "
+    "destination_address, destination_latitude, destination_longitude, pickup_cell, status, "
+    "fare, distance_km, duration_minutes, surge_multiplier, created_at, accepted_at, started_at, completed_at"
+)
+
+
+def series(dialect: str, low: int, high: int) -> tuple:
+    """(WITH prefix, FROM clause) producing integers n in [low, high]"""
+    if dialect == "postgresql":
+        return "", f"generate_series({low}, {high}) AS series(n)"
+    return (f"WITH RECURSIVE series(n) AS (SELECT {low} UNION ALL SELECT n + 1 FROM series WHERE n < {high}) ",
+            "series")
+
+
+def timestamp(dialect: str, seconds: str) -> str:
+    if dialect == "postgresql":
+        return f"(timestamptz '{HISTORY_START}+00' + ({seconds}) * interval '1 second')"
+    return f"datetime('{HISTORY_START}', '+' || ({seconds}) || ' seconds')"
+
+
+def ride_select(dialect: str, status: str, seconds: str) -> str:
+    created = timestamp(dialect, seconds)
+    done = status == "completed"
+    return (
+        f"SELECT n, {DRIVERS} + 1 + n % {PASSENGERS}, {'1 + n % ' + str(DRIVERS) if done else 'NULL'}, "
+        f"'pickup', 40.7 + (n % 1000) * 0.0001, -74.0 + (n % 997) * 0.0001, "
+        f"'destination', 40.75 + (n % 991) * 0.0001, -73.95 + (n % 983) * 0.0001, n % 10000, '{status}', "
+        f"{'12.5, 5.2, 14' if done else 'NULL, NULL, NULL'}, 1.0, {created}, "
+        f"{created if done else 'NULL'}, {created if done else 'NULL'}, {created if done else 'NULL'}"
+    )
+
+
+def build(url: str, layout: str, historical: int, active: int, months: int) -> None:
+    engine = create_engine(url)
+    dialect = engine.dialect.name
+    span = months * 30 * 86400
+    with engine.begin() as connection:
+        Base.metadata.drop_all(connection)
+        Base.metadata.create_all(connection)
+        archive = layout == "archived"
+        target = RideArchive.__table__ if archive else Ride.__table__
+        if archive:
+            first = datetime.fromisoformat(HISTORY_START)
+            ensure_archive_partitions(connection, [first, first + timedelta(seconds=span)])
+        for index in target.indexes:
+            index.drop(connection)
+
+        prefix, source = series(dialect, 1, DRIVERS + PASSENGERS)
+        connection.execute(text(
+            f"{prefix}INSERT INTO users (id, email, username, full_name, phone_number, is_active, is_driver, created_at) "
+            f"SELECT n, 'u' || n || '@bench', 'u' || n, 'Bench', '+' || n, true, n <= {DRIVERS}, "
+            f"{timestamp(dialect, '0')} FROM {source}"
+        ))
+
+    start = time.perf_counter()
+    for low in range(1, historical + 1, CHUNK):
+        high = min(low + CHUNK - 1, historical)
+        prefix, source = series(dialect, low, high)
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"{prefix}INSERT INTO {target.name} ({RIDE_COLUMNS}) "
+                f"{ride_select(dialect, 'completed', f'n * {span} / {historical}')} FROM {source}"
+            ))
+        print(f"    {layout:<9} {high:>12,} historical rides  {time.perf_counter() - start:>8,.0f}s", end="\r")
+    with engine.begin() as connection:
+        for index in target.indexes:
+            index.create(connection)
+        prefix, source = series(dialect, historical + 1, historical + active)
+        connection.execute(text(
+            f"{prefix}INSERT INTO rides ({RIDE_COLUMNS}) "
+            f"{ride_select(dialect, 'requested', str(span + 60))} FROM {source}"
+        ))
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+    print(f"    {layout:<9} {historical:>12,} historical rides  {time.perf_counter() - start:>8,.0f}s (indexes included)")
+    engine.dispose()
+
+
+def index_bytes(engine, table: str) -> dict:
+    """Bytes per index of a table (partitions summed on PostgreSQL)"""
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            rows = connection.execute(text(
+                "SELECT parent.relname, sum(pg_relation_size(tree.relid)) FROM pg_index "
+                "JOIN pg_class parent ON parent.oid = pg_index.indexrelid "
+                "CROSS JOIN LATERAL pg_partition_tree(pg_index.indexrelid) AS tree "
+                "WHERE pg_index.indrelid = CAST(:table AS regclass) GROUP BY parent.relname"
+            ), {"table": table}).all()
+        else:
+            rows = connection.execute(text(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table) GROUP BY name"
+            ), {"table": table}).all()
+    return {name: int(size) for name, size in rows}
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+def summary(samples: list) -> str:
+    return (f"p50 {statistics.median(samples):>8.3f} ms   "
+            f"p95 {samples[min(len(samples) - 1, int(0.95 * len(samples)))]:>8.3f} ms")
+
+
+def measure(url: str, layout: str, historical: int, active: int, repeat: int) -> None:
+    engine = create_engine(url)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    hot = index_bytes(engine, "rides")
+    archived = index_bytes(engine, "rides_archive")
+    print(f"  {layout}")
+    print(f"    rides index size           {sum(hot.values()) / 2**20:>10,.1f} MiB "
+          f"(idx_rides_status_created {hot.get('idx_rides_status_created', 0) / 2**20:,.1f} MiB)")
+    if archived:
+        print(f"    rides_archive index size   {sum(archived.values()) / 2**20:>10,.1f} MiB")
+
+    with factory() as db:
+        samples = timed(lambda: RideService.get_available_rides(db, True), repeat)
+        print(f"    get_available_rides        {summary(samples)}   ({active:,} rows)")
+
+        ride_ids = iter(range(historical + 1, historical + active + 1))
+        samples = timed(lambda: RideService.accept_ride(db, next(ride_ids), 1), min(repeat, active))
+        print(f"    accept_ride                {summary(samples)}")
+
+        passengers = iter(range(DRIVERS + 1, DRIVERS + 1 + PASSENGERS, PASSENGERS // repeat or 1))
+        samples = timed(lambda: RideService.get_rides_by_passenger(db, next(passengers), 50, None, True), repeat)
+        print(f"    passenger history page     {summary(samples)}")
+    ride_cache.clear()
+    engine.dispose()
+
+
+def measure_mover(url: str, sample: int) -> None:
+    engine = create_engine(url)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    moved = 0
+    start = time.perf_counter()
+    with factory() as db:
+        while moved < sample:
+            count = RideArchiver.move_batch(db, datetime.utcnow(), min(5000, sample - moved))
+            if not count:
+                break
+            moved += count
+    elapsed = time.perf_counter() - start
+    print(f"  archiver                     {moved / elapsed:>10,.0f} rides/s ({moved:,} moved in batches of 5,000)")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--historical", type=int, default=50_000_000)
+    parser.add_argument("--active", type=int, default=500, help="requested rides in the hot table")
+    parser.add_argument("--months", type=int, default=24, help="months of history")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--move-sample", type=int, default=100_000)
+    parser.add_argument("--database-url", default=None, help="empty database for the single layout")
+    parser.add_argument("--archived-database-url", default=None, help="empty database for the archived layout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=os.environ.get("TMPDIR")) as tmp:
+        urls = {
+            "single": args.database_url or f"sqlite:///{os.path.join(tmp, 'single.db')}",
+            "archived": args.archived_database_url or f"sqlite:///{os.path.join(tmp, 'archived.db')}",
+        }
+        print(f"🗄️  Ride archive: {args.historical:,} historical + {args.active:,} active rides")
+        print("=" * 78)
+        for layout, url in urls.items():
+            build(url, layout, args.historical, args.active, args.months)
+        for layout, url in urls.items():
+            measure(url, layout, args.historical, args.active, args.repeat)
+        measure_mover(urls["single"], args.move_sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Concurrent throughput benchmark for the database session modes.
+
+Runs the same read/write mix against the app in-process, once per mode:
+
+  blocking    - sync Session called directly inside ``async def`` handlers
+                (how the routes behaved before the async path existed)
+  threadpool  - DB_ASYNC=False, service calls pushed to the threadpool
+  async       - DB_ASYNC=True, AsyncSession on the async driver
+
+The ride cache is off (CACHE_BACKEND=none) so every request reaches the
+database: with it on, the run measures cache hits instead of session modes.
+Each mode runs in its own process because settings and engines are built once
+per process, on first use. Uses the DATABASE_URL from .env unless overridden.
+
+Usage: python benchmarks/bench_async_db.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench_env  # noqa: F401  (environment defaults)
+
+MODES = ["blocking", "threadpool", "async"]
+
+
+def seed_ride() -> int:
+    """Create a passenger and a ride to read back, returns the ride ID"""
+    from app.database.connection import SessionLocal
+    from app.models.ride import RideCreate
+    from app.models.user import UserCreate
+    from app.services.ride_services import RideService
+    from app.services.user_services import UserService
+
+    db = SessionLocal()
+    try:
+        stamp = time.time_ns()
+        user = UserService.create_user(db, UserCreate(
+            email=f"bench.{stamp}@example.com",
+            username=f"bench_{stamp}",
+            full_name="Bench Rider",
+            phone_number=f"+1{stamp}",
+        ))
+        ride = RideService.create_ride(db, RideCreate(
+            passenger_id=user.id,
+            pickup_address="Bench pickup",
+            pickup_latitude=40.7128,
+            pickup_longitude=-74.0060,
+            destination_address="Bench destination",
+            destination_latitude=40.7589,
+            destination_longitude=-73.9851,
+        ))
+        return ride.id
+    finally:
+        db.close()
+
+
+def add_blocking_route(app):
+    """Register the legacy handler shape: sync DB calls on the event loop"""
+    from app.database.connection import SessionLocal
+    from app.models.ride import RideResponse
+    from app.services.ride_services import RideService
+
+    @app.get("/bench/blocking/rides/{ride_id}", response_model=RideResponse)
+    async def blocking_get_ride(ride_id: int):
+        db = SessionLocal()
+        try:
+            return RideService.get_ride_by_id(db, ride_id)
+        finally:
+            db.close()
+
+
+async def drive(app, path: str, total: int, concurrency: int) -> dict:
+    """Fire ``total`` GETs at ``path`` with ``concurrency`` in flight"""
+    import httpx
+
+    remaining = iter(range(total))
+    errors = 0
+
+    async def worker(client):
+        nonlocal errors
+        for _ in remaining:
+            response = await client.get(path)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"requests": total, "errors": errors, "seconds": elapsed, "rps": total / elapsed}
+
+
+async def drive_and_dispose(app, path: str, total: int, concurrency: int) -> dict:
+    """Run the load then close pooled connections so the process can exit"""
+    from app.database.connection import dispose_engines
+
+    try:
+        return await drive(app, path, total, concurrency)
+    finally:
+        await dispose_engines()
+
+
+def run_mode(mode: str, total: int, concurrency: int) -> dict:
+    """Benchmark a single mode in the current process"""
+    os.environ["DB_ASYNC"] = "true" if mode == "async" else "false"
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ.setdefault("DEBUG", "false")
+    from app.main import app
+    from app.database.schema import create_schema
+
+    create_schema()
+    ride_id = seed_ride()
+    path = f"/api/rides/{ride_id}"
+    if mode == "blocking":
+        add_blocking_route(app)
+        path = f"/bench/blocking/rides/{ride_id}"
+
+    result = asyncio.run(drive_and_dispose(app, path, total, concurrency))
+    result["mode"] = mode
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mode", choices=MODES, help="run a single mode (used internally)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.requests, args.concurrency)))
+        return
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"🏁 GET /api/rides/{{id}} x {args.requests}, concurrency {args.concurrency}")
+    print("=" * 50)
+    for result in results:
+        print(f"  {result['mode']:<11} {result['rps']:>9.1f} req/s  "
+              f"({result['seconds']:.2f}s, {result['errors']} errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Dispatch matching latency benchmark.
+
+Times compute_assignment() (distance matrix + assignment, no database) for
+random ride/driver batches spread over a city-sized area.
+
+Usage: python benchmarks/bench_dispatch.py --sizes 1000 10000 --strategies greedy optimal
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CENTER = (40.7580, -73.9855)
+SPREAD_DEG = 0.2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--strategies", nargs="+", default=["greedy", "optimal"])
+    parser.add_argument("--max-km", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.services.dispatch_service import compute_assignment, get_linear_sum_assignment
+
+    rng = np.random.default_rng(42)
+    print(f"🧮 Dispatch matching, pickup radius {args.max_km} km (best of {args.repeat})")
+    print("=" * 60)
+    for size in args.sizes:
+        ride_lat = CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, size)
+        ride_lon = CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, size)
+        driver_lat = CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, size)
+        driver_lon = CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, size)
+
+        for strategy in args.strategies:
+            if strategy == "optimal" and (get_linear_sum_assignment() is None
+                                          or size * size > settings.dispatch_optimal_max_cells):
+                print(f"  {size:>6} x {size:<6} {strategy:<8} skipped (scipy missing or above DISPATCH_OPTIMAL_MAX_CELLS)")
+                continue
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                pairs = compute_assignment(ride_lat, ride_lon, driver_lat, driver_lon,
+                                           strategy=strategy, max_km=args.max_km)
+                timings.append(time.perf_counter() - start)
+            mean_km = float(np.mean([pair.distance_km for pair in pairs])) if pairs else 0.0
+            print(f"  {size:>6} x {size:<6} {strategy:<8} {min(timings) * 1000:>9.1f} ms  "
+                  f"{len(pairs):>6} matched, mean pickup {mean_km:.2f} km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Driver location write-path benchmark.
+
+Measures raw DriverLocationStore.update() throughput, the PUT
+/api/drivers/{id}/location endpoint in-process, and nearest-k query latency.
+Drivers are marked as known up front so no request touches the database;
+the report shows how many rows the next batched flush would write.
+
+Usage: python benchmarks/bench_driver_locations.py --drivers 20000 --updates 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench_env  # noqa: F401  (environment defaults)
+
+# Around Manhattan
+CENTER = (40.7580, -73.9855)
+SPREAD_DEG = 0.15
+
+
+def random_position(rng: random.Random):
+    return (CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+            CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG))
+
+
+def bench_store(drivers: int, updates: int) -> None:
+    from app.services.driver_location_service import DriverLocationStore
+
+    rng = random.Random(7)
+    store = DriverLocationStore()
+    reports = [(rng.randrange(drivers), *random_position(rng)) for _ in range(updates)]
+
+    start = time.perf_counter()
+    for driver_id, latitude, longitude in reports:
+        store.update(driver_id, latitude, longitude)
+    elapsed = time.perf_counter() - start
+    print(f"  store.update          {updates / elapsed:>12,.0f} updates/s")
+
+    queries = [random_position(rng) for _ in range(2000)]
+    start = time.perf_counter()
+    for latitude, longitude in queries:
+        store.nearest(latitude, longitude, 10, 5.0)
+    elapsed = time.perf_counter() - start
+    print(f"  nearest(k=10, 5 km)   {elapsed / len(queries) * 1e6:>12,.1f} us/query")
+    print(f"  next flush writes     {store.stats()['dirty']:>12,} rows for {updates:,} updates")
+
+
+async def bench_endpoint(drivers: int, updates: int, concurrency: int) -> None:
+    import httpx
+    from app.main import app
+    from app.database.schema import create_schema
+    from app.services.driver_location_service import driver_locations
+
+    create_schema()
+    for driver_id in range(drivers):
+        driver_locations.mark_known_driver(driver_id)
+
+    rng = random.Random(11)
+    remaining = iter(range(updates))
+
+    async def worker(client):
+        for _ in remaining:
+            latitude, longitude = random_position(rng)
+            await client.put(f"/api/drivers/{rng.randrange(drivers)}/location",
+                             json={"latitude": latitude, "longitude": longitude})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    print(f"  PUT .../location      {updates / elapsed:>12,.0f} updates/s (in-process, one worker)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drivers", type=int, default=20000)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--endpoint-updates", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📍 Driver locations: {args.drivers:,} drivers")
+    print("=" * 50)
+    bench_store(args.drivers, args.updates)
+    asyncio.run(bench_endpoint(args.drivers, args.endpoint_updates, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Environment defaults shared by the benchmarks; import before the app reads settings.
+
+Benchmark load comes from one client address (or in-process through
+httpx.ASGITransport), so admission control would rate-limit the benchmark
+itself: it is off unless ADMISSION_ENABLED is set explicitly. Spawned servers
+inherit it through os.environ; bench_admission turns it on per run.
+"""
+import os
+
+os.environ.setdefault("ADMISSION_ENABLED", "false")
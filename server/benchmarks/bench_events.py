@@ -0,0 +1,191 @@
+"""
+Real-time event subscriber benchmark.
+
+1. In-process: fan-out cost of the pub/sub hub itself, publishing to N
+   subscriptions spread over rides (no HTTP).
+2. Server: spawns one uvicorn worker on a throwaway SQLite database, opens
+   N concurrent SSE subscribers (GET /api/events/rides/{id}) spread over
+   --rides rides, then accepts every ride and measures how long each
+   subscriber waits for its ``ride.accepted`` event. Reports connect time,
+   server memory per subscriber and delivery latency.
+
+The subscriber side uses raw asyncio sockets so the client is not the
+bottleneck; each subscriber needs one file descriptor on both sides.
+
+Usage: python benchmarks/bench_events.py --subscribers 1000 5000 --rides 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+import bench_env  # noqa: F401  (environment defaults)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def bench_hub(subscribers: int, rides: int) -> None:
+    from app.core.pubsub import InMemoryPubSub
+
+    hub = InMemoryPubSub()
+    await hub.start()
+    subscriptions = [hub.subscribe([f"ride:{index % rides}"], maxsize=16) for index in range(subscribers)]
+    message = json.dumps({"type": "ride.accepted", "ride": {"id": 0, "status": "accepted"}})
+    start = time.perf_counter()
+    for ride in range(rides):
+        hub.publish([f"ride:{ride}", "passenger:1"], message)
+    elapsed = time.perf_counter() - start
+    for subscription in subscriptions:
+        subscription.close()
+    print(f"  hub fan-out           {elapsed / subscribers * 1e6:>10,.2f} us per delivery "
+          f"({subscribers:,} deliveries, {rides:,} publishes)")
+
+
+def server_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class SSESubscriber:
+    """Minimal SSE reader on a raw socket"""
+
+    def __init__(self, port: int, path: str):
+        self.port = port
+        self.path = path
+        self.connected = asyncio.Event()
+        self.accepted_at = None
+        self.writer = None
+
+    async def run(self) -> None:
+        reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writer.write(f"GET {self.path} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await self.writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if not line.startswith(b"data: "):
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "ride.snapshot":
+                self.connected.set()
+            elif event["type"] == "ride.accepted":
+                self.accepted_at = time.perf_counter()
+                return
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def bench_server(port: int, pid: int, subscribers: int, rides: int) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        stamp = time.time_ns()
+        users = (await client.post("/api/users/bulk", json=[
+            {"email": f"ev.{stamp}.{index}@example.com", "username": f"ev_{stamp}_{index}",
+             "full_name": "Events", "phone_number": f"+4{stamp}{index}", "is_driver": index == 1}
+            for index in range(2)
+        ])).json()["results"]
+        passenger_id, driver_id = users[0]["id"], users[1]["id"]
+        created = (await client.post("/api/rides/bulk", json=[
+            {"passenger_id": passenger_id, "pickup_address": "p", "pickup_latitude": 40.75,
+             "pickup_longitude": -73.98, "destination_address": "d", "destination_latitude": 40.76,
+             "destination_longitude": -73.97}
+            for _ in range(rides)
+        ])).json()["results"]
+        ride_ids = [result["id"] for result in created]
+
+        rss_before = server_rss_kb(pid)
+        subs = [SSESubscriber(port, f"/api/events/rides/{ride_ids[index % rides]}") for index in range(subscribers)]
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(sub.run()) for sub in subs]
+        await asyncio.gather(*(sub.connected.wait() for sub in subs))
+        connect_seconds = time.perf_counter() - start
+        await asyncio.sleep(0.5)
+        rss_after = server_rss_kb(pid)
+
+        sent_at = {}
+        for ride_id in ride_ids:
+            sent_at[ride_id] = time.perf_counter()
+            await client.put(f"/api/rides/{ride_id}/accept", params={"driver_id": driver_id})
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+
+        latencies = sorted(
+            (sub.accepted_at - sent_at[ride_ids[index % rides]]) * 1000 for index, sub in enumerate(subs)
+        )
+        stats = (await client.get("/api/metrics/events")).json()
+        for sub in subs:
+            sub.close()
+
+    print(f"  {subscribers:,} SSE subscribers on {rides:,} rides")
+    print(f"    connect all          {connect_seconds * 1000:>10,.0f} ms")
+    print(f"    server memory        {(rss_after - rss_before) / subscribers:>10,.1f} KB per subscriber "
+          f"({rss_after / 1024:,.0f} MB total)")
+    print(f"    delivery latency     p50 {statistics.median(latencies):,.1f} ms   "
+          f"p99 {percentile(latencies, 0.99):,.1f} ms   max {latencies[-1]:,.1f} ms")
+    print(f"    dropped              {stats['dropped']:>10,}")
+
+
+def start_server(env: dict, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        cwd=SERVER_DIR, env=env,
+    )
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--rides", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    print(f"📡 Event subscribers (file descriptor limit {hard:,})")
+    print("=" * 60)
+    for subscribers in args.subscribers:
+        asyncio.run(bench_hub(subscribers, args.rides))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'events.db')}",
+                   PUBSUB_BACKEND="memory", EVENTS_MAX_SUBSCRIBERS=str(max(args.subscribers) + 100))
+        subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                       check=True, capture_output=True)
+        for subscribers in args.subscribers:
+            server = start_server(env, args.port)
+            try:
+                asyncio.run(bench_server(args.port, server.pid, subscribers, args.rides))
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
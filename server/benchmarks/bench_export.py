@@ -0,0 +1,126 @@
+"""
+Ride export memory benchmark.
+
+Seeds N rides, drives GET /api/rides/export through the ASGI app in-process
+(discarding each body chunk as it is sent) and reports peak Python heap use
+(tracemalloc) during the export. The peak should stay roughly constant as N grows.
+
+Uses a throwaway SQLite file unless --database-url is given; run each size in
+a fresh process so the numbers are not skewed by earlier allocations.
+
+Usage: python benchmarks/bench_export.py --sizes 10000 100000 300000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def drain(app, path: str):
+    """Call the ASGI app directly, counting body lines/bytes without keeping them"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    counts = {"lines": 0, "bytes": 0}
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            counts["lines"] += message.get("body", b"").count(b"\n")
+            counts["bytes"] += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return counts["lines"], counts["bytes"]
+
+
+def seed(size: int) -> None:
+    """Replace the rides table contents with ``size`` rides for one passenger"""
+    from sqlalchemy import delete, insert
+    from app.database.connection import SessionLocal
+    from app.database.models import Ride, User
+    from app.database.schema import create_schema
+
+    create_schema()
+    db = SessionLocal()
+    try:
+        db.execute(delete(Ride))
+        if not db.query(User).first():
+            db.add(User(email="bench@example.com", username="bench", full_name="Bench Rider", phone_number="+10"))
+            db.flush()
+        passenger_id = db.query(User.id).scalar()
+        for start in range(0, size, 50000):
+            db.execute(insert(Ride), [
+                {
+                    "passenger_id": passenger_id,
+                    "pickup_address": f"{index} Pickup St",
+                    "pickup_latitude": 40.7,
+                    "pickup_longitude": -74.0,
+                    "destination_address": f"{index} Destination Ave",
+                    "destination_latitude": 40.8,
+                    "destination_longitude": -73.9,
+                }
+                for index in range(start, min(start + 50000, size))
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def export(size: int) -> None:
+    from app.database.connection import dispose_engines
+    from app.main import app
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    lines, received = await drain(app, "/api/rides/export")
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await dispose_engines()
+
+    print(f"  {size:>8} rides  {lines:>8} lines  {received / 1e6:>7.1f} MB sent  "
+          f"peak heap {peak / 1e6:>6.1f} MB  {lines / elapsed:>9,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)  # worker process mode
+    args = parser.parse_args()
+
+    if args.size is not None:
+        seed(args.size)
+        asyncio.run(export(args.size))
+        return
+
+    print("📤 Ride export (NDJSON stream), peak Python heap during the export")
+    print("=" * 60)
+    for size in args.sizes:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, DISPATCH_ENABLED="false")
+        env.pop("ASYNC_DATABASE_URL", None)
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--size", str(size)], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
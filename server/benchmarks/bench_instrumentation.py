@@ -0,0 +1,159 @@
+"""
+Request instrumentation overhead benchmark.
+
+1. Isolated: the middleware wrapped around a bare ASGI app, and one
+   in-memory SQLite SELECT with and without the cursor-execute hooks.
+   These are the numbers to watch; they do not depend on route work.
+2. End to end: the same requests through the ASGI app in-process (no
+   network) with INSTRUMENTATION_ENABLED=false and =true, each mode in a
+   fresh interpreter:
+
+     GET /api/rides/{id}   served from ride_cache: middleware cost only
+     GET /api/users/       one SELECT per request: middleware + SQL hooks
+
+   Whole requests take around a millisecond, so differences below run to
+   run noise (tens of microseconds) are not meaningful here.
+
+Usage: python benchmarks/bench_instrumentation.py --requests 5000 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+import bench_env  # noqa: F401  (environment defaults)
+
+
+async def measure(requests: int, rounds: int) -> dict:
+    import httpx
+    from app.database.connection import dispose_engines
+    from app.database.schema import create_schema
+    from app.main import app
+
+    create_schema()
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            stamp = time.time_ns()
+            user = (await client.post("/api/users/", json={
+                "email": f"instr.{stamp}@example.com", "username": f"instr_{stamp}",
+                "full_name": "Instrumentation", "phone_number": f"+5{stamp}",
+            })).json()
+            ride = (await client.post("/api/rides/", json={
+                "passenger_id": user["id"], "pickup_address": "p", "pickup_latitude": 40.75,
+                "pickup_longitude": -73.98, "destination_address": "d", "destination_latitude": 40.76,
+                "destination_longitude": -73.97,
+            })).json()
+            paths = {
+                "GET /api/rides/{id} (cached)": f"/api/rides/{ride['id']}",
+                "GET /api/users/ (1 SELECT)": "/api/users/?limit=20",
+            }
+            for label, path in paths.items():
+                for _ in range(200):
+                    await client.get(path)
+                best = float("inf")
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    for _ in range(requests):
+                        await client.get(path)
+                    best = min(best, (time.perf_counter() - start) / requests)
+                results[label] = best
+    finally:
+        await dispose_engines()
+    return results
+
+
+async def bench_isolated(iterations: int) -> None:
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.engine import Engine
+
+    from app.core import instrumentation
+
+    async def bare_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/", "endpoint": bare_app, "app": None}
+    wrapped = instrumentation.InstrumentationMiddleware(bare_app)
+    wrapped._templates[bare_app] = "/"
+
+    async def per_call(handler) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await handler(scope, receive, send)
+        return (time.perf_counter() - start) / iterations
+
+    bare = min([await per_call(bare_app) for _ in range(3)])
+    instrumented = min([await per_call(wrapped) for _ in range(3)])
+    print(f"  middleware            {(instrumented - bare) * 1e6:>10,.2f} us per request")
+
+    engine = create_engine("sqlite://")
+
+    def per_query(connection) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            connection.execute(text("SELECT 1")).fetchall()
+        return (time.perf_counter() - start) / iterations
+
+    with engine.connect() as connection:
+        token = instrumentation._current_request.set(instrumentation.RequestStats(keep_queries=False))
+        plain = min(per_query(connection) for _ in range(3))
+        event.listen(Engine, "before_cursor_execute", instrumentation._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", instrumentation._after_cursor_execute)
+        hooked = min(per_query(connection) for _ in range(3))
+        instrumentation._current_request.reset(token)
+    print(f"  SQL hooks             {(hooked - plain) * 1e6:>10,.2f} us per statement "
+          f"({plain * 1e6:,.1f} us -> {hooked * 1e6:,.1f} us for SELECT 1)")
+
+
+def run_mode(enabled: bool, requests: int, rounds: int, database_url: str) -> dict:
+    env = dict(os.environ, INSTRUMENTATION_ENABLED=str(enabled).lower(), DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--requests", str(requests), "--rounds", str(rounds)],
+        cwd=SERVER_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.requests, args.rounds))))
+        return
+
+    print("⏱️  Instrumentation overhead")
+    print("=" * 78)
+    asyncio.run(bench_isolated(args.requests * 10))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'instrumentation.db')}"
+        off = run_mode(False, args.requests, args.rounds, database_url)
+        on = run_mode(True, args.requests, args.rounds, database_url)
+
+    print(f"\n  End to end, best of {args.rounds} x {args.requests:,} requests (in-process ASGI)")
+    print(f"  {'request':<30}{'off us':>10}{'on us':>10}{'overhead us':>14}{'overhead':>10}")
+    for label in off:
+        before, after = off[label] * 1e6, on[label] * 1e6
+        print(f"  {label:<30}{before:>10,.1f}{after:>10,.1f}{after - before:>14,.1f}{(after - before) / before:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Ride lifecycle load test.
+
+Drives the full trip flow over HTTP against a real server:
+
+  POST /api/rides/ -> PUT accept -> PUT start -> PUT complete
+
+with --polls GET /api/rides/{id} reads (the passenger app polling) after
+each step; with --conditional the polls send If-None-Match with the last
+ETag seen, as the clients do. Trips arrive open-loop as a Poisson process at --rate trips/s
+for --duration seconds, at most --concurrency in flight; a trip that
+arrives while all slots are busy waits, and that wait is part of its
+"trip" latency (so an overloaded server shows up as tail latency rather
+than as a lower arrival rate).
+
+By default a uvicorn server is spawned on a throwaway SQLite database
+prepared with ``manage.py migrate``; use --database-url for a local
+Postgres, or --url to target a server that is already running.
+
+Reports count, errors, requests/s and p50/p95/p99 latency per endpoint.
+--output writes the results as JSON (with the git commit and parameters);
+--compare prints the change against an earlier results file and exits
+non-zero when a p95 or throughput moved by more than --threshold.
+
+Usage:
+  python benchmarks/bench_load.py --rate 50 --duration 30 --concurrency 64 --output load.json
+  python benchmarks/bench_load.py --rate 50 --duration 30 --concurrency 64 --compare load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+import bench_env  # noqa: F401  (environment defaults)
+
+CENTER = (40.7580, -73.9855)
+SPREAD_DEG = 0.1
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.latencies[label].append(time.perf_counter() - start)
+            self.errors[label] += 1
+            self.statuses[label][0] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - start)
+        self.statuses[label][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Dict]:
+        results = {}
+        for label in sorted(self.latencies):
+            ordered = sorted(self.latencies[label])
+            results[label] = {
+                "count": len(ordered),
+                "errors": self.errors[label],
+                "rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+                "statuses": {str(code): count for code, count in sorted(self.statuses[label].items())},
+            }
+        return results
+
+
+async def create_users(client, passengers: int, drivers: int):
+    """Bulk-create the passenger and driver accounts, returns their ids"""
+    stamp = time.time_ns()
+    users = [
+        {
+            "email": f"load.{stamp}.{index}@example.com",
+            "username": f"load_{stamp}_{index}",
+            "full_name": f"Load User {index}",
+            "phone_number": f"+3{stamp}{index}",
+            "is_driver": index >= passengers,
+        }
+        for index in range(passengers + drivers)
+    ]
+    response = await client.post("/api/users/bulk", json=users)
+    response.raise_for_status()
+    ids = [result["id"] for result in response.json()["results"]]
+    if None in ids:
+        raise RuntimeError("could not create the load test users")
+    return ids[:passengers], ids[passengers:]
+
+
+async def trip(client, recorder: Recorder, rng: random.Random, passenger_id: int,
+               idle_drivers: asyncio.Queue, polls: int, conditional: bool = False) -> bool:
+    """One ride from request to completion, False if any step failed"""
+    pickup = (CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG))
+    destination = (CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG))
+    response = await recorder.call(client, "POST /api/rides/", "POST", "/api/rides/", json={
+        "passenger_id": passenger_id,
+        "pickup_address": "Load pickup",
+        "pickup_latitude": pickup[0],
+        "pickup_longitude": pickup[1],
+        "destination_address": "Load destination",
+        "destination_latitude": destination[0],
+        "destination_longitude": destination[1],
+    })
+    if response is None:
+        return False
+    ride_id = response.json()["id"]
+    etag = None
+
+    async def poll():
+        nonlocal etag
+        for _ in range(polls):
+            headers = {"If-None-Match": etag} if conditional and etag else {}
+            polled = await recorder.call(client, "GET /api/rides/{id}", "GET", f"/api/rides/{ride_id}",
+                                         headers=headers)
+            if polled is not None:
+                etag = polled.headers.get("ETag", etag)
+
+    await poll()
+    driver_id = await idle_drivers.get()
+    try:
+        steps = [
+            ("PUT /api/rides/{id}/accept", f"/api/rides/{ride_id}/accept", {"driver_id": driver_id}),
+            ("PUT /api/rides/{id}/start", f"/api/rides/{ride_id}/start", None),
+            ("PUT /api/rides/{id}/complete", f"/api/rides/{ride_id}/complete", None),
+        ]
+        for label, url, params in steps:
+            response = await recorder.call(client, label, "PUT", url, params=params)
+            if response is None:
+                return False
+            etag = response.headers.get("ETag")
+            await poll()
+        return True
+    finally:
+        idle_drivers.put_nowait(driver_id)
+
+
+async def run_load(base_url: str, rate: float, duration: float, concurrency: int,
+                   passengers: int, drivers: int, polls: int, seed: int, conditional: bool = False) -> Dict:
+    import httpx
+
+    recorder = Recorder()
+    # Arrival times and each trip's choices come from separate seeded generators,
+    # so the offered load is identical between runs however requests interleave
+    arrivals = random.Random(seed)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        passenger_ids, driver_ids = await create_users(client, passengers, drivers)
+        idle_drivers: asyncio.Queue = asyncio.Queue()
+        for driver_id in driver_ids:
+            idle_drivers.put_nowait(driver_id)
+        slots = asyncio.Semaphore(concurrency)
+        outcomes = {"completed": 0, "failed": 0}
+
+        async def arrival(index: int, scheduled: float):
+            rng = random.Random(seed * 1_000_003 + index)
+            async with slots:
+                ok = await trip(client, recorder, rng, rng.choice(passenger_ids), idle_drivers, polls, conditional)
+            recorder.latencies["trip"].append(time.perf_counter() - scheduled)
+            outcomes["completed" if ok else "failed"] += 1
+            if not ok:
+                recorder.errors["trip"] += 1
+
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival - start < duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(arrival(len(tasks), next_arrival)))
+            next_arrival += arrivals.expovariate(rate)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    endpoints = recorder.summary(elapsed)
+    requests = sum(stats["count"] for label, stats in endpoints.items() if label != "trip")
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "trips": {"offered": len(tasks), **outcomes},
+        "total_rps": round(requests / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                              check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(env: dict, port: int, workers: int, timeout: float = 60.0) -> subprocess.Popen:
+    """Spawn uvicorn and wait until it answers GET /"""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    return wait_until_ready(server, port, timeout)
+
+
+def wait_until_ready(server: subprocess.Popen, port: int, timeout: float = 60.0) -> subprocess.Popen:
+    """Wait until a spawned server answers GET /, terminating it on timeout"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError(f"server did not answer within {timeout}s")
+
+
+def print_results(results: Dict) -> None:
+    trips = results["trips"]
+    print(f"🚗 {trips['completed']:,} trips completed, {trips['failed']:,} failed "
+          f"of {trips['offered']:,} offered in {results['elapsed_seconds']:.1f}s "
+          f"({results['total_rps']:,.1f} req/s)")
+    print("=" * 96)
+    print(f"  {'endpoint':<32}{'count':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, stats in results["endpoints"].items():
+        print(f"  {label:<32}{stats['count']:>8,}{stats['errors']:>8,}{stats['rps']:>9,.1f}"
+              f"{stats['p50_ms']:>10,.1f}{stats['p95_ms']:>10,.1f}{stats['p99_ms']:>10,.1f}{stats['max_ms']:>10,.1f}")
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print the change per endpoint, True when nothing regressed beyond ``threshold``"""
+    print(f"\n📊 Against {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp', '?')})")
+    print("=" * 96)
+    ok = True
+    for label, stats in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(label)
+        if before is None:
+            print(f"  {label:<32} (new)")
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            change = (stats[key] - before[key]) / before[key] if before[key] else 0.0
+            changes.append(f"{key[:-3] if key.endswith('_ms') else key} {change:+7.1%}")
+            regressed = change > threshold if key == "p95_ms" else key == "rps" and change < -threshold
+            if regressed:
+                ok = False
+                changes[-1] += " ⚠️"
+        print(f"  {label:<32} " + "   ".join(changes))
+    print(f"\n{'✅ No regression' if ok else '❌ Regression'} beyond {threshold:.0%}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="trip arrivals per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals")
+    parser.add_argument("--concurrency", type=int, default=32, help="max trips in flight")
+    parser.add_argument("--passengers", type=int, default=200)
+    parser.add_argument("--drivers", type=int, default=None, help="defaults to --concurrency")
+    parser.add_argument("--polls", type=int, default=1, help="GET /api/rides/{id} after each step")
+    parser.add_argument("--conditional", action="store_true", help="poll with If-None-Match")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None, help="target a running server instead of spawning one")
+    parser.add_argument("--database-url", default=None, help="database for the spawned server (default: temp SQLite)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the spawned server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--compare", default=None, help="earlier --output file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative change for --compare")
+    args = parser.parse_args()
+
+    parameters = {
+        "rate": args.rate,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "passengers": args.passengers,
+        "drivers": args.drivers or args.concurrency,
+        "polls": args.polls,
+        "conditional": args.conditional,
+        "seed": args.seed,
+        "workers": args.workers,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                           check=True, capture_output=True)
+            server = start_server(env, args.port, args.workers)
+            base_url = f"http://127.0.0.1:{args.port}"
+            parameters["database"] = env["DATABASE_URL"].split(":", 1)[0]
+        try:
+            results = asyncio.run(run_load(
+                base_url, args.rate, args.duration, args.concurrency,
+                args.passengers, parameters["drivers"], args.polls, args.seed, args.conditional,
+            ))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parameters": parameters,
+        **results,
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Batch quote benchmark.
+
+Times PricingService.quote_batch() (no HTTP, no database) against a per-trip
+scalar loop, cold (nothing memoised) and warm (same batch again). Trips are
+either uniformly random over a city-sized area or, with --hotspots N, between
+N popular places (jittered by ~50 m), where most trips share a cell pair.
+
+Usage: python benchmarks/bench_pricing.py --sizes 1000 10000 100000 --hotspots 0 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CENTER = (40.7580, -73.9855)
+SPREAD_DEG = 0.2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--hotspots", type=int, nargs="+", default=[0, 50])
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    rng = np.random.default_rng(7)
+    print(f"💵 Batch quotes, cells of {settings.pricing_quote_cell_deg} deg")
+    print("=" * 60)
+    for hotspots in args.hotspots:
+        places = CENTER + rng.uniform(-SPREAD_DEG, SPREAD_DEG, (max(hotspots, 1), 2))
+        for size in args.sizes:
+            run(size, hotspots, places, rng)
+
+
+def points(size: int, hotspots: int, places, rng):
+    """Latitude and longitude lists of random points or jittered hotspots"""
+    if not hotspots:
+        return [(CENTER[axis] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, size)).tolist() for axis in (0, 1)]
+    chosen = places[rng.integers(0, hotspots, size)] + rng.normal(0, 0.0005, (size, 2))
+    return chosen[:, 0].tolist(), chosen[:, 1].tolist()
+
+
+def run(size: int, hotspots: int, places, rng):
+    """Time the scalar loop and a cold and warm quote_batch for one trip set"""
+    from app.core.config import settings
+    from app.services.pricing_service import PricingService, fare, get_tariff, quote_cache, road_distance_km
+
+    tariff = get_tariff()
+    pickup_lat, pickup_lon = points(size, hotspots, places, rng)
+    dest_lat, dest_lon = points(size, hotspots, places, rng)
+
+    start = time.perf_counter()
+    for trip in zip(pickup_lat, pickup_lon, dest_lat, dest_lon):
+        distance = road_distance_km(*trip)
+        fare(tariff, distance, distance / settings.pricing_avg_speed_kmh * 60.0)
+    scalar = time.perf_counter() - start
+
+    quote_cache.clear()
+    timings = {}
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        PricingService.quote_batch(pickup_lat, pickup_lon, dest_lat, dest_lon)
+        timings[label] = time.perf_counter() - start
+
+    origin = f"{hotspots} hotspots" if hotspots else "uniform"
+    print(f"  {size:>7} trips {origin:<12} {quote_cache.stats().get('entries', 0):>7} cell pairs  "
+          f"scalar {scalar * 1000:>7.1f} ms  cold {timings['cold'] * 1000:>7.1f} ms  "
+          f"warm {timings['warm'] * 1000:>7.1f} ms  ({size / timings['warm']:>10,.0f} quotes/s warm)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Read replica routing check and read load benchmark.
+
+Two local SQLite databases stand in for a primary and its replicas: the
+primary is seeded, migrated copies of it become --replicas "replicas", and
+a uvicorn server is spawned with REPLICA_DATABASE_URLS pointing at them.
+The copies never receive later writes, which makes routing visible:
+
+1. Read-your-writes: a ride created after the copy is missing from
+   GET /api/rides/passenger/{id} on a replica, and present when the
+   client echoes the X-Last-Write header it got back from the write.
+2. Read load: --concurrency readers run GET /api/users/ and
+   GET /api/rides/passenger/{id} for --duration seconds; reports
+   requests/s, p50/p95 latency and connection checkouts per pool, i.e.
+   how reads were spread over the engines (REPLICA_SELECTION).
+
+Usage: python benchmarks/bench_replicas.py --replicas 2 --selection least_loaded
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench_load import percentile, start_server
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ride_payload(passenger_id: int) -> dict:
+    return {
+        "passenger_id": passenger_id, "pickup_address": "p", "pickup_latitude": 40.75,
+        "pickup_longitude": -73.98, "destination_address": "d", "destination_latitude": 40.76,
+        "destination_longitude": -73.97,
+    }
+
+
+async def seed(base_url: str, users: int, rides_per_user: int) -> list:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        stamp = time.time_ns()
+        created = (await client.post("/api/users/bulk", json=[
+            {"email": f"rep.{stamp}.{index}@example.com", "username": f"rep_{stamp}_{index}",
+             "full_name": "Replica", "phone_number": f"+6{stamp}{index}"}
+            for index in range(users)
+        ])).json()["results"]
+        user_ids = [result["id"] for result in created]
+        await client.post("/api/rides/bulk", json=[
+            ride_payload(user_id) for user_id in user_ids for _ in range(rides_per_user)
+        ])
+    return user_ids
+
+
+async def check_read_your_writes(base_url: str, passenger_id: int) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        path = f"/api/rides/passenger/{passenger_id}"
+        before = len((await client.get(path)).json())
+        write = await client.post("/api/rides/", json=ride_payload(passenger_id))
+        last_write = write.headers.get("X-Last-Write")
+        plain = len((await client.get(path)).json())
+        echoed = len((await client.get(path, headers={"X-Last-Write": last_write})).json())
+    print(f"  read-your-writes      X-Last-Write {last_write}")
+    print(f"    without header      {plain} rides (replica, {before} before the write)")
+    print(f"    with header         {echoed} rides (primary)  {'✅' if echoed == plain + 1 else '❌'}")
+
+
+async def read_load(base_url: str, user_ids: list, concurrency: int, duration: float) -> None:
+    import httpx
+
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        pools_before = (await client.get("/api/metrics/pool")).json()
+        deadline = time.perf_counter() + duration
+
+        async def reader(worker: int) -> None:
+            nonlocal errors
+            count = 0
+            while time.perf_counter() < deadline:
+                count += 1
+                if count % 2:
+                    path = "/api/users/?limit=50"
+                else:
+                    path = f"/api/rides/passenger/{user_ids[(worker + count) % len(user_ids)]}"
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(reader(worker) for worker in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        pools_after = (await client.get("/api/metrics/pool")).json()
+
+    latencies.sort()
+    checkouts = Counter({
+        name: stats["checkouts"] - pools_before.get(name, {}).get("checkouts", 0)
+        for name, stats in pools_after.items()
+    })
+    total = sum(checkouts.values()) or 1
+    print(f"  read load             {len(latencies) / elapsed:>10,.1f} req/s   p50 {percentile(latencies, 0.5) * 1000:,.1f} ms"
+          f"   p95 {percentile(latencies, 0.95) * 1000:,.1f} ms   errors {errors}")
+    for name, count in sorted(checkouts.items()):
+        print(f"    {name:<20}{count:>10,} checkouts ({count / total:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--selection", choices=["round_robin", "least_loaded"], default="round_robin")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rides-per-user", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = os.path.join(tmp, "primary.db")
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{primary}", REPLICA_DATABASE_URLS="[]")
+        subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                       check=True, capture_output=True)
+        server = start_server(env, args.port, 1)
+        try:
+            user_ids = asyncio.run(seed(base_url, args.users, args.rides_per_user))
+        finally:
+            server.terminate()
+            server.wait()
+
+        replica_urls = []
+        for index in range(args.replicas):
+            replica = os.path.join(tmp, f"replica-{index}.db")
+            shutil.copyfile(primary, replica)
+            replica_urls.append(f"sqlite:///{replica}")
+        env["REPLICA_DATABASE_URLS"] = "[" + ",".join(f'"{url}"' for url in replica_urls) + "]"
+        env["REPLICA_SELECTION"] = args.selection
+
+        print(f"📚 Read replicas: {args.replicas} x SQLite copy, {args.selection}, "
+              f"{args.users:,} users / {args.users * args.rides_per_user:,} rides")
+        print("=" * 78)
+        server = start_server(env, args.port, 1)
+        try:
+            asyncio.run(check_read_your_writes(base_url, user_ids[0]))
+            asyncio.run(read_load(base_url, user_ids, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+List serialization throughput benchmark.
+
+Loads N rides and times query + encode for each path:
+
+  orm       - full Ride objects, FastAPI response_model validation
+              (from_attributes) and the default JSONResponse
+  adapter   - column-only rows through the cached List[RideResponse] adapter
+  fast      - column-only rows dumped by encode_rows (orjson when installed)
+
+Each path's output is checked to decode to the same JSON as the orm path;
+whether the bytes are identical too is reported, as float formatting may
+differ between orjson and pydantic-core versions.
+
+Uses a throwaway SQLite file unless --database-url is given.
+
+Usage: python benchmarks/bench_serialization.py --sizes 1000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(session_factory, size: int) -> None:
+    """Replace the rides table contents with ``size`` rides for one passenger"""
+    from sqlalchemy import delete, insert
+    from app.database.models import Ride, User
+
+    db = session_factory()
+    try:
+        db.execute(delete(Ride))
+        if not db.query(User).first():
+            db.add(User(email="bench@example.com", username="bench", full_name="Bench Rider", phone_number="+10"))
+            db.flush()
+        passenger_id = db.query(User.id).scalar()
+        db.execute(insert(Ride), [
+            {
+                "passenger_id": passenger_id,
+                "pickup_address": f"{index} Pickup St",
+                "pickup_latitude": 40.7 + index * 1e-6,
+                "pickup_longitude": -74.0,
+                "destination_address": f"{index} Destination Ave",
+                "destination_latitude": 40.8,
+                "destination_longitude": -73.9,
+            }
+            for index in range(size)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.serialization import encode_rows, list_adapter, orjson
+    from app.database.connection import Base
+    from app.models.ride import RideResponse
+    from app.services.ride_services import RideService
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+    field = create_response_field(name="response", type_=List[RideResponse])
+
+    def orm_path(db):
+        rides = RideService.get_available_rides(db)
+        content = asyncio.run(serialize_response(field=field, response_content=rides))
+        return JSONResponse(content).body
+
+    def adapter_path(db):
+        rows = RideService.get_available_rides(db, columns_only=True)
+        adapter = list_adapter(RideResponse)
+        return adapter.dump_json(adapter.validate_python([dict(row._mapping) for row in rows]))
+
+    def fast_path(db):
+        return encode_rows(RideResponse, RideService.get_available_rides(db, columns_only=True))
+
+    paths = {"orm": orm_path, "adapter": adapter_path, "fast": fast_path}
+
+    print(f"📦 List serialization, rides table (best of {args.repeat}, orjson {'on' if orjson else 'missing'})")
+    print("=" * 60)
+    for size in args.sizes:
+        seed(session_factory, size)
+        baseline = None
+        reference = None
+        for name, path in paths.items():
+            timings = []
+            for _ in range(args.repeat):
+                db = session_factory()
+                try:
+                    start = time.perf_counter()
+                    body = path(db)
+                    timings.append(time.perf_counter() - start)
+                finally:
+                    db.close()
+            best = min(timings)
+            baseline = baseline or best
+            reference = reference or body
+            if json.loads(body) != json.loads(reference):
+                raise SystemExit(f"❌ {name} output decodes differently from orm")
+            same = "same bytes" if body == reference else "same JSON"
+            print(f"  {size:>7} rows {name:<8} {best * 1000:>9.1f} ms  {size / best:>10,.0f} rows/s  "
+                  f"{len(body) / 1e6:>6.1f} MB  x{baseline / best:.1f}  {same}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Startup benchmark.
+
+Measures, each in a fresh interpreter:
+  import   time to ``import app.main`` (module import + app construction)
+  serve    time from spawning uvicorn to the first 200 on ``GET /``
+
+The serve runs use a throwaway SQLite database prepared once with
+``manage.py migrate`` (pass --database-url to use another one).
+
+Usage: python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=SERVER_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_first_request(env: dict, port: int, timeout: float = 30.0) -> float:
+    url = f"http://127.0.0.1:{port}/"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"no response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                       check=True, capture_output=True)
+
+        imports = [time_import(env) for _ in range(args.runs)]
+        serves = [time_first_request(env, args.port) for _ in range(args.runs)]
+
+    print(f"🚀 Startup, median of {args.runs} runs")
+    print("=" * 60)
+    print(f"  import app.main       {statistics.median(imports) * 1000:>10,.0f} ms")
+    print(f"  first GET /           {statistics.median(serves) * 1000:>10,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Multi-worker throughput benchmark for the production server mode (run.py).
+
+Seeds a throwaway SQLite database (or --database-url), then for each count
+in --workers starts ``python run.py`` with WORKERS set and drives it at a
+fixed --concurrency for --duration seconds with a read-heavy mix:
+
+  GET  /api/users/?limit=50
+  GET  /api/rides/passenger/{id}
+  POST /api/pricing/quotes        (10 trips)
+
+The load comes from --clients processes on the same machine, so they compete
+with the server for CPU: throughput can only scale up to the number of cores
+not busy generating load. Reports requests/s, p50/p95 latency and the speedup
+over one worker; a table with no speedup on a single-core box is expected.
+
+Usage: python benchmarks/bench_workers.py --workers 1,2,4 --clients 2 --duration 15
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_load import percentile, wait_until_ready
+from bench_replicas import seed
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUOTE = {"trips": [
+    {"pickup_latitude": 40.70 + index * 0.01, "pickup_longitude": -74.0,
+     "destination_latitude": 40.75, "destination_longitude": -73.95 - index * 0.01}
+    for index in range(10)
+]}
+
+
+async def drive(base_url: str, user_ids: list, concurrency: int, duration: float) -> tuple:
+    import httpx
+
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int) -> None:
+            nonlocal errors
+            count = offset
+            while time.perf_counter() < deadline:
+                count += 1
+                start = time.perf_counter()
+                if count % 3 == 0:
+                    response = await client.get("/api/users/?limit=50")
+                elif count % 3 == 1:
+                    response = await client.get(f"/api/rides/passenger/{user_ids[count % len(user_ids)]}")
+                else:
+                    response = await client.post("/api/pricing/quotes", json=QUOTE)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(args: tuple) -> tuple:
+    return asyncio.run(drive(*args))
+
+
+def measure(env: dict, port: int, workers: int, user_ids: list, clients: int,
+            concurrency: int, duration: float) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "run.py"], cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=dict(env, WORKERS=str(workers), PORT=str(port), HOST="127.0.0.1"),
+    )
+    try:
+        wait_until_ready(server, port)
+        base_url = f"http://127.0.0.1:{port}"
+        # Warm every worker's pool and caches before measuring
+        client_process((base_url, user_ids, concurrency, 1.0))
+        per_client = max(1, concurrency // clients)
+        with multiprocessing.Pool(clients) as pool:
+            start = time.perf_counter()
+            results = pool.map(client_process, [(base_url, user_ids, per_client, duration)] * clients)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latency for samples, _ in results for latency in samples)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight, over all clients")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rides-per-user", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="instead of a throwaway SQLite file")
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+    counts = [int(count) for count in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(tmp, 'workers.db')}",
+                   RELOAD="false", DISPATCH_ENABLED="false")
+        subprocess.run([sys.executable, "manage.py", "migrate"], cwd=SERVER_DIR, env=env,
+                       check=True, capture_output=True)
+        server = subprocess.Popen([sys.executable, "run.py"], cwd=SERVER_DIR, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, env=dict(env, WORKERS="1", PORT=str(args.port)))
+        try:
+            wait_until_ready(server, args.port)
+            user_ids = asyncio.run(seed(f"http://127.0.0.1:{args.port}", args.users, args.rides_per_user))
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(f"🏭 Workers: {args.workers} on {os.cpu_count()} CPU(s), {args.clients} client processes, "
+              f"concurrency {args.concurrency}, {args.duration:.0f}s each")
+        print("=" * 78)
+        print(f"  {'workers':>8}{'requests':>11}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>10}")
+        baseline = None
+        for workers in counts:
+            result = measure(env, args.port, workers, user_ids, args.clients, args.concurrency, args.duration)
+            baseline = baseline or result["rps"]
+            print(f"  {workers:>8}{result['requests']:>11,}{result['errors']:>8,}{result['rps']:>10,.1f}"
+                  f"{result['p50_ms']:>10,.1f}{result['p95_ms']:>10,.1f}{result['rps'] / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
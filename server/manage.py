@@ -0,0 +1,102 @@
+"""
+Management commands.
+
+  python manage.py init-db    create missing tables (fresh database)
+  python manage.py migrate    create missing tables, add missing columns and
+                              indexes, backfill derived columns
+  python manage.py archive-rides
+                              move every completed ride older than
+                              RIDES_ARCHIVE_AFTER_SECONDS to rides_archive now
+                              (the running app does this in the background)
+  python manage.py rebuild-stats
+                              recompute user_ride_stats and user_daily_ride_stats
+                              from every completed ride (backfill, or to check
+                              the incrementally maintained totals)
+
+Schema changes are never applied when the application starts; run one of
+these as a deploy step before starting the workers.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def init_db(args) -> int:
+    from app.database.schema import create_schema
+
+    create_schema()
+    print("✅ Tables created")
+    return 0
+
+
+def migrate(args) -> int:
+    from app.database.schema import migrate_schema
+
+    actions = migrate_schema()
+    for action in actions:
+        print(f"  {'⚠️ ' if action.startswith('SKIPPED') else '✅'} {action}")
+    if not actions:
+        print("✅ Schema is up to date")
+    return 1 if any(action.startswith("SKIPPED") for action in actions) else 0
+
+
+def archive_rides(args) -> int:
+    from app.core.config import settings
+    from app.database.connection import get_session_factory
+    from app.services.archive_service import RideArchiver, archive_cutoff
+
+    cutoff = archive_cutoff()
+    moved = 0
+    with get_session_factory()() as db:
+        while True:
+            count = RideArchiver.move_batch(db, cutoff, settings.rides_archive_batch_size)
+            moved += count
+            if count < settings.rides_archive_batch_size:
+                break
+            print(f"  📦 {moved:,} rides archived")
+    print(f"✅ Archived {moved:,} completed rides")
+    return 0
+
+
+def rebuild_stats(args) -> int:
+    from app.database.connection import get_session_factory
+    from app.services.stats_service import RideStatsService
+
+    with get_session_factory()() as db:
+        result = RideStatsService.rebuild(db)
+    before, after = result["before"], result["after"]
+    print(f"  before   {before['rows']:>10,} user rows  {before['trips']:>12,} trips  {before['total_fare']:>16,.2f} fare")
+    print(f"  rebuilt  {after['rows']:>10,} user rows  {after['trips']:>12,} trips  {after['total_fare']:>16,.2f} fare")
+    print(f"           {result['daily_rows']:>10,} daily rows")
+    if not before["rows"]:
+        print("✅ Stats built")
+    elif before == after:
+        print("✅ Stats rebuilt, no drift")
+    else:
+        print("⚠️  Stats rebuilt, the previous totals had drifted")
+    return 0
+
+
+COMMANDS = {
+    "init-db": init_db,
+    "migrate": migrate,
+    "archive-rides": archive_rides,
+    "rebuild-stats": rebuild_stats,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    try:
+        return COMMANDS[args.command](args)
+    finally:
+        from app.database.connection import get_engine
+        get_engine().dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
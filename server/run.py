@@ -1,11 +1,93 @@
-"""Application entry point"""
+"""
+Application entry point
+
+  RELOAD=true python run.py    one auto-reloading process for local development
+  python run.py                production: WORKERS uvicorn processes sharing one
+                               socket (default 1, 0 = one per available CPU)
+
+Some state lives in each worker's memory and is not shared between workers:
+
+  driver positions     nearby drivers and dispatch only see drivers that
+                       reported to the same worker
+  surge                each worker prices from the requests/accepts it served
+  ride and user cache  another worker's writes show up after CACHE_TTL_SECONDS
+  rate limits          each worker has its own buckets, so a client gets up
+                       to WORKERS x ADMISSION_RATE
+  memory pubsub        ride events only reach clients on the publishing worker
+
+Everything else goes through the database, so it is shared. With more than
+one worker, run.py prints a warning for each of these that is enabled.
+
+Workers are started fresh (spawned) and build their own engines and pools on
+first use. Under a forking process manager, e.g.
+``gunicorn -k uvicorn.workers.UvicornWorker --preload app.main:app``, the
+inherited engines are dropped in each child (app.database.connection).
+
+On SIGTERM every worker stops accepting connections and gives in-flight
+requests GRACEFUL_SHUTDOWN_SECONDS to finish before cancelling them; SSE
+streams are long-lived and are cut at that deadline (clients reconnect).
+"""
+import os
+from typing import List
+
 import uvicorn
 from app.core.config import settings
 
-if __name__ == "__main__":
+
+def default_workers() -> int:
+    """CPUs this process may run on (respects affinity / cpusets where available)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_local_warnings() -> List[str]:
+    """Enabled features whose state is per worker process"""
+    warnings = ["Driver positions are per worker: nearby drivers and dispatch only see drivers "
+                "that reported to the same worker"]
+    if settings.dispatch_enabled:
+        warnings.append("DISPATCH_ENABLED=true starts a dispatch loop in every worker, each matching "
+                        "only its own drivers")
+    if settings.surge_enabled:
+        warnings.append("SURGE_ENABLED=true: each worker computes surge from the requests it served")
+    if settings.cache_backend != "none":
+        warnings.append(f"CACHE_BACKEND={settings.cache_backend}: other workers' writes show up "
+                        f"after up to {settings.cache_ttl_seconds:g}s")
+    if settings.admission_enabled:
+        warnings.append("ADMISSION_ENABLED=true: rate limits are per worker, so a client may get "
+                        "up to WORKERS x ADMISSION_RATE")
+    if settings.pubsub_backend == "memory":
+        warnings.append("PUBSUB_BACKEND=memory: ride events only reach clients connected to the publishing worker")
+    return warnings
+
+
+def serve_production() -> None:
+    workers = settings.workers or default_workers()
+    per_engine = settings.db_pool_size + settings.db_max_overflow
+    print(f"🚀 {settings.app_name} on {settings.host}:{settings.port} with {workers} worker(s), "
+          f"up to {workers * per_engine} connections per database engine")
+    if workers > 1:
+        for warning in worker_local_warnings():
+            print(f"⚠️  {warning}")
+        if settings.db_create_tables_on_startup:
+            # Once here rather than racing in every worker's startup
+            from app.database.connection import get_engine
+            from app.database.schema import create_schema
+            create_schema()
+            get_engine().dispose()
+            os.environ["DB_CREATE_TABLES_ON_STARTUP"] = "false"
+
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
-    )
\ No newline at end of file
+        workers=workers,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+    )
+
+
+if __name__ == "__main__":
+    if settings.reload:
+        uvicorn.run("app.main:app", host=settings.host, port=settings.port, reload=True)
+    else:
+        serve_production()